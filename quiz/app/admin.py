@@ -1,11 +1,19 @@
 import csv
+from itertools import chain
 from typing import Any
 
 from app.models import *
+from app.routers import read_database
+from app.scoring_service import ScoringService
+from app.search_service import QuizSearchService
+from app.version_service import QuizVersionService
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
 from django.db.models import Count
 from django.db.models.functions import TruncDate
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
 from nested_inline.admin import NestedModelAdmin, NestedStackedInline
 
 from .models import Quiz
@@ -26,38 +34,159 @@ class QuestionInline(NestedStackedInline):
     fields = ('question',)
 
 
+EXPORT_CHUNK_SIZE = 2000
+EXACT_COUNT_LIMIT = 10000
+
+
+def estimate_count(model, using):
+    """Row count of the model's table without scanning it, None when the database can't tell."""
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # The planner's estimate as of the last ANALYZE, -1 (or 0 on old versions) before the first one
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', (model._meta.db_table,))
+        elif connection.vendor == 'sqlite':
+            # Rowids only grow, so the highest one is a row count that still includes deleted rows
+            cursor.execute(f'SELECT MAX(_rowid_) FROM {table}')
+        else:
+            return None
+
+        row = cursor.fetchone()
+
+    return row[0] if row and row[0] and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator of changelists over tables too big to COUNT(*) on every page view. Unfiltered pages show the
+    table's estimated row count, filtered ones and tables below EXACT_COUNT_LIMIT rows are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= EXACT_COUNT_LIMIT:
+                return estimate
+
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Admin of a table with millions of rows: estimated counts and no second count of the whole table next to
+    filtered results. Subclasses join what their columns show (list_select_related), take foreign keys as raw
+    ids rather than dropdowns listing every row of the related table and search indexed columns only.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class Echo:
+    """File-like object whose write returns the value, so csv.writer can feed a streaming response."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(filename, header, rows):
+    writer = csv.writer(Echo())
+    lines = chain((writer.writerow(header),), (writer.writerow(row) for row in rows))
+
+    response = StreamingHttpResponse(lines, content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+    return response
+
+
 def export_daily_report(modeladmin, request, queryset):
     # Query the database to get the count of quizzes created per day
     daily_counts = (
-        Quiz.objects.annotate(created_date=TruncDate('created_at')).values('created_date').annotate(count=Count('id'))
+        Quiz.objects.using(read_database())
+        .annotate(created_date=TruncDate('created_at'))
+        .values('created_date')
+        .annotate(count=Count('id'))
+        .order_by('created_date')
+        .values_list('created_date', 'count')
+    )
+    rows = (
+        (created_date.strftime('%Y-%m-%d') if created_date else '', count)
+        for created_date, count in daily_counts.iterator(chunk_size=EXPORT_CHUNK_SIZE)
     )
 
-    rows = ('Date', 'Number of Quizzes')
-    for count in daily_counts:
-        rows.append((count('created_date').strftime('%Y-%m-%d'), count('count')))
+    return stream_csv('daily_report.csv', ('Date', 'Number of Quizzes'), rows)
 
-    # Generate the CSV file
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="daily_report.csv"'
 
-    writer = csv.writer(response)
-    for row in rows:
-        writer.writerow(row)
+export_daily_report.short_description = 'Export Daily Report'
 
-    return response
-    # TODO: add streaming CSV to handle very large tables
 
+def export_results(modeladmin, request, queryset):
+    quiz_ids = list(queryset.values_list('id', flat=True))
+    for quiz_id in quiz_ids:
+        ScoringService.score_quiz(quiz_id)
 
-export_daily_report.short_description = 'Export Daily Report'
+    results = (
+        UserQuizResult.objects.filter(user_quiz__quiz_id__in=quiz_ids)
+        .order_by('user_quiz__quiz_id', 'user_quiz_id')
+        .values_list('user_quiz__quiz_id', 'user_quiz__quiz__name', 'user_quiz__email', 'score', 'max_score')
+    )
+
+    return stream_csv(
+        'results.csv',
+        ('Quiz id', 'Quiz', 'Email', 'Score', 'Max score'),
+        results.iterator(chunk_size=EXPORT_CHUNK_SIZE),
+    )
+
+
+export_results.short_description = 'Export Results'
+
+
+def stream_user_answers(queryset, filename):
+    answers = queryset.using(read_database()).order_by('user_quiz_id', 'question_id').values_list(
+        'user_quiz__quiz_id',
+        'user_quiz_id',
+        'user_quiz__email',
+        'question_id',
+        'question__question',
+        'answer_id',
+        'answer__answer',
+        'is_checked',
+    )
+
+    return stream_csv(
+        filename,
+        ('Quiz id', 'User quiz id', 'Email', 'Question id', 'Question', 'Answer id', 'Answer', 'Checked'),
+        answers.iterator(chunk_size=EXPORT_CHUNK_SIZE),
+    )
+
+
+def export_quiz_answers(modeladmin, request, queryset):
+    return stream_user_answers(UserAnswer.objects.filter(user_quiz__quiz__in=queryset), 'answers.csv')
+
+
+export_quiz_answers.short_description = 'Export Answers'
 
 
-class QuizAdmin(NestedModelAdmin):
+def export_user_answers(modeladmin, request, queryset):
+    return stream_user_answers(queryset, 'answers.csv')
+
+
+export_user_answers.short_description = 'Export Answers'
+
+
+class QuizAdmin(NestedModelAdmin, LargeTableAdmin):
     model = Quiz
     inlines = (QuestionInline,)
     fields = ('id', 'name', 'time_limit', 'creator')
-    search_fields = ('id', 'name', 'creator__email')
+    raw_id_fields = ('creator',)
+    # Searched through the full-text index, see get_search_results
+    search_fields = ('name',)
     list_display = ('id', 'name', 'creator', 'created_at')
-    actions = (export_daily_report,)
+    list_select_related = ('creator',)
+    actions = (export_daily_report, export_results, export_quiz_answers)
 
     def formfield_for_foreignkey(self, db_field, request=None, **kwargs):
         if db_field.name == "creator":
@@ -65,20 +194,38 @@ class QuizAdmin(NestedModelAdmin):
 
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+
+        return QuizSearchService.search(queryset, search_term), False
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
 
-class UserAdmin(admin.ModelAdmin):
+        QuizVersionService.invalidate(form.instance.id)
+
+
+class UserAdmin(LargeTableAdmin):
     model = User
     fields = ('id', 'email', 'user_type')
-    search_fields = ('id', 'email', 'user_type')
+    # Exact matches, so the lookups use the email index and the username unique index
+    search_fields = ('email__exact', 'username__exact')
     list_display = ('id', 'email', 'user_type')
     list_filter = ('user_type',)
 
 
-class UserAnswerAdmin(admin.ModelAdmin):
+class UserAnswerAdmin(LargeTableAdmin):
     model = UserAnswer
 
     list_display = ('id', 'user', 'user_quiz', 'question', 'answer', 'is_checked')
+    list_select_related = ('user_quiz__user', 'user_quiz__quiz', 'question', 'answer')
     fields = ('id', 'user', 'user_quiz', 'question', 'answer', 'is_checked')
+    readonly_fields = ('user',)
+    raw_id_fields = ('user_quiz', 'question', 'answer')
+    # The participant's email index leads to their attempts and from there to the answers
+    search_fields = ('user_quiz__user__email__exact',)
+    actions = (export_user_answers,)
 
     def user(self, obj):
         return obj.user_quiz.user
@@ -87,14 +234,38 @@ class UserAnswerAdmin(admin.ModelAdmin):
         return obj.user_quiz.quiz
 
 
-class UserQuizAdmin(admin.ModelAdmin):
+class UserQuizAdmin(LargeTableAdmin):
     model = UserQuiz
 
-    list_display = ('id', 'user', 'quiz', 'started_at', 'finished_at')
-    fields = ('id', 'user', 'quiz', 'started_at', 'finished_at', 'results_sent')
+    list_display = ('id', 'user', 'quiz', 'started_at', 'expires_at', 'finished_at', 'questions_answered')
+    list_select_related = ('user', 'quiz')
+    fields = (
+        'id',
+        'user',
+        'quiz',
+        'snapshot',
+        'started_at',
+        'expires_at',
+        'finished_at',
+        'results_sent',
+        'questions_answered',
+        'last_activity_at',
+    )
+    readonly_fields = ('snapshot', 'questions_answered', 'last_activity_at')
+    raw_id_fields = ('user', 'quiz')
+    search_fields = ('user__email__exact',)
+
+
+class OutboxEmailAdmin(LargeTableAdmin):
+    model = OutboxEmail
+
+    list_display = ('id', 'to_email', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('to_email__exact',)
 
 
 admin.site.register(User, UserAdmin)
 admin.site.register(UserAnswer, UserAnswerAdmin)
 admin.site.register(UserQuiz, UserQuizAdmin)
 admin.site.register(Quiz, QuizAdmin)
+admin.site.register(OutboxEmail, OutboxEmailAdmin)
@@ -0,0 +1,111 @@
+from collections import defaultdict
+
+from app.models import PossibleAnswerStats, QuestionStats, UserAnswer
+from app.scoring_service import ScoringService
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+
+
+class AnalyticsService:
+    """
+    Question and possible answer statistics are running totals over attempts. The upload path compares what the
+    attempt had answered before with what it has now and applies the difference, so reading them never scans
+    UserAnswer. Correctness follows grading: exactly the correct answers of the attempt's snapshot checked.
+    """
+
+    @classmethod
+    def create_snapshot_rows(cls, snapshot):
+        """Zero statistics rows for the questions and possible answers a snapshot shows."""
+        questions = snapshot.content['questions']
+        cls.create_rows(
+            [question['id'] for question in questions],
+            [answer['id'] for question in questions for answer in question['possible_answers']],
+            snapshot.created_at,
+        )
+
+    @classmethod
+    def create_rows(cls, question_ids, answer_ids, now):
+        QuestionStats.objects.bulk_create(
+            [QuestionStats(question_id=question_id, created_at=now, updated_at=now) for question_id in question_ids],
+            ignore_conflicts=True,
+        )
+        PossibleAnswerStats.objects.bulk_create(
+            [
+                PossibleAnswerStats(possible_answer_id=answer_id, created_at=now, updated_at=now)
+                for answer_id in answer_ids
+            ],
+            ignore_conflicts=True,
+        )
+
+    @classmethod
+    def answers_of(cls, user_quiz_id, question_ids):
+        """(question id, answer id) -> is_checked of what the attempt uploaded so far for the given questions."""
+        rows = UserAnswer.objects.filter(user_quiz_id=user_quiz_id, question_id__in=question_ids).values_list(
+            'question_id', 'answer_id', 'is_checked'
+        )
+        return {(question_id, answer_id): is_checked for question_id, answer_id, is_checked in rows}
+
+    @classmethod
+    def record_answers(cls, user_quiz, previous, submitted, now):
+        """
+        Apply the change from the previous to the submitted answers of an attempt to the statistics, both given
+        as (question id, answer id) -> is_checked. Submitted answers overwrite previous ones as the upload does.
+        """
+        if user_quiz.snapshot_id:
+            answer_key = user_quiz.snapshot.answer_key
+        else:
+            # Started before snapshots existed, graded by the live quiz and possibly without statistics rows yet.
+            answer_key = ScoringService.answer_keys([user_quiz.quiz_id]).get(user_quiz.quiz_id, {})
+            cls.create_rows(
+                {question_id for question_id, _ in submitted}, {answer_id for _, answer_id in submitted}, now
+            )
+
+        current = {**previous, **submitted}
+        question_ids = {question_id for question_id, _ in submitted}
+        previous_question_ids = {question_id for question_id, _ in previous}
+        before = cls.checked_by_question(previous)
+        after = cls.checked_by_question(current)
+
+        answered, correct, answer_seconds = {}, {}, {}
+        for question_id in question_ids:
+            correct_ids = set(answer_key.get(str(question_id), ()))
+            was_correct = bool(before[question_id]) and before[question_id] == correct_ids
+            is_correct = bool(after[question_id]) and after[question_id] == correct_ids
+            correct[question_id] = int(is_correct) - int(was_correct)
+
+            if question_id not in previous_question_ids:
+                answered[question_id] = 1
+                answer_seconds[question_id] = (now - user_quiz.started_at).total_seconds()
+
+        selected = {}
+        for question_id, answer_id in submitted:
+            change = int(str(answer_id) in after[question_id]) - int(str(answer_id) in before[question_id])
+            if change:
+                selected[answer_id] = change
+
+        changed = set(answered) | {question_id for question_id, change in correct.items() if change}
+        if changed:
+            QuestionStats.objects.filter(question_id__in=changed).update(
+                answered=F('answered') + cls.per_row('question_id', answered, IntegerField()),
+                correct=F('correct') + cls.per_row('question_id', correct, IntegerField()),
+                answer_seconds=F('answer_seconds') + cls.per_row('question_id', answer_seconds, FloatField()),
+                updated_at=now,
+            )
+        if selected:
+            PossibleAnswerStats.objects.filter(possible_answer_id__in=selected).update(
+                selected=F('selected') + cls.per_row('possible_answer_id', selected, IntegerField()),
+                updated_at=now,
+            )
+
+    @staticmethod
+    def checked_by_question(answers):
+        checked = defaultdict(set)
+        for (question_id, answer_id), is_checked in answers.items():
+            if is_checked:
+                checked[question_id].add(str(answer_id))
+        return checked
+
+    @staticmethod
+    def per_row(field, changes, output_field):
+        """Expression that evaluates to each row's own change, so a single UPDATE applies all of them."""
+        whens = [When(**{field: key}, then=Value(change)) for key, change in changes.items() if change]
+        return Case(*whens, default=Value(0), output_field=output_field) if whens else Value(0)
@@ -0,0 +1,103 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+CACHE_KEY_PREFIX = 'auth-token:'
+
+
+class LRUCache:
+    """Thread safe, bounded, least recently used cache with a per entry time to live."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that remembers resolved tokens in a local LRU and optionally in a shared Django cache,
+    configured with TOKEN_AUTH_CACHE. Entries are evicted when a token is deleted or its user is saved
+    (see app.signals), other processes pick that up after TTL seconds at the latest.
+    """
+
+    local_cache = LRUCache(settings.TOKEN_AUTH_CACHE['MAX_SIZE'], settings.TOKEN_AUTH_CACHE['TTL'])
+
+    @classmethod
+    def get_shared_cache(cls):
+        alias = settings.TOKEN_AUTH_CACHE['CACHE_ALIAS']
+        return caches[alias] if alias else None
+
+    @classmethod
+    def invalidate(cls, *keys):
+        for key in keys:
+            cls.local_cache.delete(key)
+
+        shared_cache = cls.get_shared_cache()
+        if shared_cache is not None:
+            shared_cache.delete_many([CACHE_KEY_PREFIX + key for key in keys])
+
+    def authenticate_credentials(self, key):
+        token = self.local_cache.get(key)
+
+        shared_cache = self.get_shared_cache()
+        if token is None and shared_cache is not None:
+            token = shared_cache.get(CACHE_KEY_PREFIX + key)
+            if token is not None:
+                self.local_cache.set(key, token)
+
+        if token is None:
+            try:
+                token = Token.objects.select_related('user').get(key=key)
+            except Token.DoesNotExist:
+                raise AuthenticationFailed('Invalid token.')
+
+            if not token.user.is_active:
+                raise AuthenticationFailed('User inactive or deleted.')
+
+            self.local_cache.set(key, token)
+            if shared_cache is not None:
+                shared_cache.set(CACHE_KEY_PREFIX + key, token, settings.TOKEN_AUTH_CACHE['TTL'])
+
+        # requests get their own copies, so nothing set on request.user leaks into the cache
+        token = copy.copy(token)
+        token.user = copy.copy(token.user)
+
+        return token.user, token
@@ -0,0 +1,12 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite starting transactions with BEGIN IMMEDIATE, i.e. taking the write lock up front. A deferred transaction
+    that reads first and writes later fails with "database is locked" right away when another one holds the write
+    lock, instead of waiting for it. Django 5.1 has this as the transaction_mode option.
+    """
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
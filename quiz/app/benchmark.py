@@ -0,0 +1,501 @@
+import asyncio
+import itertools
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import List
+
+from app.models import PossibleAnswer, Question, Quiz, User, UserQuiz
+from app.snapshot_service import SnapshotService
+from django.conf import settings
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+@dataclass
+class EndpointStats:
+    name: str
+    timings: List[float] = field(default_factory=list)  # milliseconds
+    queries: List[int] = field(default_factory=list)
+
+    def percentile(self, percent):
+        if len(self.timings) == 1:
+            return self.timings[0]
+
+        return statistics.quantiles(self.timings, n=100, method='inclusive')[percent - 1]
+
+    @property
+    def throughput(self):
+        return len(self.timings) / (sum(self.timings) / 1000) if sum(self.timings) else 0
+
+    def row(self):
+        return (
+            self.name,
+            len(self.timings),
+            self.percentile(50),
+            self.percentile(95),
+            self.throughput,
+            statistics.mean(self.queries),
+            max(self.queries),
+        )
+
+
+class ApiBenchmark:
+    """
+    Drives every API route through the creator and participant flow in-process, recording latency and SQL
+    query count of each request. Meant to run inside a transaction that is rolled back afterwards.
+    """
+
+    HEADER = ('endpoint', 'calls', 'p50 ms', 'p95 ms', 'req/s', 'avg queries', 'max queries')
+
+    def __init__(self, creators=1, quizzes=2, questions=10, answers=4, participants=10):
+        self.creators = creators
+        self.quizzes = quizzes
+        self.questions = questions
+        self.answers = answers
+        self.participants = participants
+        self.stats = {}
+
+    def request(self, name, client, method, url, data=None):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data, format='json')
+            elapsed = (time.perf_counter() - started) * 1000
+
+        if response.status_code >= 400:
+            raise BenchmarkError(f'{name} returned {response.status_code}: {response.data}')
+
+        stats = self.stats.setdefault(name, EndpointStats(name))
+        stats.timings.append(elapsed)
+        stats.queries.append(len(context.captured_queries))
+
+        return response
+
+    def get_client(self, user):
+        token, _ = Token.objects.get_or_create(user=user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        return client
+
+    def build_quiz(self, number):
+        return {
+            'name': f'Benchmark quiz {number}',
+            'time_limit': '01:00:00',
+            'questions': [
+                {
+                    'question': f'Question {i}',
+                    'possible_answers': [
+                        {'answer': f'Answer {j}', 'is_correct': j == 0} for j in range(self.answers)
+                    ],
+                }
+                for i in range(self.questions)
+            ],
+        }
+
+    def run(self):
+        run_id = int(timezone.now().timestamp() * 1000)
+
+        for creator_number in range(self.creators):
+            creator = User.objects.create_user(
+                username=f'benchmark-creator-{run_id}-{creator_number}', user_type=User.UserType.CREATOR
+            )
+            creator_client = self.get_client(creator)
+
+            for quiz_number in range(self.quizzes):
+                quiz_id = self.request(
+                    'create quiz', creator_client, 'post', reverse('quiz-list'), self.build_quiz(quiz_number)
+                ).data['id']
+                self.run_quiz(creator_client, quiz_id, f'{run_id}-{creator_number}-{quiz_number}')
+
+            self.request('list quizes (creator)', creator_client, 'get', reverse('quiz-list'))
+            # one quiz per page, so pages past the first show whether the cursor keeps their latency flat
+            url, name = reverse('quiz-list') + '?limit=1', 'list quizes (creator)'
+            while url:
+                url = self.request(name, creator_client, 'get', url).data['next']
+                name = 'list quizes (deep page)'
+            self.request('search quizes', creator_client, 'get', reverse('quiz-list') + '?search=benchmark')
+
+        return self.stats
+
+    def run_quiz(self, creator_client, quiz_id, prefix):
+        emails = [f'benchmark-{prefix}-{i}@example.com' for i in range(self.participants)]
+        self.request(
+            'invite', creator_client, 'post', reverse('quiz-invite', kwargs={'quiz_id': quiz_id}), {'email': emails[0]}
+        )
+        self.request(
+            'bulk invite',
+            creator_client,
+            'post',
+            reverse('quiz-bulk-invite', kwargs={'quiz_id': quiz_id}),
+            {'emails': emails[1:]},
+        )
+
+        quiz = Quiz.objects.prefetch_related('questions__possible_answers').get(id=quiz_id)
+        questions = list(quiz.questions.all())
+
+        for user in User.objects.filter(email__in=emails):
+            client = self.get_client(user)
+            user_quiz_id = self.request(
+                'accept', client, 'post', reverse('quiz-accept-invitation', kwargs={'pk': quiz_id})
+            ).data['user_quiz_id']
+
+            self.request('retrieve user quiz', client, 'get', reverse('user-quiz-detail', kwargs={'pk': user_quiz_id}))
+            self.request('list quizes (participant)', client, 'get', reverse('quiz-list'))
+            self.request(
+                'answer',
+                client,
+                'post',
+                reverse('user-answer-upload', kwargs={'pk': user_quiz_id}),
+                {
+                    'question': str(questions[0].id),
+                    'answers': [
+                        {'answer': str(answer.id), 'is_checked': answer.is_correct}
+                        for answer in questions[0].possible_answers.all()
+                    ],
+                },
+            )
+            self.request(
+                'answer batch',
+                client,
+                'post',
+                reverse('user-answer-batch-upload', kwargs={'pk': user_quiz_id}),
+                {
+                    'questions': [
+                        {
+                            'question': str(question.id),
+                            'answers': [
+                                {'answer': str(answer.id), 'is_checked': answer.is_correct}
+                                for answer in question.possible_answers.all()
+                            ],
+                        }
+                        for question in questions
+                    ]
+                },
+            )
+
+            self.request('progress', client, 'get', reverse('user-quiz-progress', kwargs={'pk': user_quiz_id}))
+            self.request('finish', client, 'post', reverse('user-quiz-finish', kwargs={'pk': user_quiz_id}))
+            self.request('participant result', client, 'get', reverse('user-quiz-result', kwargs={'pk': user_quiz_id}))
+
+        self.request('quiz progress', creator_client, 'get', reverse('quiz-progress', kwargs={'quiz_id': quiz_id}))
+        self.request('quiz results', creator_client, 'get', reverse('quiz-results', kwargs={'quiz_id': quiz_id}))
+        self.request(
+            'quiz analytics', creator_client, 'get', reverse('quiz-analytics', kwargs={'quiz_id': quiz_id})
+        )
+
+
+class CommittedBenchmark:
+    """
+    Base of the benchmarks running requests on worker threads. Threads use connections of their own, so the data
+    is committed, owned by a creator of the run, and removed by cleanup() instead of rolled back.
+    """
+
+    def __init__(self):
+        self.run_id = int(timezone.now().timestamp() * 1000)
+        self.creator = None
+
+    def seed_quiz(self, label, questions, answers):
+        """Quiz of the run's creator whose first answer of every question is correct, returns (quiz, answers)."""
+        if self.creator is None:
+            self.creator = User.objects.create_user(
+                username=f'benchmark-creator-{self.run_id}', user_type=User.UserType.CREATOR
+            )
+
+        quiz = Quiz.objects.create(name=f'Benchmark {label}', time_limit=timedelta(hours=1), creator=self.creator)
+        questions = Question.objects.bulk_create(
+            [Question(quiz=quiz, question=f'Question {i}') for i in range(questions)]
+        )
+        answers = PossibleAnswer.objects.bulk_create(
+            [
+                PossibleAnswer(question=question, answer=f'Answer {j}', is_correct=j == 0)
+                for question in questions
+                for j in range(answers)
+            ]
+        )
+
+        return quiz, answers
+
+    def seed_participants(self, label, count):
+        """Participants with API tokens, returns (users, token keys)."""
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f'benchmark-{self.run_id}-{label}-{i}',
+                    email=f'benchmark-{self.run_id}-{label}-{i}@example.com',
+                    user_type=User.UserType.PARTICIPANT,
+                )
+                for i in range(count)
+            ]
+        )
+        tokens = Token.objects.bulk_create([Token(user=user, key=Token.generate_key()) for user in users])
+
+        return users, [token.key for token in tokens]
+
+    def cleanup(self):
+        if self.creator is None:
+            return
+
+        participants = User.objects.filter(userquiz__quiz__creator=self.creator)
+        participant_ids = list(participants.values_list('id', flat=True))
+        Quiz.objects.filter(creator=self.creator).delete()
+        User.objects.filter(id__in=participant_ids).delete()
+        self.creator.delete()
+
+
+class ConcurrencyBenchmark(CommittedBenchmark):
+    """
+    Runs the participant hot path (accept, retrieve, answer upload) for many participants at once, through the
+    WSGI handler on a pool of worker threads or through the ASGI handler on a single event loop.
+    """
+
+    HEADER = ('deployment', 'flows', 'concurrency', 'seconds', 'req/s', 'p50 ms', 'p95 ms')
+
+    def __init__(self, participants=200, concurrency=50, questions=10, answers=4):
+        super().__init__()
+        self.participants = participants
+        self.concurrency = concurrency
+        self.questions = questions
+        self.answers = answers
+
+    def seed(self, deployment):
+        """Quiz with one pending invitation per participant, returns (quiz id, answer payload, tokens)."""
+        quiz, answers = self.seed_quiz(deployment, self.questions, self.answers)
+        payload = {
+            'questions': [
+                {
+                    'question': str(question_id),
+                    'answers': [{'answer': str(answer.id), 'is_checked': answer.is_correct} for answer in group],
+                }
+                for question_id, group in itertools.groupby(answers, key=lambda answer: answer.question_id)
+            ]
+        }
+
+        users, tokens = self.seed_participants(deployment, self.participants)
+        UserQuiz.objects.bulk_create([UserQuiz(user=user, quiz=quiz, email=user.email) for user in users])
+
+        return quiz.id, payload, tokens
+
+    @staticmethod
+    def check(response):
+        if response.status_code >= 400:
+            raise BenchmarkError(f'{response.request["PATH_INFO"]} returned {response.status_code}')
+
+        return response
+
+    def wsgi_flow(self, quiz_id, payload, token):
+        client = Client(HTTP_AUTHORIZATION=f'Token {token}')
+        timings = []
+        try:
+            started = time.perf_counter()
+            response = self.check(client.post(reverse('quiz-accept-invitation', kwargs={'pk': quiz_id})))
+            user_quiz_id = response.json()['user_quiz_id']
+            timings.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            self.check(client.get(reverse('user-quiz-detail', kwargs={'pk': user_quiz_id})))
+            timings.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            self.check(
+                client.post(
+                    reverse('user-answer-batch-upload', kwargs={'pk': user_quiz_id}),
+                    payload,
+                    content_type='application/json',
+                )
+            )
+            timings.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+
+        return timings
+
+    async def asgi_flow(self, client, semaphore, quiz_id, payload, token):
+        headers = {'authorization': f'Token {token}'}
+        timings = []
+        async with semaphore:
+            started = time.perf_counter()
+            response = self.check(
+                await client.post(reverse('quiz-accept-invitation', kwargs={'pk': quiz_id}), headers=headers)
+            )
+            user_quiz_id = response.json()['user_quiz_id']
+            timings.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            self.check(await client.get(reverse('user-quiz-detail', kwargs={'pk': user_quiz_id}), headers=headers))
+            timings.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            self.check(
+                await client.post(
+                    reverse('user-answer-batch-upload', kwargs={'pk': user_quiz_id}),
+                    payload,
+                    content_type='application/json',
+                    headers=headers,
+                )
+            )
+            timings.append(time.perf_counter() - started)
+
+        return timings
+
+    def run_wsgi(self):
+        quiz_id, payload, tokens = self.seed('wsgi')
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            flows = list(executor.map(lambda token: self.wsgi_flow(quiz_id, payload, token), tokens))
+
+        return self.row('wsgi', time.perf_counter() - started, flows)
+
+    def run_asgi(self):
+        quiz_id, payload, tokens = self.seed('asgi')
+
+        async def run():
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(self.concurrency)
+            return await asyncio.gather(
+                *(self.asgi_flow(client, semaphore, quiz_id, payload, token) for token in tokens)
+            )
+
+        started = time.perf_counter()
+        flows = asyncio.run(run())
+
+        return self.row('asgi', time.perf_counter() - started, flows)
+
+    def row(self, deployment, seconds, flows):
+        timings = [timing * 1000 for flow in flows for timing in flow]
+        percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+
+        return (
+            deployment,
+            len(flows),
+            self.concurrency,
+            seconds,
+            len(timings) / seconds,
+            percentiles[49],
+            percentiles[94],
+        )
+
+
+class ThrottleBenchmark(CommittedBenchmark):
+    """
+    An abusive client floods batch answer uploads of the whole quiz from many threads while well-behaved
+    participants upload single answers at a steady pace, once with the answers throttle off and once with it on.
+    """
+
+    HEADER = ('answers rate', 'polite calls', 'failed', 'p50 ms', 'p95 ms', 'abusive calls', 'throttled')
+    # Pause of the abusive client after each response, the round trip of a remote one. Without it the in-process
+    # client would hold the GIL spinning on 429s.
+    ROUND_TRIP = 0.02
+
+    def __init__(self, participants=20, abusive_threads=4, seconds=10.0, interval=2.0, questions=50):
+        super().__init__()
+        self.participants = participants
+        self.abusive_threads = abusive_threads
+        self.seconds = seconds
+        self.interval = interval
+        self.questions = questions
+
+    def seed(self, label):
+        """Started attempts, the abusive client's first, returns (tokens, attempt ids, batch payload)."""
+        quiz, answers = self.seed_quiz(label, self.questions, 1)
+        snapshot = SnapshotService.get_or_create(Quiz.objects.get(id=quiz.id))
+
+        now = timezone.now()
+        users, tokens = self.seed_participants(label, self.participants + 1)
+        user_quizzes = UserQuiz.objects.bulk_create(
+            [
+                UserQuiz(
+                    user=user,
+                    quiz=quiz,
+                    email=user.email,
+                    snapshot=snapshot,
+                    started_at=now,
+                    expires_at=now + quiz.time_limit,
+                )
+                for user in users
+            ]
+        )
+        payload = {
+            'questions': [
+                {'question': str(answer.question_id), 'answers': [{'answer': str(answer.id), 'is_checked': True}]}
+                for answer in answers
+            ]
+        }
+
+        return tokens, [user_quiz.id for user_quiz in user_quizzes], payload
+
+    def polite_client(self, token, user_quiz_id, payload, deadline):
+        """Milliseconds per upload, None for the ones that failed, e.g. timing out on the database lock."""
+        client = Client(HTTP_AUTHORIZATION=f'Token {token}', raise_request_exception=False)
+        url = reverse('user-answer-upload', kwargs={'pk': user_quiz_id})
+        timings = []
+        try:
+            for question in itertools.cycle(payload['questions']):
+                if time.perf_counter() >= deadline:
+                    break
+
+                started = time.perf_counter()
+                response = client.post(url, question, content_type='application/json')
+                elapsed = time.perf_counter() - started
+                timings.append(elapsed * 1000 if response.status_code == 201 else None)
+                time.sleep(max(0.0, self.interval - elapsed))
+        finally:
+            connection.close()
+
+        return timings
+
+    def abusive_client(self, token, user_quiz_id, payload, deadline):
+        client = Client(HTTP_AUTHORIZATION=f'Token {token}', raise_request_exception=False)
+        url = reverse('user-answer-batch-upload', kwargs={'pk': user_quiz_id})
+        statuses = []
+        try:
+            while time.perf_counter() < deadline:
+                statuses.append(client.post(url, payload, content_type='application/json').status_code)
+                time.sleep(self.ROUND_TRIP)
+        finally:
+            connection.close()
+
+        return statuses
+
+    def run(self, rate):
+        # New tokens every run, so the buckets start full whichever store keeps them
+        tokens, user_quiz_ids, payload = self.seed(rate or 'off')
+
+        rates = {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'answers': rate}
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}):
+            deadline = time.perf_counter() + self.seconds
+            with ThreadPoolExecutor(max_workers=self.participants + self.abusive_threads) as executor:
+                abusive = [
+                    executor.submit(self.abusive_client, tokens[0], user_quiz_ids[0], payload, deadline)
+                    for _ in range(self.abusive_threads)
+                ]
+                polite = [
+                    executor.submit(self.polite_client, token, user_quiz_id, payload, deadline)
+                    for token, user_quiz_id in zip(tokens[1:], user_quiz_ids[1:])
+                ]
+                timings = [timing for future in polite for timing in future.result()]
+                statuses = [status for future in abusive for status in future.result()]
+
+        served = [timing for timing in timings if timing is not None]
+        percentiles = statistics.quantiles(served, n=100, method='inclusive')
+        return (
+            rate or 'off',
+            len(timings),
+            len(timings) - len(served),
+            percentiles[49],
+            percentiles[94],
+            len(statuses),
+            statuses.count(429),
+        )
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends whose entries are only visible to the process that wrote them
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+@register(Tags.caches)
+def check_replica_sticky_cache(app_configs, **kwargs):
+    if not settings.REPLICA_DATABASE:
+        return []
+
+    alias = settings.REPLICA_STICKY_CACHE_ALIAS
+    if settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+
+    return [
+        Warning(
+            f'The replica sticky flag is kept in the process-local "{alias}" cache.',
+            hint='Other server processes will not see it, so a client that just wrote may read stale data from the '
+            'replica. Point REPLICA_STICKY_CACHE_ALIAS at a cache every process shares, or run a single process.',
+            id='app.W001',
+        )
+    ]
@@ -1,15 +1,131 @@
-from django.core.mail import send_mail
+import time
+from contextlib import suppress
+from datetime import timedelta
+
+from app.models import OutboxEmail
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+INVITATION_SUBJECT = "Quiz invitation"
+INVITATION_BODY = """Hello there! Here's a token your gonna need: {token}.
+            And quiz id: {quiz_id}
+            """
+RESULT_SUBJECT = "Quiz result"
+RESULT_BODY = """Hello there! Your result for quiz {quiz_name}: {score}/{max_score}.
+            """
+SENDER = "service@opercredits.com"
+
+RETRY_BACKOFF = timedelta(seconds=30)
+MAX_RETRY_BACKOFF = timedelta(hours=1)
+# Claimed emails are due again after this long, so a batch of a worker that died is picked up by another one
+CLAIM_LEASE = timedelta(minutes=10)
 
 
 class EmailService:
     @classmethod
-    def send_invitation(cls, email, token, quiz_id):
-        send_mail(
-            "Quiz invitation",
-            f"""Hello there! Here's a token your gonna need: {token}.
-            And quiz id: {quiz_id}
-            """,
-            "service@opercredits.com",
-            [email],
-            fail_silently=False,
+    def queue_invitation(cls, email, token, quiz_id):
+        cls.queue_invitations([(email, token, quiz_id)])
+
+    @classmethod
+    def queue_invitations(cls, invitations):
+        """Queue (email, token, quiz_id) invitations in the outbox, within the caller's transaction."""
+        cls.queue(
+            (email, INVITATION_SUBJECT, INVITATION_BODY.format(token=token, quiz_id=quiz_id))
+            for email, token, quiz_id in invitations
+        )
+
+    @classmethod
+    def queue_results(cls, results):
+        """Queue (email, quiz_name, score, max_score) result emails in the outbox, within the caller's transaction."""
+        cls.queue(
+            (email, RESULT_SUBJECT, RESULT_BODY.format(quiz_name=quiz_name, score=score, max_score=max_score))
+            for email, quiz_name, score, max_score in results
         )
+
+    @classmethod
+    def queue(cls, emails):
+        """Queue (to_email, subject, body) emails in the outbox."""
+        now = timezone.now()
+        OutboxEmail.objects.bulk_create(
+            [
+                OutboxEmail(
+                    subject=subject,
+                    body=body,
+                    from_email=SENDER,
+                    to_email=to_email,
+                    next_attempt_at=now,
+                    created_at=now,
+                    updated_at=now,
+                )
+                for to_email, subject, body in emails
+            ],
+            batch_size=500,
+        )
+
+    @classmethod
+    def send_pending(cls, batch_size=100, max_attempts=5):
+        """Send one batch of due outbox emails over a single connection, returning (sent, failed, seconds)."""
+        started = time.monotonic()
+
+        emails = cls.claim(batch_size)
+        if not emails:
+            return 0, 0, time.monotonic() - started
+
+        sent, failed = [], []
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as e:
+            # An unreachable server fails the whole batch, which then backs off like a rejected message.
+            for email in emails:
+                email.last_error = repr(e)
+            failed = emails
+        else:
+            try:
+                for email in emails:
+                    message = EmailMessage(email.subject, email.body, email.from_email, [email.to_email])
+                    try:
+                        connection.send_messages([message])
+                    except Exception as e:
+                        email.last_error = repr(e)
+                        failed.append(email)
+                    else:
+                        sent.append(email.id)
+            finally:
+                with suppress(Exception):
+                    connection.close()
+
+        now = timezone.now()
+        for email in failed:
+            email.attempts += 1
+            email.updated_at = now
+            email.next_attempt_at = now + min(RETRY_BACKOFF * 2 ** (email.attempts - 1), MAX_RETRY_BACKOFF)
+            if email.attempts >= max_attempts:
+                email.status = OutboxEmail.Status.FAILED
+
+        with transaction.atomic():
+            OutboxEmail.objects.filter(id__in=sent).update(status=OutboxEmail.Status.SENT, sent_at=now, updated_at=now)
+            OutboxEmail.objects.bulk_update(
+                failed, ('attempts', 'status', 'next_attempt_at', 'last_error', 'updated_at')
+            )
+
+        return len(sent), len(failed), time.monotonic() - started
+
+    @classmethod
+    def claim(cls, batch_size):
+        """
+        Lease up to batch_size due emails to this worker. No transaction is held while talking to SMTP, so each
+        email is claimed by moving its next attempt past the lease, only if it is still due: of several workers
+        that picked the same email, the one whose update matched a row sends it.
+        """
+        now = timezone.now()
+        due = OutboxEmail.objects.filter(status=OutboxEmail.Status.PENDING, next_attempt_at__lte=now)
+        emails = list(due.order_by('next_attempt_at')[:batch_size])
+
+        with transaction.atomic():
+            return [
+                email
+                for email in emails
+                if due.filter(id=email.id).update(next_attempt_at=now + CLAIM_LEASE, updated_at=now)
+            ]
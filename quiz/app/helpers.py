@@ -1,3 +1,9 @@
+import os
+import time
+import uuid
+from itertools import islice
+
+from django.conf import settings
 from django.utils.deconstruct import deconstructible
 
 
@@ -15,3 +21,22 @@ class EnumType(object):
 
     def __eq__(self, other):
         return set(self.choices()) == set(other.choices())
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def uuid7():
+    """Time-ordered UUID (version 7): 48 bits of unix milliseconds followed by 74 random bits."""
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), 'big')
+    value = value & ~(0xF << 76) | 0x7 << 76  # version
+    value = value & ~(0x3 << 62) | 0x2 << 62  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+
+def generate_id():
+    """Primary key default, time-ordered when TIME_ORDERED_IDS is on so inserts append to the end of indexes."""
+    return uuid7() if settings.TIME_ORDERED_IDS else uuid.uuid4()
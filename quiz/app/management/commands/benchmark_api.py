@@ -0,0 +1,33 @@
+from app.benchmark import ApiBenchmark
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+class Command(BaseCommand):
+    help = 'Seed creators, quizzes and participants through the API and report latency and queries per endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--creators', type=int, default=2)
+        parser.add_argument('--quizzes', type=int, default=5, help='Quizzes per creator')
+        parser.add_argument('--questions', type=int, default=20, help='Questions per quiz')
+        parser.add_argument('--answers', type=int, default=4, help='Possible answers per question')
+        parser.add_argument('--participants', type=int, default=20, help='Invitations per quiz')
+
+    def handle(self, *args, creators, quizzes, questions, answers, participants, **options):
+        benchmark = ApiBenchmark(
+            creators=creators, quizzes=quizzes, questions=questions, answers=answers, participants=participants
+        )
+
+        # locmem email backend and the testserver host for the in-process client
+        setup_test_environment()
+        try:
+            with transaction.atomic():
+                stats = benchmark.run()
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+
+        self.stdout.write('{:<28}{:>8}{:>10}{:>10}{:>10}{:>13}{:>13}'.format(*ApiBenchmark.HEADER))
+        for endpoint in stats.values():
+            self.stdout.write('{:<28}{:>8}{:>10.2f}{:>10.2f}{:>10.1f}{:>13.1f}{:>13}'.format(*endpoint.row()))
@@ -0,0 +1,33 @@
+from app.benchmark import ConcurrencyBenchmark
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+class Command(BaseCommand):
+    help = 'Compare WSGI worker threads with a single ASGI event loop on the participant hot path'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--participants', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50, help='WSGI threads / in-flight ASGI requests')
+        parser.add_argument('--questions', type=int, default=10, help='Questions per quiz')
+        parser.add_argument('--answers', type=int, default=4, help='Possible answers per question')
+
+    def handle(self, *args, participants, concurrency, questions, answers, **options):
+        benchmark = ConcurrencyBenchmark(
+            participants=participants, concurrency=concurrency, questions=questions, answers=answers
+        )
+
+        # locmem email backend and the testserver host for the in-process clients, and no slow request log
+        # entries for what is a deliberately overloaded server
+        setup_test_environment()
+        try:
+            with override_settings(SLOW_REQUEST_THRESHOLD=float('inf')):
+                rows = [benchmark.run_wsgi(), benchmark.run_asgi()]
+        finally:
+            teardown_test_environment()
+            benchmark.cleanup()
+
+        self.stdout.write('{:<12}{:>8}{:>13}{:>10}{:>10}{:>10}{:>10}'.format(*ConcurrencyBenchmark.HEADER))
+        for row in rows:
+            self.stdout.write('{:<12}{:>8}{:>13}{:>10.2f}{:>10.1f}{:>10.2f}{:>10.2f}'.format(*row))
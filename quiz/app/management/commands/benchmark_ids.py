@@ -0,0 +1,68 @@
+import time
+import uuid
+
+from app.helpers import chunked, uuid7
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import DateTimeField, UUIDField
+from django.utils import timezone
+
+GENERATORS = {
+    'uuid4': uuid.uuid4,
+    'uuid7': uuid7,
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare insert throughput of random (uuid4) and time-ordered (uuid7) primary keys as a table grows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000_000)
+        parser.add_argument('--batch-size', type=int, default=10_000)
+        parser.add_argument('--report-every', type=int, default=1_000_000)
+
+    def handle(self, *args, rows, batch_size, report_every, **options):
+        for name, generate in GENERATORS.items():
+            # A scratch table shaped like ours: UUID primary key, timestamp, no other indexes to blur the picture.
+            table = connection.ops.quote_name(f'benchmark_ids_{name}')
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'CREATE TABLE {table} (id {UUIDField().db_type(connection)} NOT NULL PRIMARY KEY, '
+                    f'created_at {DateTimeField().db_type(connection)} NOT NULL)'
+                )
+
+            try:
+                seconds = self.fill(name, table, generate, rows, batch_size, report_every)
+            finally:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'DROP TABLE {table}')
+
+            self.stdout.write(
+                self.style.SUCCESS(f'{name}: {rows} rows in {seconds:.1f}s ({rows / seconds:.0f} rows/s)')
+            )
+
+    def fill(self, name, table, generate, rows, batch_size, report_every):
+        id_field = UUIDField()
+        created_at = DateTimeField().get_db_prep_value(timezone.now(), connection)
+        sql = f'INSERT INTO {table} (id, created_at) VALUES (%s, %s)'
+
+        total = segment = 0.0
+        inserted = segment_rows = 0
+        for chunk in chunked(range(rows), batch_size):
+            params = [(id_field.get_db_prep_value(generate(), connection), created_at) for _ in chunk]
+
+            started = time.perf_counter()
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, params)
+            seconds = time.perf_counter() - started
+
+            total += seconds
+            segment += seconds
+            inserted += len(chunk)
+            segment_rows += len(chunk)
+            if segment_rows >= report_every or inserted == rows:
+                self.stdout.write(f'{name}: {inserted} rows, {segment_rows / segment:.0f} rows/s over the last segment')
+                segment = 0.0
+                segment_rows = 0
+
+        return total
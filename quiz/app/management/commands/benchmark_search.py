@@ -0,0 +1,75 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from app.helpers import chunked
+from app.models import Quiz, User
+from app.search_service import QuizSearchService
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+WORDS = (
+    'history', 'geography', 'maths', 'physics', 'chemistry', 'biology', 'music', 'art', 'poland', 'europe',
+    'capitals', 'rivers', 'mountains', 'kings', 'wars', 'numbers', 'fractions', 'atoms', 'cells', 'planets',
+)  # fmt: skip
+
+
+class Command(BaseCommand):
+    help = 'Compare name_contains (LIKE) with full-text search over a seeded quiz table, rolled back afterwards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quizzes', type=int, default=1_000_000)
+        parser.add_argument('--query', default='capitals')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, *args, quizzes, query, repeat, limit, **options):
+        with transaction.atomic():
+            creator = self.seed(quizzes)
+
+            queryset = Quiz.objects.filter(creator=creator)
+            like = self.measure(
+                lambda: list(queryset.filter(name__icontains=query).order_by('created_at', 'id')[:limit]), repeat
+            )
+            fts = self.measure(
+                lambda: list(QuizSearchService.search(queryset, query).order_by('search_rank', 'id')[:limit]), repeat
+            )
+
+            self.stdout.write(f'name_contains: p50 {like[0]:.2f}ms, max {like[1]:.2f}ms')
+            self.stdout.write(f'search:        p50 {fts[0]:.2f}ms, max {fts[1]:.2f}ms')
+
+            transaction.set_rollback(True)
+
+    def seed(self, quizzes):
+        started = time.monotonic()
+        now = timezone.now()
+        creator = User.objects.create(username=f'benchmark-{now.timestamp()}', user_type=User.UserType.CREATOR)
+
+        for chunk in chunked(range(quizzes), 10_000):
+            instances = Quiz.objects.bulk_create(
+                [
+                    Quiz(
+                        name=' '.join(random.sample(WORDS, 3)),
+                        time_limit=timedelta(hours=1),
+                        creator=creator,
+                        created_at=now,
+                        updated_at=now,
+                    )
+                    for _ in chunk
+                ]
+            )
+            QuizSearchService.index_quizzes([quiz.id for quiz in instances])
+
+        self.stdout.write(f'Seeded {quizzes} quizzes in {time.monotonic() - started:.1f}s')
+        return creator
+
+    def measure(self, query, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        return statistics.median(timings), max(timings)
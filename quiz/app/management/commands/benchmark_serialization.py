@@ -0,0 +1,89 @@
+import statistics
+import time
+from datetime import timedelta
+
+from app.models import PossibleAnswer, Question, Quiz, User
+from app.renderers import FastJSONRenderer
+from app.serializers import CreatorQuizSerializer, ParticipantQuizSerializer
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+
+class Command(BaseCommand):
+    help = 'Compare the nested serializer walk with the fast quiz tree path on seeded quizzes, rolled back afterwards'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quizzes', type=int, default=20)
+        parser.add_argument('--questions', type=int, default=100)
+        parser.add_argument('--answers', type=int, default=4)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, quizzes, questions, answers, repeat, **options):
+        with transaction.atomic():
+            creator = self.seed(quizzes, questions, answers)
+            # Both paths get a fresh queryset per run, a cached one would skip the prefetch after the first.
+            queryset = Quiz.objects.filter(creator=creator).order_by('created_at', 'id')
+
+            for serializer_class in (CreatorQuizSerializer, ParticipantQuizSerializer):
+                nested, nested_timings = self.measure(lambda: self.render_nested(serializer_class, queryset), repeat)
+                fast, fast_timings = self.measure(
+                    lambda: FastJSONRenderer().render(serializer_class(queryset.all(), many=True).data), repeat
+                )
+                if nested != fast:
+                    raise CommandError(f'{serializer_class.__name__}: fast path output differs')
+
+                self.stdout.write(
+                    f'{serializer_class.__name__} ({len(fast)} bytes): '
+                    f'nested p50 {nested_timings[0]:.1f}ms, max {nested_timings[1]:.1f}ms; '
+                    f'fast p50 {fast_timings[0]:.1f}ms, max {fast_timings[1]:.1f}ms'
+                )
+
+            transaction.set_rollback(True)
+
+    def render_nested(self, serializer_class, queryset):
+        quizzes = list(queryset.all())
+        prefetch_related_objects(quizzes, 'questions__possible_answers')
+        serializer = serializer_class()
+        return JSONRenderer().render([serializer.nested_representation(quiz) for quiz in quizzes])
+
+    def seed(self, quizzes, questions, answers):
+        started = time.monotonic()
+        now = timezone.now()
+        creator = User.objects.create(username=f'benchmark-{now.timestamp()}', user_type=User.UserType.CREATOR)
+
+        for i in range(quizzes):
+            quiz = Quiz.objects.create(name=f'Benchmark quiz {i}', time_limit=timedelta(hours=1), creator=creator)
+            question_instances = Question.objects.bulk_create(
+                [
+                    Question(question=f'Question {j} of quiz {i}?', quiz=quiz, created_at=now, updated_at=now)
+                    for j in range(questions)
+                ]
+            )
+            PossibleAnswer.objects.bulk_create(
+                [
+                    PossibleAnswer(
+                        question=question,
+                        answer=f'Answer {k}',
+                        is_correct=k == 0,
+                        created_at=now,
+                        updated_at=now,
+                    )
+                    for question in question_instances
+                    for k in range(answers)
+                ]
+            )
+
+        self.stdout.write(f'Seeded {quizzes} quizzes of {questions} questions in {time.monotonic() - started:.1f}s')
+        return creator
+
+    def measure(self, render, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = render()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        return output, (statistics.median(timings), max(timings))
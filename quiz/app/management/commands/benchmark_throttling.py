@@ -0,0 +1,41 @@
+import logging
+
+from app.benchmark import ThrottleBenchmark
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+class Command(BaseCommand):
+    help = 'Latency of well-behaved participants while an abusive client floods answer uploads, throttled or not'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--participants', type=int, default=20, help='Well-behaved clients')
+        parser.add_argument('--abusive-threads', type=int, default=4, help='Threads of the abusive client')
+        parser.add_argument('--seconds', type=float, default=10.0)
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between well-behaved uploads')
+        parser.add_argument('--questions', type=int, default=50, help='Questions of each batch upload of the flood')
+        parser.add_argument('--rate', default='1/s', help='Answer upload rate per token with throttling on')
+
+    def handle(self, *args, participants, abusive_threads, seconds, interval, questions, rate, **options):
+        benchmark = ThrottleBenchmark(
+            participants=participants,
+            abusive_threads=abusive_threads,
+            seconds=seconds,
+            interval=interval,
+            questions=questions,
+        )
+
+        # testserver host for the in-process clients, and no slow request or 429 log entries for the flood
+        setup_test_environment()
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        try:
+            with override_settings(SLOW_REQUEST_THRESHOLD=float('inf')):
+                rows = [benchmark.run(None), benchmark.run(rate)]
+        finally:
+            teardown_test_environment()
+            benchmark.cleanup()
+
+        self.stdout.write('{:<14}{:>14}{:>8}{:>10}{:>10}{:>15}{:>11}'.format(*ThrottleBenchmark.HEADER))
+        for row in rows:
+            self.stdout.write('{:<14}{:>14}{:>8}{:>10.2f}{:>10.2f}{:>15}{:>11}'.format(*row))
@@ -0,0 +1,46 @@
+import time
+
+from app.email_service import EmailService
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Drain the email outbox in batches, retrying failed emails with exponential backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-attempts', type=int, default=5)
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once there is nothing left to send')
+
+    def handle(self, *args, batch_size, max_attempts, interval, once, **options):
+        total_sent = total_failed = 0
+        total_seconds = 0.0
+
+        try:
+            while True:
+                sent, failed, seconds = EmailService.send_pending(batch_size=batch_size, max_attempts=max_attempts)
+                total_sent += sent
+                total_failed += failed
+                total_seconds += seconds
+
+                if sent or failed:
+                    self.stdout.write(
+                        f'Batch: sent {sent}, failed {failed} in {seconds:.2f}s ({sent / seconds:.1f} emails/s)'
+                    )
+                    continue
+
+                if once:
+                    break
+
+                time.sleep(interval)
+
+        except KeyboardInterrupt:
+            pass
+
+        rate = total_sent / total_seconds if total_seconds else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Total: sent {total_sent}, failed {total_failed} in {total_seconds:.2f}s ({rate:.1f} emails/s)'
+            )
+        )
@@ -0,0 +1,31 @@
+import time
+
+from app.results_service import CHUNK_SIZE, ResultsService
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Finish expired attempts, grade finished ones and queue their result emails in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, chunk_size, **options):
+        started = time.monotonic()
+        finished = ResultsService.finish_expired(chunk_size=chunk_size)
+        self.stdout.write(f'Finished {finished} expired attempts in {time.monotonic() - started:.2f}s')
+
+        total = 0
+        started = time.monotonic()
+        while queued := ResultsService.notify_chunk(chunk_size=chunk_size):
+            total += queued
+            self.stdout.write(f'Chunk: queued {queued} results')
+
+        seconds = time.monotonic() - started
+        rate = total / seconds if seconds else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Total: queued {total} results in {seconds:.2f}s ({rate:.1f} results/s), '
+                'run send_emails to deliver them'
+            )
+        )
@@ -0,0 +1,72 @@
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        cumulative = 0
+        for bucket, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bucket}"}} {cumulative}'
+
+        yield f'{name}_sum{{{labels}}} {self.sum}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+
+class RequestMetrics:
+    """In-process per route request metrics, each worker process reports its own."""
+
+    HISTOGRAMS = (
+        ('http_request_duration_seconds', 'Request duration', DURATION_BUCKETS),
+        ('http_request_sql_queries', 'SQL queries per request', QUERY_BUCKETS),
+        ('http_request_sql_duration_seconds', 'SQL time per request', DURATION_BUCKETS),
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.histograms = {
+            name: defaultdict(lambda buckets=buckets: Histogram(buckets)) for name, _, buckets in self.HISTOGRAMS
+        }
+        self.requests = defaultdict(int)
+
+    def observe(self, method, route, status, duration, queries, sql_duration):
+        with self.lock:
+            self.histograms['http_request_duration_seconds'][method, route].observe(duration)
+            self.histograms['http_request_sql_queries'][method, route].observe(queries)
+            self.histograms['http_request_sql_duration_seconds'][method, route].observe(sql_duration)
+            self.requests[method, route, status] += 1
+
+    def render(self):
+        """Prometheus text exposition format."""
+        with self.lock:
+            lines = ['# HELP http_requests_total Requests by route and status', '# TYPE http_requests_total counter']
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {count}')
+
+            for name, description, _ in self.HISTOGRAMS:
+                lines.extend((f'# HELP {name} {description}', f'# TYPE {name} histogram'))
+                for (method, route), histogram in sorted(self.histograms[name].items()):
+                    lines.extend(histogram.render(name, f'method="{method}",route="{route}"'))
+
+        return '\n'.join(lines) + '\n'
+
+
+request_metrics = RequestMetrics()
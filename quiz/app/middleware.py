@@ -0,0 +1,189 @@
+import hashlib
+import logging
+import time
+from contextvars import ContextVar
+
+from app.metrics import request_metrics
+from app.routers import RoutingState, routing_state
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+SLOW_REQUEST_QUERIES_LOGGED = 5
+# Only the head of each statement is logged, big IN lists and inserts would flood the log
+SLOW_REQUEST_SQL_LOGGED_CHARS = 200
+
+
+current_collector = ContextVar('current_collector', default=None)
+
+
+class QueryCollector:
+    def __init__(self):
+        self.queries = []  # (seconds, sql, parameter count)
+
+    @property
+    def duration(self):
+        return sum(duration for duration, _, _ in self.queries)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper of every connection, installed once when it connects (see install_query_recorder). Queries
+    are recorded by the collector of the request they run for: concurrent async requests share the connection of
+    the thread running their ORM calls, so a wrapper per request would see the queries of the others.
+    """
+    collector = current_collector.get()
+    if collector is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        param_count = sum(len(batch) for batch in params) if many else len(params or ())
+        collector.queries.append((time.perf_counter() - started, sql, param_count))
+
+
+def install_query_recorder(connection):
+    # First in line, so wrappers pushed and popped around it by execute_wrapper() never remove it
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+class RequestMetricsMiddleware:
+    """
+    Measures request duration, SQL query count and SQL time, reports them in the Server-Timing header
+    and the /metrics endpoint, and logs slow requests together with their slowest queries.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        collector = QueryCollector()
+        token = current_collector.set(collector)
+        started = time.perf_counter()
+
+        try:
+            response = self.get_response(request)
+        finally:
+            current_collector.reset(token)
+
+        return self.record(request, response, collector, started)
+
+    async def __acall__(self, request):
+        collector = QueryCollector()
+        token = current_collector.set(collector)
+        started = time.perf_counter()
+
+        # Async ORM calls run in a worker thread, which sees the collector as sync_to_async copies the context.
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_collector.reset(token)
+
+        return self.record(request, response, collector, started)
+
+    def record(self, request, response, collector, started):
+        duration = time.perf_counter() - started
+        sql_duration = collector.duration
+        route = request.resolver_match.route if request.resolver_match else 'unmatched'
+
+        response['Server-Timing'] = (
+            f'db;dur={sql_duration * 1000:.1f};desc="{len(collector.queries)} queries", total;dur={duration * 1000:.1f}'
+        )
+        request_metrics.observe(
+            request.method, route, response.status_code, duration, len(collector.queries), sql_duration
+        )
+
+        if duration >= settings.SLOW_REQUEST_THRESHOLD:
+            slowest = sorted(collector.queries, reverse=True)[:SLOW_REQUEST_QUERIES_LOGGED]
+            logger.warning(
+                'Slow request %s %s took %.3fs, %d queries in %.3fs. Slowest queries:\n%s',
+                request.method,
+                request.path,
+                duration,
+                len(collector.queries),
+                sql_duration,
+                '\n'.join(self.format_query(*query) for query in slowest),
+            )
+
+        return response
+
+    @staticmethod
+    def format_query(duration, sql, param_count):
+        if len(sql) > SLOW_REQUEST_SQL_LOGGED_CHARS:
+            sql = f'{sql[:SLOW_REQUEST_SQL_LOGGED_CHARS]}... ({len(sql)} chars)'
+        return f'{duration:.4f}s {sql} [{param_count} params]'
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets ReplicaRouter send reads of GET, HEAD and OPTIONS requests to the replica. Other methods, and every
+    request of a client that wrote within the last REPLICA_STICKY_SECONDS, stay on the primary, so clients
+    read their own writes despite replication lag. Clients are told apart by their credentials, and the flag is
+    kept in the REPLICA_STICKY_CACHE_ALIAS cache, which every server process has to share.
+    """
+
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.cache = caches[settings.REPLICA_STICKY_CACHE_ALIAS]
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        sticky_key = self.sticky_key(request)
+        state = RoutingState(pinned=self.pinned(request, sticky_key and self.cache.get(sticky_key)))
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+
+        if state.wrote and sticky_key:
+            self.cache.set(sticky_key, True, settings.REPLICA_STICKY_SECONDS)
+
+        return response
+
+    async def __acall__(self, request):
+        sticky_key = self.sticky_key(request)
+        state = RoutingState(pinned=self.pinned(request, sticky_key and await self.cache.aget(sticky_key)))
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+
+        if state.wrote and sticky_key:
+            await self.cache.aset(sticky_key, True, settings.REPLICA_STICKY_SECONDS)
+
+        return response
+
+    def pinned(self, request, sticky):
+        return request.method not in self.SAFE_METHODS or bool(sticky)
+
+    @staticmethod
+    def sticky_key(request):
+        credentials = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if not credentials:
+            return None
+
+        return f'replica-sticky:{hashlib.sha256(credentials.encode()).hexdigest()}'
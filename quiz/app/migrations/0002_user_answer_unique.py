@@ -0,0 +1,53 @@
+# Generated by Django 4.2.3 on 2026-10-18 10:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='userquiz',
+            options={'verbose_name_plural': 'Invitations (User quizes)'},
+        ),
+        migrations.AlterField(
+            model_name='quiz',
+            name='time_limit',
+            field=models.DurationField(help_text='ex. 1:00:00 meaning one hour'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='user_type',
+            field=models.TextField(choices=[('CREATOR', 'CREATOR'), ('PARTICIPANT', 'PARTICIPANT')], default='CREATOR'),
+        ),
+        migrations.AlterField(
+            model_name='userquiz',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='userquiz',
+            name='quiz',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='userquiz', to='app.quiz'),
+        ),
+        migrations.AlterField(
+            model_name='userquiz',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='userquiz',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='useranswer',
+            constraint=models.UniqueConstraint(fields=('user_quiz', 'question', 'answer'), name='unique_user_answer'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.3 on 2026-10-18 10:44
+
+from django.db import migrations, models
+import django.utils.timezone
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_user_answer_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEmail',
+            fields=[
+                ('updated_at', models.DateTimeField(null=True)),
+                ('created_at', models.DateTimeField(null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('subject', models.TextField()),
+                ('body', models.TextField()),
+                ('from_email', models.EmailField(max_length=254)),
+                ('to_email', models.EmailField(max_length=254)),
+                ('status', models.TextField(choices=[('FAILED', 'FAILED'), ('PENDING', 'PENDING'), ('SENT', 'SENT')], default='PENDING')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='outbox_email_due_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.3 on 2026-10-18 10:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_outbox_email'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserQuizResult',
+            fields=[
+                ('updated_at', models.DateTimeField(null=True)),
+                ('created_at', models.DateTimeField(null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('score', models.PositiveIntegerField(default=0)),
+                ('max_score', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+                ('user_quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='result', to='app.userquiz')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
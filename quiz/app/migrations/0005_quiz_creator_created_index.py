@@ -0,0 +1,26 @@
+# Generated by Django 4.2.3 on 2026-10-18 10:48
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, Now
+
+
+def backfill_created_at(apps, schema_editor):
+    # BaseModel.save used to skip created_at for every row, fall back to the last update
+    for model_name in ('User', 'Quiz', 'Question', 'PossibleAnswer', 'UserQuiz', 'UserAnswer'):
+        model = apps.get_model('app', model_name)
+        model.objects.filter(created_at__isnull=True).update(created_at=Coalesce('updated_at', Now()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_user_quiz_result'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_created_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['creator', 'created_at', 'id'], name='quiz_creator_created_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.3 on 2026-10-18 10:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_quiz_creator_created_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['email'], name='user_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userquiz',
+            index=models.Index(fields=['user', 'quiz', 'started_at', 'finished_at'], name='user_quiz_participant_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.3 on 2026-10-18 10:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# External content FTS5 index over app_quizsearchdocument, kept in sync by triggers as in https://sqlite.org/fts5.html
+CREATE_SEARCH_INDEX = (
+    """
+    CREATE VIRTUAL TABLE app_quiz_search USING fts5(
+        name, questions, content='app_quizsearchdocument', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER app_quiz_search_ai AFTER INSERT ON app_quizsearchdocument BEGIN
+        INSERT INTO app_quiz_search(rowid, name, questions) VALUES (new.id, new.name, new.questions);
+    END
+    """,
+    """
+    CREATE TRIGGER app_quiz_search_ad AFTER DELETE ON app_quizsearchdocument BEGIN
+        INSERT INTO app_quiz_search(app_quiz_search, rowid, name, questions)
+        VALUES ('delete', old.id, old.name, old.questions);
+    END
+    """,
+    """
+    CREATE TRIGGER app_quiz_search_au AFTER UPDATE ON app_quizsearchdocument BEGIN
+        INSERT INTO app_quiz_search(app_quiz_search, rowid, name, questions)
+        VALUES ('delete', old.id, old.name, old.questions);
+        INSERT INTO app_quiz_search(rowid, name, questions) VALUES (new.id, new.name, new.questions);
+    END
+    """,
+    """
+    INSERT INTO app_quizsearchdocument (quiz_id, name, questions)
+    SELECT quiz.id, quiz.name, COALESCE(
+        (SELECT group_concat(question.question, ' ') FROM app_question question WHERE question.quiz_id = quiz.id), ''
+    )
+    FROM app_quiz quiz
+    """,
+)
+DROP_SEARCH_INDEX = (
+    'DROP TRIGGER app_quiz_search_au',
+    'DROP TRIGGER app_quiz_search_ad',
+    'DROP TRIGGER app_quiz_search_ai',
+    'DROP TABLE app_quiz_search',
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in CREATE_SEARCH_INDEX:
+            schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in DROP_SEARCH_INDEX:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizSearchDocument',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('name', models.TextField()),
+                ('questions', models.TextField()),
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='app.quiz')),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
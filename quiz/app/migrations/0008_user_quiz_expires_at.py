@@ -0,0 +1,41 @@
+# Generated by Django 4.2.3 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+def backfill_expires_at(apps, schema_editor):
+    UserQuiz = apps.get_model('app', 'UserQuiz')
+    started = UserQuiz.objects.filter(started_at__isnull=False).select_related('quiz').only(
+        'started_at', 'quiz__time_limit'
+    )
+
+    batch = []
+    for user_quiz in started.iterator(chunk_size=2000):
+        user_quiz.expires_at = user_quiz.started_at + user_quiz.quiz.time_limit
+        batch.append(user_quiz)
+
+        if len(batch) == 2000:
+            UserQuiz.objects.bulk_update(batch, ('expires_at',))
+            batch = []
+
+    UserQuiz.objects.bulk_update(batch, ('expires_at',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_quiz_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userquiz',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='userquiz',
+            index=models.Index(fields=['user', 'finished_at', 'expires_at'], name='user_quiz_active_idx'),
+        ),
+        migrations.RunPython(backfill_expires_at, migrations.RunPython.noop),
+    ]
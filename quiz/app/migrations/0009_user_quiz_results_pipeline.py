@@ -0,0 +1,21 @@
+# Generated by Django 4.2.3 on 2026-10-18 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0008_user_quiz_expires_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userquiz',
+            index=models.Index(condition=models.Q(('finished_at__isnull', True)), fields=['expires_at'], name='user_quiz_unfinished_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userquiz',
+            index=models.Index(condition=models.Q(('results_sent', False)), fields=['finished_at'], name='user_quiz_unsent_idx'),
+        ),
+    ]
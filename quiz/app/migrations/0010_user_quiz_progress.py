@@ -0,0 +1,54 @@
+# Generated by Django 4.2.3 on 2026-10-18 11:14
+
+from django.db import migrations, models
+
+
+def backfill_progress(apps, schema_editor):
+    UserQuiz = apps.get_model('app', 'UserQuiz')
+    UserAnswer = apps.get_model('app', 'UserAnswer')
+    progress = (
+        UserAnswer.objects.order_by()
+        .values('user_quiz_id')
+        .annotate(answered=models.Count('question_id', distinct=True), last_activity_at=models.Max('updated_at'))
+    )
+
+    batch = []
+    for row in progress.iterator(chunk_size=2000):
+        batch.append(
+            UserQuiz(
+                id=row['user_quiz_id'],
+                questions_answered=row['answered'],
+                last_activity_at=row['last_activity_at'],
+            )
+        )
+
+        if len(batch) == 2000:
+            UserQuiz.objects.bulk_update(batch, ('questions_answered', 'last_activity_at'))
+            batch = []
+
+    UserQuiz.objects.bulk_update(batch, ('questions_answered', 'last_activity_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_user_quiz_results_pipeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userquiz',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='userquiz',
+            name='questions_answered',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='userquiz',
+            index=models.Index(fields=['quiz', 'last_activity_at'], name='user_quiz_progress_idx'),
+        ),
+        migrations.RunPython(backfill_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.3 on 2026-10-18 11:20
+
+import app.helpers
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_user_quiz_progress'),
+    ]
+
+    # The default lives in Python only, so skip the table rebuilds SQLite would otherwise do for each AlterField.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='outboxemail',
+                    name='id',
+                    field=models.UUIDField(default=app.helpers.generate_id, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='possibleanswer',
+                    name='id',
+                    field=models.UUIDField(default=app.helpers.generate_id, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='question',
+                    name='id',
+                    field=models.UUIDField(default=app.helpers.generate_id, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='quiz',
+                    name='id',
+                    field=models.UUIDField(default=app.helpers.generate_id, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='user',
+                    name='id',
+                    field=models.UUIDField(default=app.helpers.generate_id, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='useranswer',
+                    name='id',
+                    field=models.UUIDField(default=app.helpers.generate_id, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='userquiz',
+                    name='id',
+                    field=models.UUIDField(default=app.helpers.generate_id, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='userquizresult',
+                    name='id',
+                    field=models.UUIDField(default=app.helpers.generate_id, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.3 on 2026-10-18 11:43
+
+import app.helpers
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizSnapshot',
+            fields=[
+                ('updated_at', models.DateTimeField(null=True)),
+                ('created_at', models.DateTimeField(null=True)),
+                ('id', models.UUIDField(default=app.helpers.generate_id, primary_key=True, serialize=False)),
+                ('version', models.DateTimeField(null=True)),
+                ('content', models.JSONField()),
+                ('answer_key', models.JSONField()),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='app.quiz')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='userquiz',
+            name='snapshot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='app.quizsnapshot'),
+        ),
+        migrations.AddConstraint(
+            model_name='quizsnapshot',
+            constraint=models.UniqueConstraint(fields=('quiz', 'version'), name='unique_quiz_snapshot_version'),
+        ),
+    ]
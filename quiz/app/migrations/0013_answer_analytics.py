@@ -0,0 +1,107 @@
+# Generated by Django 4.2.3 on 2026-10-18 11:47
+
+from collections import defaultdict
+from itertools import groupby
+from operator import itemgetter
+
+import app.helpers
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def backfill_stats(apps, schema_editor):
+    Question = apps.get_model('app', 'Question')
+    PossibleAnswer = apps.get_model('app', 'PossibleAnswer')
+    QuizSnapshot = apps.get_model('app', 'QuizSnapshot')
+    UserAnswer = apps.get_model('app', 'UserAnswer')
+    QuestionStats = apps.get_model('app', 'QuestionStats')
+    PossibleAnswerStats = apps.get_model('app', 'PossibleAnswerStats')
+
+    now = timezone.now()
+    question_stats = {
+        question_id: QuestionStats(question_id=question_id, created_at=now, updated_at=now)
+        for question_id in Question.objects.values_list('id', flat=True).iterator(chunk_size=2000)
+    }
+    answer_stats = {
+        answer_id: PossibleAnswerStats(possible_answer_id=answer_id, created_at=now, updated_at=now)
+        for answer_id in PossibleAnswer.objects.values_list('id', flat=True).iterator(chunk_size=2000)
+    }
+
+    # Attempts are judged like grading does: by their snapshot's answer key, by the live quiz without one.
+    live_keys = defaultdict(set)
+    correct_answers = PossibleAnswer.objects.filter(is_correct=True).values_list('question_id', 'id')
+    for question_id, answer_id in correct_answers.iterator(chunk_size=2000):
+        live_keys[str(question_id)].add(str(answer_id))
+    snapshot_keys = {}
+
+    answers = UserAnswer.objects.order_by('user_quiz_id', 'question_id').values_list(
+        'user_quiz_id',
+        'question_id',
+        'user_quiz__snapshot_id',
+        'user_quiz__started_at',
+        'answer_id',
+        'is_checked',
+        'created_at',
+    )
+    for (_, question_id), rows in groupby(answers.iterator(chunk_size=2000), key=itemgetter(0, 1)):
+        rows = list(rows)
+        _, _, snapshot_id, started_at, _, _, _ = rows[0]
+        if snapshot_id:
+            if snapshot_id not in snapshot_keys:
+                snapshot_keys[snapshot_id] = QuizSnapshot.objects.get(id=snapshot_id).answer_key
+            correct_ids = set(snapshot_keys[snapshot_id].get(str(question_id), ()))
+        else:
+            correct_ids = live_keys[str(question_id)]
+
+        checked = [answer_id for *_, answer_id, is_checked, _ in rows if is_checked and answer_id]
+        stats = question_stats[question_id]
+        stats.answered += 1
+        stats.correct += int(bool(checked) and {str(answer_id) for answer_id in checked} == correct_ids)
+        answered_at = [created_at for *_, created_at in rows if created_at]
+        if started_at and answered_at:
+            stats.answer_seconds += (min(answered_at) - started_at).total_seconds()
+        for answer_id in checked:
+            answer_stats[answer_id].selected += 1
+
+    QuestionStats.objects.bulk_create(question_stats.values(), batch_size=2000)
+    PossibleAnswerStats.objects.bulk_create(answer_stats.values(), batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_quiz_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('updated_at', models.DateTimeField(null=True)),
+                ('created_at', models.DateTimeField(null=True)),
+                ('id', models.UUIDField(default=app.helpers.generate_id, primary_key=True, serialize=False)),
+                ('answered', models.PositiveIntegerField(default=0)),
+                ('correct', models.PositiveIntegerField(default=0)),
+                ('answer_seconds', models.FloatField(default=0)),
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='app.question')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PossibleAnswerStats',
+            fields=[
+                ('updated_at', models.DateTimeField(null=True)),
+                ('created_at', models.DateTimeField(null=True)),
+                ('id', models.UUIDField(default=app.helpers.generate_id, primary_key=True, serialize=False)),
+                ('selected', models.PositiveIntegerField(default=0)),
+                ('possible_answer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='app.possibleanswer')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
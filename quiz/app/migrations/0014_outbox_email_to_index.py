@@ -0,0 +1,17 @@
+# Generated by Django 4.2.3 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_answer_analytics'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='outboxemail',
+            index=models.Index(fields=['to_email'], name='outbox_email_to_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.3 on 2026-10-18 12:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0014_outbox_email_to_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userquiz',
+            name='snapshot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, to='app.quizsnapshot'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.3 on 2026-10-18 12:36
+
+import app.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0015_restrict_attempt_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizSearchIndex',
+            fields=[
+                ('document', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='index', serialize=False, to='app.quizsearchdocument')),
+                ('search', app.models.FullTextField(db_column='app_quiz_search')),
+            ],
+            options={
+                'db_table': 'app_quiz_search',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.3 on 2026-10-18 12:57
+
+import uuid
+
+import app.helpers
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_snapshot_answers(apps, schema_editor):
+    QuizSnapshot = apps.get_model('app', 'QuizSnapshot')
+    QuizSnapshotAnswer = apps.get_model('app', 'QuizSnapshotAnswer')
+
+    for snapshot in QuizSnapshot.objects.iterator(chunk_size=100):
+        questions = snapshot.content['questions']
+        QuizSnapshot.objects.filter(id=snapshot.id).update(question_count=len(questions))
+        QuizSnapshotAnswer.objects.bulk_create(
+            [
+                QuizSnapshotAnswer(
+                    id=app.helpers.generate_id(),
+                    snapshot_id=snapshot.id,
+                    question_id=uuid.UUID(question['id']),
+                    answer_id=uuid.UUID(answer['id']),
+                    is_correct=answer['id'] in snapshot.answer_key.get(question['id'], ()),
+                )
+                for question in questions
+                for answer in question['possible_answers']
+            ],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0016_quiz_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizsnapshot',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='QuizSnapshotAnswer',
+            fields=[
+                ('id', models.UUIDField(default=app.helpers.generate_id, primary_key=True, serialize=False)),
+                ('question_id', models.UUIDField()),
+                ('answer_id', models.UUIDField()),
+                ('is_correct', models.BooleanField()),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='app.quizsnapshot')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='quizsnapshotanswer',
+            constraint=models.UniqueConstraint(fields=('snapshot', 'answer_id'), name='unique_snapshot_answer'),
+        ),
+        migrations.RunPython(backfill_snapshot_answers, migrations.RunPython.noop),
+    ]
@@ -1,22 +1,52 @@
-import uuid
-
-from app.helpers import EnumType
+from app.helpers import EnumType, generate_id
 from django.contrib.auth.models import AbstractUser
 from django.db.models import (
     CASCADE,
+    DO_NOTHING,
+    BigAutoField,
     PROTECT,
+    RESTRICT,
     BooleanField,
+    Count,
     DateTimeField,
     DurationField,
     EmailField,
+    Exists,
+    FloatField,
     ForeignKey,
+    Index,
+    JSONField,
+    Lookup,
     Model,
+    OneToOneField,
+    OuterRef,
+    PositiveIntegerField,
+    Q,
+    QuerySet,
+    Subquery,
     TextField,
+    UniqueConstraint,
     UUIDField,
 )
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
-__all__ = ('Quiz', 'Question', 'User', 'UserQuiz', 'PossibleAnswer', 'UserAnswer')
+__all__ = (
+    'Quiz',
+    'Question',
+    'User',
+    'UserQuiz',
+    'PossibleAnswer',
+    'QuizSnapshot',
+    'QuizSnapshotAnswer',
+    'UserAnswer',
+    'UserQuizResult',
+    'QuestionStats',
+    'PossibleAnswerStats',
+    'OutboxEmail',
+    'QuizSearchDocument',
+    'QuizSearchIndex',
+)
 
 
 class BaseModel(Model):
@@ -24,12 +54,13 @@ class BaseModel(Model):
     created_at = DateTimeField(null=True)
 
     def save(self, *args, **kwargs):
-        if not self.id:
+        # UUID primary keys are assigned on instantiation, so self.id can't tell a new row apart
+        if self._state.adding and not self.created_at:
             self.created_at = timezone.now()
 
         self.updated_at = timezone.now()
 
-        return super().save()
+        return super().save(*args, **kwargs)
 
     class Meta:
         abstract = True
@@ -40,25 +71,31 @@ class User(AbstractUser, BaseModel):
         PARTICIPANT = 'PARTICIPANT'
         CREATOR = 'CREATOR'
 
-    id = UUIDField(primary_key=True, default=uuid.uuid4)
+    id = UUIDField(primary_key=True, default=generate_id)
     user_type = TextField(choices=UserType.choices(), default=UserType.CREATOR)
 
+    class Meta(AbstractUser.Meta):
+        indexes = (Index(fields=('email',), name='user_email_idx'),)
+
     def __str__(self):
         return self.email
 
 
 class Quiz(BaseModel):
-    id = UUIDField(primary_key=True, default=uuid.uuid4)
+    id = UUIDField(primary_key=True, default=generate_id)
     name = TextField(max_length=1024, blank=False, null=False)
     time_limit = DurationField(null=False, blank=False, help_text='ex. 1:00:00 meaning one hour')
     creator = ForeignKey(User, null=False, on_delete=CASCADE)
 
+    class Meta:
+        indexes = (Index(fields=('creator', 'created_at', 'id'), name='quiz_creator_created_idx'),)
+
     def __str__(self):
         return self.name
 
 
 class Question(BaseModel):
-    id = UUIDField(primary_key=True, default=uuid.uuid4)
+    id = UUIDField(primary_key=True, default=generate_id)
     question = TextField(max_length=256, null=False, blank=False)
     quiz = ForeignKey(Quiz, null=False, related_name='questions', on_delete=CASCADE)
 
@@ -66,35 +103,231 @@ class Question(BaseModel):
         return self.question
 
 
+class PossibleAnswerQuerySet(QuerySet):
+    def of_attempt(self, user_quiz):
+        """
+        Possible answers the attempt can check: those of its snapshot, as long as the live quiz still has them for
+        the answers to refer to. Attempts started before snapshots existed get the live quiz's.
+        """
+        qs = self.filter(question__quiz_id=user_quiz.quiz_id)
+        if user_quiz.snapshot_id:
+            shown = QuizSnapshotAnswer.objects.filter(
+                snapshot_id=user_quiz.snapshot_id, question_id=OuterRef('question_id'), answer_id=OuterRef('id')
+            )
+            qs = qs.filter(Exists(shown))
+
+        return qs
+
+
 class PossibleAnswer(BaseModel):
-    id = UUIDField(primary_key=True, default=uuid.uuid4)
+    id = UUIDField(primary_key=True, default=generate_id)
     question = ForeignKey(Question, related_name='possible_answers', null=False, on_delete=CASCADE)
     answer = TextField(max_length=256, null=False, blank=False)
     is_correct = BooleanField(null=False)
 
+    objects = PossibleAnswerQuerySet.as_manager()
+
     def __str__(self):
         return self.answer
 
 
+class QuizSnapshot(BaseModel):
+    """Participant view and answer key of one quiz content version, shared by the attempts started on it."""
+
+    id = UUIDField(primary_key=True, default=generate_id)
+    quiz = ForeignKey(Quiz, null=False, related_name='snapshots', on_delete=CASCADE)
+    version = DateTimeField(null=True)  # quiz.updated_at the content was read at
+    content = JSONField()  # ParticipantQuizSerializer representation
+    answer_key = JSONField()  # question id -> ids of its correct possible answers
+    question_count = PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = (UniqueConstraint(fields=('quiz', 'version'), name='unique_quiz_snapshot_version'),)
+
+    def __str__(self):
+        return f'{self.quiz} at {self.version}'
+
+
+class QuizSnapshotAnswer(Model):
+    """
+    A possible answer as a snapshot shows it, so grading and answer validation can join the snapshot in SQL. The
+    ids are plain values rather than foreign keys: the snapshot outlives edits of the live quiz.
+    """
+
+    id = UUIDField(primary_key=True, default=generate_id)
+    snapshot = ForeignKey(QuizSnapshot, null=False, related_name='answers', on_delete=CASCADE)
+    question_id = UUIDField()
+    answer_id = UUIDField()
+    is_correct = BooleanField()
+
+    class Meta:
+        constraints = (UniqueConstraint(fields=('snapshot', 'answer_id'), name='unique_snapshot_answer'),)
+
+    def __str__(self):
+        return f'{self.answer_id} of {self.snapshot_id}'
+
+
+class UserQuizQuerySet(QuerySet):
+    def active(self):
+        """Accepted attempts that are neither finished nor past their deadline."""
+        return self.filter(finished_at__isnull=True, expires_at__gte=timezone.now())
+
+    def expired(self):
+        """Accepted attempts past their deadline that were never finished explicitly."""
+        return self.filter(finished_at__isnull=True, expires_at__lt=timezone.now())
+
+    def unsent_results(self):
+        """Finished attempts whose participant has not been emailed the result yet."""
+        return self.filter(finished_at__isnull=False, results_sent=False)
+
+    def with_question_count(self):
+        """
+        Annotate question_count of the attempt's snapshot, so progress can be read off the counters in one query.
+        Attempts started before snapshots existed count the questions of the live quiz.
+        """
+        question_count = (
+            Question.objects.filter(quiz=OuterRef('quiz')).order_by().values('quiz').annotate(count=Count('id'))
+        )
+        return self.annotate(
+            question_count=Coalesce('snapshot__question_count', Subquery(question_count.values('count')), 0)
+        )
+
+
 class UserQuiz(BaseModel):
-    id = UUIDField(primary_key=True, default=uuid.uuid4)
+    id = UUIDField(primary_key=True, default=generate_id)
     email = EmailField(null=False, blank=False)
     user = ForeignKey(User, null=False, blank=False, on_delete=PROTECT)
     quiz = ForeignKey(Quiz, null=False, on_delete=CASCADE, related_name='userquiz')
+    # Quiz as of started_at. Attempts outlive any cleanup of snapshots, only deleting the quiz takes both along.
+    snapshot = ForeignKey(QuizSnapshot, null=True, blank=True, on_delete=RESTRICT)
     started_at = DateTimeField(null=True, blank=True)  # invitation accepted at
     finished_at = DateTimeField(null=True, blank=True)  # results submitted at
+    expires_at = DateTimeField(null=True, blank=True, db_index=True)  # started_at + quiz.time_limit
     results_sent = BooleanField(default=False)
+    questions_answered = PositiveIntegerField(default=0)  # maintained by the answer upload path
+    last_activity_at = DateTimeField(null=True, blank=True)  # last answer upload at
+
+    objects = UserQuizQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = 'Invitations (User quizes)'
+        indexes = (
+            Index(fields=('user', 'quiz', 'started_at', 'finished_at'), name='user_quiz_participant_idx'),
+            Index(fields=('user', 'finished_at', 'expires_at'), name='user_quiz_active_idx'),
+            Index(fields=('expires_at',), condition=Q(finished_at__isnull=True), name='user_quiz_unfinished_idx'),
+            Index(fields=('finished_at',), condition=Q(results_sent=False), name='user_quiz_unsent_idx'),
+            Index(fields=('quiz', 'last_activity_at'), name='user_quiz_progress_idx'),
+        )
 
     def __str__(self):
         return f'{self.quiz}'
 
 
 class UserAnswer(BaseModel):
-    id = UUIDField(primary_key=True, default=uuid.uuid4)
+    id = UUIDField(primary_key=True, default=generate_id)
     user_quiz = ForeignKey(UserQuiz, related_name='user_answers', null=False, on_delete=CASCADE)
     question = ForeignKey(Question, null=False, on_delete=CASCADE)
     answer = ForeignKey(PossibleAnswer, null=True, on_delete=CASCADE)
     is_checked = BooleanField(null=True)
+
+    class Meta:
+        constraints = (
+            UniqueConstraint(fields=('user_quiz', 'question', 'answer'), name='unique_user_answer'),
+        )
+
+
+class UserQuizResult(BaseModel):
+    id = UUIDField(primary_key=True, default=generate_id)
+    user_quiz = OneToOneField(UserQuiz, related_name='result', null=False, on_delete=CASCADE)
+    score = PositiveIntegerField(default=0)  # questions answered correctly
+    max_score = PositiveIntegerField(default=0)  # questions in the quiz
+    computed_at = DateTimeField(null=False)
+
+    def __str__(self):
+        return f'{self.user_quiz}: {self.score}/{self.max_score}'
+
+
+class QuestionStats(BaseModel):
+    """Running totals over the attempts that answered the question, maintained by the answer upload path."""
+
+    id = UUIDField(primary_key=True, default=generate_id)
+    question = OneToOneField(Question, related_name='stats', null=False, on_delete=CASCADE)
+    answered = PositiveIntegerField(default=0)  # attempts that uploaded an answer to it
+    correct = PositiveIntegerField(default=0)  # of those, attempts with exactly its correct answers checked
+    answer_seconds = FloatField(default=0)  # sum of the time from attempt start to the first answer
+
+    def __str__(self):
+        return f'{self.question}'
+
+
+class PossibleAnswerStats(BaseModel):
+    id = UUIDField(primary_key=True, default=generate_id)
+    possible_answer = OneToOneField(PossibleAnswer, related_name='stats', null=False, on_delete=CASCADE)
+    selected = PositiveIntegerField(default=0)  # attempts that have it checked
+
+    def __str__(self):
+        return f'{self.possible_answer}'
+
+
+class OutboxEmail(BaseModel):
+    class Status(EnumType):
+        PENDING = 'PENDING'
+        SENT = 'SENT'
+        FAILED = 'FAILED'
+
+    id = UUIDField(primary_key=True, default=generate_id)
+    subject = TextField()
+    body = TextField()
+    from_email = EmailField()
+    to_email = EmailField()
+    status = TextField(choices=Status.choices(), default=Status.PENDING)
+    attempts = PositiveIntegerField(default=0)
+    next_attempt_at = DateTimeField(default=timezone.now)
+    sent_at = DateTimeField(null=True, blank=True)
+    last_error = TextField(blank=True, default='')
+
+    class Meta:
+        indexes = (
+            Index(fields=('status', 'next_attempt_at'), name='outbox_email_due_idx'),
+            Index(fields=('to_email',), name='outbox_email_to_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.subject} to {self.to_email}'
+
+
+class QuizSearchDocument(Model):
+    # Integer primary key on purpose: it is the rowid of the external content FTS5 index (see 0007 migration)
+    id = BigAutoField(primary_key=True)
+    quiz = OneToOneField(Quiz, related_name='search_document', null=False, on_delete=CASCADE)
+    name = TextField()
+    questions = TextField()
+
+    def __str__(self):
+        return f'{self.quiz}'
+
+
+class FullTextField(TextField):
+    """The hidden column an FTS5 table has under its own name, it stands for the whole row in MATCH and bm25()."""
+
+
+@FullTextField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', (*lhs_params, *rhs_params)
+
+
+class QuizSearchIndex(Model):
+    # The app_quiz_search FTS5 table from the 0007 migration, read-only: triggers on QuizSearchDocument fill it
+    document = OneToOneField(
+        QuizSearchDocument, primary_key=True, db_column='rowid', related_name='index', on_delete=DO_NOTHING
+    )
+    search = FullTextField(db_column='app_quiz_search')
+
+    class Meta:
+        managed = False
+        db_table = 'app_quiz_search'
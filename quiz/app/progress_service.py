@@ -0,0 +1,25 @@
+from app.models import UserAnswer, UserQuiz
+from django.db.models import Count, OuterRef, Subquery
+
+
+class ProgressService:
+    """
+    Progress is polled far more often than answers are uploaded, so UserQuiz keeps counters
+    that the upload path maintains instead of counting UserAnswer rows on every poll.
+    """
+
+    @classmethod
+    def record_answers(cls, user_quiz_id, now):
+        """Refresh the attempt's counters after its answers were stored, in a single UPDATE."""
+        # Counting inside the UPDATE keeps concurrent uploads of one attempt from double counting a question
+        # without locking the row, and the unique (user_quiz, question, answer) index covers the count.
+        answered = (
+            UserAnswer.objects.filter(user_quiz_id=OuterRef('id'))
+            .order_by()
+            .values('user_quiz_id')
+            .annotate(count=Count('question_id', distinct=True))
+            .values('count')
+        )
+        UserQuiz.objects.filter(id=user_quiz_id).update(
+            questions_answered=Subquery(answered), last_activity_at=now, updated_at=now
+        )
@@ -0,0 +1,57 @@
+from app.email_service import EmailService
+from app.models import UserQuiz, UserQuizResult
+from app.scoring_service import ScoringService
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+CHUNK_SIZE = 1000
+
+
+class ResultsService:
+    """
+    Attempts are finished explicitly by the participant or by the sweep once their deadline passed.
+    Finished attempts are then graded and their result emails queued in chunks, so a run never
+    holds more than one chunk of attempts in memory.
+    """
+
+    @classmethod
+    def finish_expired(cls, chunk_size=CHUNK_SIZE):
+        """Mark attempts past their deadline as finished at that deadline, returning how many were finished."""
+        finished = 0
+        while ids := list(UserQuiz.objects.expired().values_list('id', flat=True)[:chunk_size]):
+            finished += UserQuiz.objects.filter(id__in=ids).update(
+                finished_at=F('expires_at'), updated_at=timezone.now()
+            )
+        return finished
+
+    @classmethod
+    def notify_chunk(cls, chunk_size=CHUNK_SIZE):
+        """Grade one chunk of finished attempts and queue their result emails, returning how many were queued."""
+        user_quizzes = list(
+            UserQuiz.objects.unsent_results()
+            .order_by('finished_at')
+            .values_list('id', 'email', 'quiz_id', 'snapshot_id', 'quiz__name')[:chunk_size]
+        )
+        if not user_quizzes:
+            return 0
+
+        ids = [user_quiz_id for user_quiz_id, *_ in user_quizzes]
+        ScoringService.store_results(
+            {user_quiz_id: (quiz_id, snapshot_id) for user_quiz_id, _, quiz_id, snapshot_id, _ in user_quizzes},
+            timezone.now(),
+        )
+        scores = {
+            user_quiz_id: (score, max_score)
+            for user_quiz_id, score, max_score in UserQuizResult.objects.filter(user_quiz_id__in=ids).values_list(
+                'user_quiz_id', 'score', 'max_score'
+            )
+        }
+
+        with transaction.atomic():
+            EmailService.queue_results(
+                (email, quiz_name, *scores[user_quiz_id]) for user_quiz_id, email, _, _, quiz_name in user_quizzes
+            )
+            UserQuiz.objects.filter(id__in=ids).update(results_sent=True, updated_at=timezone.now())
+
+        return len(ids)
@@ -0,0 +1,46 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+
+PRIMARY_DATABASE = 'default'
+
+
+@dataclass
+class RoutingState:
+    pinned: bool = False  # every query of the request goes to the primary
+    wrote: bool = False
+
+
+routing_state = ContextVar('routing_state', default=None)
+
+
+def read_database():
+    """Alias for reads that tolerate replication lag, like exports streamed after the request routing ended."""
+    return settings.REPLICA_DATABASE or PRIMARY_DATABASE
+
+
+class ReplicaRouter:
+    """
+    Reads of read-only requests go to the replica, writes and everything outside of a request to the primary.
+    ReplicaRoutingMiddleware decides per request, see it for read-your-writes stickiness.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        if settings.REPLICA_DATABASE and state is not None and not state.pinned:
+            return settings.REPLICA_DATABASE
+        return PRIMARY_DATABASE
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state is not None:
+            # The rest of the request has to see what it just wrote.
+            state.pinned = state.wrote = True
+        return PRIMARY_DATABASE
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True
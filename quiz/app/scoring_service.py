@@ -0,0 +1,160 @@
+from collections import defaultdict
+
+from app.helpers import chunked
+from app.models import (
+    PossibleAnswer,
+    Question,
+    QuizSnapshot,
+    QuizSnapshotAnswer,
+    UserAnswer,
+    UserQuiz,
+    UserQuizResult,
+)
+from django.db import transaction
+from django.db.models import BooleanField, Case, Count, Exists, F, Max, OuterRef, Q, When
+from django.utils import timezone
+
+CHUNK_SIZE = 500
+
+
+class ScoringService:
+    """
+    A question scores a point when the participant checked exactly its correct answers.
+    Scores are materialized in UserQuizResult and only attempts with answers newer than their result are recomputed.
+    """
+
+    @classmethod
+    def stale_attempts(cls, quiz_id):
+        """
+        User quiz id -> (quiz id, snapshot id) of started attempts without a result or with answers newer than it.
+        """
+        rows = (
+            UserQuiz.objects.filter(quiz_id=quiz_id, started_at__isnull=False)
+            .annotate(last_answer_at=Max('user_answers__updated_at'))
+            .filter(Q(result__isnull=True) | Q(last_answer_at__gt=F('result__computed_at')))
+            .values_list('id', 'quiz_id', 'snapshot_id')
+        )
+        return {user_quiz_id: (quiz_id, snapshot_id) for user_quiz_id, quiz_id, snapshot_id in rows}
+
+    @classmethod
+    def score_quiz(cls, quiz_id):
+        """Recompute results of changed attempts of the quiz, returning how many were recomputed."""
+        computed_at = timezone.now()
+        return cls.store_results(cls.stale_attempts(quiz_id), computed_at)
+
+    @classmethod
+    def answer_keys(cls, quiz_ids):
+        """Quiz id -> question id -> ids of its correct possible answers, as read from the live quiz tables."""
+        answer_keys = defaultdict(dict)
+        for quiz_id, question_id in Question.objects.filter(quiz_id__in=quiz_ids).values_list('quiz_id', 'id'):
+            answer_keys[quiz_id][str(question_id)] = []
+
+        correct_answers = PossibleAnswer.objects.filter(question__quiz_id__in=quiz_ids, is_correct=True).values_list(
+            'question__quiz_id', 'question_id', 'id'
+        )
+        for quiz_id, question_id, answer_id in correct_answers:
+            answer_keys[quiz_id][str(question_id)].append(str(answer_id))
+
+        return answer_keys
+
+    @classmethod
+    def key_counts(cls, snapshot_ids, live_quiz_ids):
+        """
+        Question counts and correct answer counts per question of the answer keys attempts are graded by, keyed
+        on snapshot id, or on quiz id for the live quiz.
+        """
+        question_counts = {}
+        correct_counts = defaultdict(dict)
+        if snapshot_ids:
+            question_counts.update(QuizSnapshot.objects.filter(id__in=snapshot_ids).values_list('id', 'question_count'))
+            rows = (
+                QuizSnapshotAnswer.objects.filter(snapshot_id__in=snapshot_ids, is_correct=True)
+                .values('snapshot_id', 'question_id')
+                .annotate(count=Count('id'))
+                .values_list('snapshot_id', 'question_id', 'count')
+            )
+            for snapshot_id, question_id, count in rows:
+                correct_counts[snapshot_id][question_id] = count
+
+        if live_quiz_ids:
+            question_counts.update(
+                Question.objects.filter(quiz_id__in=live_quiz_ids)
+                .values('quiz_id')
+                .annotate(count=Count('id'))
+                .values_list('quiz_id', 'count')
+            )
+            rows = (
+                PossibleAnswer.objects.filter(question__quiz_id__in=live_quiz_ids, is_correct=True)
+                .values('question__quiz_id', 'question_id')
+                .annotate(count=Count('id'))
+                .values_list('question__quiz_id', 'question_id', 'count')
+            )
+            for quiz_id, question_id, count in rows:
+                correct_counts[quiz_id][question_id] = count
+
+        return question_counts, correct_counts
+
+    @classmethod
+    def store_results(cls, attempts, computed_at):
+        """
+        Score attempts given as a user quiz id -> (quiz id, snapshot id) mapping, answers read after computed_at
+        count as new. Attempts are graded by the answer key of the snapshot they were started on, attempts without
+        one by the live quiz.
+        """
+        if not attempts:
+            return 0
+
+        snapshot_ids = {snapshot_id for _, snapshot_id in attempts.values() if snapshot_id}
+        live_quiz_ids = {quiz_id for quiz_id, snapshot_id in attempts.values() if not snapshot_id}
+        question_counts, correct_counts = cls.key_counts(snapshot_ids, live_quiz_ids)
+
+        # Checked answers are counted per attempt and question in SQL, as in or out of the attempt's answer key.
+        in_key = Case(
+            When(user_quiz__snapshot__isnull=True, then=F('answer__is_correct')),
+            default=Exists(
+                QuizSnapshotAnswer.objects.filter(
+                    snapshot_id=OuterRef('user_quiz__snapshot_id'), answer_id=OuterRef('answer_id'), is_correct=True
+                )
+            ),
+            output_field=BooleanField(),
+        )
+        scores = defaultdict(int)
+        for chunk in chunked(list(attempts), CHUNK_SIZE):
+            rows = (
+                UserAnswer.objects.filter(user_quiz_id__in=chunk, is_checked=True, answer__isnull=False)
+                .annotate(in_key=in_key)
+                .values('user_quiz_id', 'question_id')
+                .annotate(correct=Count('id', filter=Q(in_key=True)), wrong=Count('id', filter=Q(in_key=False)))
+                .values_list('user_quiz_id', 'question_id', 'correct', 'wrong')
+            )
+            # A question scores when exactly its correct answers were checked, one without any never does.
+            for user_quiz_id, question_id, correct, wrong in rows.iterator():
+                quiz_id, snapshot_id = attempts[user_quiz_id]
+                if not wrong and correct == correct_counts[snapshot_id or quiz_id].get(question_id):
+                    scores[user_quiz_id] += 1
+
+        results = {
+            user_quiz_id: (scores[user_quiz_id], question_counts.get(snapshot_id or quiz_id, 0))
+            for user_quiz_id, (quiz_id, snapshot_id) in attempts.items()
+        }
+
+        with transaction.atomic():
+            UserQuizResult.objects.bulk_create(
+                [
+                    UserQuizResult(
+                        user_quiz_id=user_quiz_id,
+                        score=score,
+                        max_score=max_score,
+                        computed_at=computed_at,
+                        created_at=computed_at,
+                        updated_at=computed_at,
+                    )
+                    for user_quiz_id, (score, max_score) in results.items()
+                ],
+                batch_size=CHUNK_SIZE,
+                update_conflicts=True,
+                unique_fields=('user_quiz',),
+                update_fields=('score', 'max_score', 'computed_at', 'updated_at'),
+            )
+
+        return len(attempts)
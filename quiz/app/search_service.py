@@ -0,0 +1,84 @@
+import re
+from functools import partial
+
+from app.helpers import chunked
+from app.models import Question, Quiz, QuizSearchDocument
+from django.db import connection, transaction
+from django.db.models import F, FloatField, Func, Value
+from django.db.models.expressions import RawSQL
+
+CHUNK_SIZE = 500
+NAME_WEIGHT = 4.0
+QUESTIONS_WEIGHT = 1.0
+
+
+class QuizSearchService:
+    """Full-text search over quiz names and question text, backed by the SQLite FTS5 app_quiz_search index."""
+
+    @classmethod
+    def index_quizzes(cls, quiz_ids):
+        """
+        Refresh search documents of the given quizzes, the FTS index follows through triggers. Quiz and question
+        saves and deletes get here through signals and index_on_commit(), bulk writes and queryset updates have to
+        call it themselves.
+        """
+        for chunk in chunked(quiz_ids, CHUNK_SIZE):
+            questions = {}
+            for quiz_id, question in Question.objects.filter(quiz_id__in=chunk).values_list('quiz_id', 'question'):
+                questions.setdefault(quiz_id, []).append(question)
+
+            QuizSearchDocument.objects.bulk_create(
+                [
+                    QuizSearchDocument(quiz_id=quiz_id, name=name, questions=' '.join(questions.get(quiz_id, ())))
+                    for quiz_id, name in Quiz.objects.filter(id__in=chunk).values_list('id', 'name')
+                ],
+                update_conflicts=True,
+                unique_fields=('quiz',),
+                update_fields=('name', 'questions'),
+            )
+
+    @classmethod
+    def index_on_commit(cls, quiz_id, using=None):
+        """
+        Index the quiz once the current transaction commits. Changes in one transaction share a single pending
+        callback, so saving a quiz with many questions reindexes it once, and a rollback drops the pending ids with it.
+        """
+        db = transaction.get_connection(using)
+        savepoint_ids = set(db.savepoint_ids)
+        for sids, callback, _ in db.run_on_commit:
+            if sids == savepoint_ids and getattr(callback, 'func', None) == cls.index_pending and callback.args[0]:
+                callback.args[0].add(quiz_id)
+                return
+        transaction.on_commit(partial(cls.index_pending, {quiz_id}), using=using)
+
+    @classmethod
+    def index_pending(cls, quiz_ids):
+        cls.index_quizzes(list(quiz_ids))
+        quiz_ids.clear()
+
+    @classmethod
+    def match_expression(cls, query):
+        # Every word has to match, as a prefix, quoted so user input can't use the FTS5 query syntax
+        return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', query))
+
+    @classmethod
+    def search(cls, queryset, query):
+        """Filter quizzes matching the query and annotate them with search_rank, lower is better."""
+        expression = cls.match_expression(query)
+        if not expression:
+            return queryset.none()
+
+        if connection.vendor != 'sqlite':
+            return queryset.filter(name__icontains=query).annotate(search_rank=RawSQL('0', (), FloatField()))
+
+        # The FTS table has to be joined rather than queried per row: a correlated MATCH re-runs the
+        # full-text query for every candidate and degrades quadratically with the number of matches.
+        rank = Func(
+            F('search_document__index__search'),
+            Value(NAME_WEIGHT),
+            Value(QUESTIONS_WEIGHT),
+            function='bm25',
+            output_field=FloatField(),
+        )
+
+        return queryset.filter(search_document__index__search__match=expression).annotate(search_rank=rank)
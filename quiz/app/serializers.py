@@ -1,11 +1,24 @@
+import csv
+import io
+from collections import defaultdict
 from dataclasses import dataclass
 from typing import List
 
+from app.analytics_service import AnalyticsService
 from app.email_service import EmailService
+from app.helpers import chunked
+from app.progress_service import ProgressService
+from app.search_service import QuizSearchService
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.manager import BaseManager
+from django.utils import timezone
 from rest_framework.authtoken.models import Token
 from rest_framework.exceptions import NotFound, ValidationError
-from rest_framework.fields import BooleanField, EmailField, UUIDField
-from rest_framework.serializers import ModelSerializer, Serializer
+from rest_framework.fields import BooleanField, CharField, EmailField, FileField, IntegerField, ListField, UUIDField
+from rest_framework.serializers import ListSerializer, ModelSerializer, Serializer, SerializerMethodField
 
 from .models import *
 
@@ -25,31 +38,134 @@ class CreatorQuestionSerializer(ModelSerializer):
     possible_answers = CreatorPossibleAnswerSerialiser(many=True)
 
 
-class CreatorQuizSerializer(ModelSerializer):
+class QuizTreeListSerializer(ListSerializer):
+    def to_representation(self, data):
+        return self.child.represent_quizzes(list(data.all() if isinstance(data, BaseManager) else data))
+
+
+class QuizTreeSerializerMixin:
+    """
+    Read path of the nested quiz serializers. Questions and possible answers are read as flat `.values()` rows
+    and grouped into the tree in one pass, instead of instantiating models for the prefetch and walking a nested
+    serializer per object. Values are still formatted by the serializers' own fields, in the order of the
+    prefetch it replaces, so the output does not change.
+    """
+
     class Meta:
+        list_serializer_class = QuizTreeListSerializer
+
+    def to_representation(self, instance):
+        return self.represent_quizzes([instance])[0]
+
+    def nested_representation(self, instance):
+        """The generic serializer walk over a prefetched quiz, kept as the reference for the fast path."""
+        return super().to_representation(instance)
+
+    def represent_quizzes(self, quizzes):
+        question_serializer = self.fields['questions'].child
+        answer_serializer = question_serializer.fields['possible_answers'].child
+        question_fields = self.row_fields(question_serializer, nested='possible_answers')
+        answer_fields = self.row_fields(answer_serializer)
+
+        questions = defaultdict(list)
+        answers = defaultdict(list)
+        if quizzes:
+            question_rows = Question.objects.filter(quiz_id__in=[quiz.id for quiz in quizzes]).values(
+                'quiz_id', *(source for _, source, _ in question_fields if source)
+            )
+            for row in question_rows:
+                questions[row['quiz_id']].append(self.represent_row(row, question_fields, answers[row['id']]))
+
+        if answers:
+            answer_rows = PossibleAnswer.objects.filter(question_id__in=list(answers)).values(
+                'question_id', *(source for _, source, _ in answer_fields)
+            )
+            for row in answer_rows:
+                answers[row['question_id']].append(self.represent_row(row, answer_fields))
+
+        results = []
+        for quiz in quizzes:
+            representation = {}
+            for field in self._readable_fields:
+                if field.field_name == 'questions':
+                    representation['questions'] = questions[quiz.id]
+                else:
+                    value = field.get_attribute(quiz)
+                    representation[field.field_name] = None if value is None else field.to_representation(value)
+            results.append(representation)
+
+        return results
+
+    @staticmethod
+    def row_fields(serializer, nested=None):
+        # The nested field has no column of its own, its list is filled in once the child rows are read.
+        return [
+            (field.field_name, None if field.field_name == nested else field.source, field)
+            for field in serializer._readable_fields
+        ]
+
+    @staticmethod
+    def represent_row(row, fields, nested=None):
+        representation = {}
+        for name, source, field in fields:
+            if source is None:
+                representation[name] = nested
+            else:
+                value = row[source]
+                representation[name] = None if value is None else field.to_representation(value)
+        return representation
+
+
+class CreatorQuizSerializer(QuizTreeSerializerMixin, ModelSerializer):
+    class Meta(QuizTreeSerializerMixin.Meta):
         model = Quiz
         fields = ['id', 'name', 'time_limit', 'questions']
 
     questions = CreatorQuestionSerializer(many=True)
 
     def create(self, validated_data):
-        quiz_instance = Quiz.objects.create(
+        # bulk_create skips BaseModel.save and the indexing signals, so timestamps are set and the quiz indexed by
+        # hand once its questions exist. Primary keys come from the field default at instantiation time, which lets
+        # us link the whole tree before inserting it.
+        # The query count is constant while each table fits one insert batch (166 possible answers on SQLite's
+        # 999 parameters), every further batch costs one more INSERT.
+        now = timezone.now()
+        questions = []
+        possible_answers = []
+
+        quiz_instance = Quiz(
             name=validated_data.get('name'),
             time_limit=validated_data.get('time_limit'),
             creator=self.context['request'].user,
+            created_at=now,
+            updated_at=now,
         )
         for question in validated_data.get('questions'):
-            question_instance = Question.objects.create(
+            question_instance = Question(
                 question=question.get('question'),
                 quiz=quiz_instance,
+                created_at=now,
+                updated_at=now,
             )
+            questions.append(question_instance)
+
             for possible_answer in question.get('possible_answers'):
-                PossibleAnswer.objects.create(
-                    question=question_instance,
-                    answer=possible_answer.get('answer'),
-                    is_correct=possible_answer.get('is_correct'),
+                possible_answers.append(
+                    PossibleAnswer(
+                        question=question_instance,
+                        answer=possible_answer.get('answer'),
+                        is_correct=possible_answer.get('is_correct'),
+                        created_at=now,
+                        updated_at=now,
+                    )
                 )
 
+        with transaction.atomic():
+            Quiz.objects.bulk_create([quiz_instance])
+            Question.objects.bulk_create(questions)
+            PossibleAnswer.objects.bulk_create(possible_answers)
+            QuizSearchService.index_quizzes([quiz_instance.id])
+
         return quiz_instance
 
 
@@ -68,8 +184,8 @@ class ParticipantQuestionSerializer(ModelSerializer):
     possible_answers = ParticipantPossibleAnswerSerialiser(many=True)
 
 
-class ParticipantQuizSerializer(ModelSerializer):
-    class Meta:
+class ParticipantQuizSerializer(QuizTreeSerializerMixin, ModelSerializer):
+    class Meta(QuizTreeSerializerMixin.Meta):
         model = Quiz
         fields = ['id', 'name', 'time_limit', 'questions']
 
@@ -84,35 +200,216 @@ class UserQuizSerializer(ModelSerializer):
     quiz = ParticipantQuizSerializer()
 
 
+class UserQuizResultSerializer(ModelSerializer):
+    class Meta:
+        model = UserQuizResult
+        fields = ('user_quiz', 'email', 'score', 'max_score', 'computed_at')
+
+    email = EmailField(source='user_quiz.email', read_only=True)
+
+
+class UserQuizProgressSerializer(ModelSerializer):
+    class Meta:
+        model = UserQuiz
+        fields = (
+            'user_quiz',
+            'email',
+            'started_at',
+            'expires_at',
+            'finished_at',
+            'questions_answered',
+            'question_count',
+            'last_activity_at',
+        )
+
+    user_quiz = UUIDField(source='id', read_only=True)
+    question_count = IntegerField(read_only=True)
+
+
+def ratio(part, whole):
+    return round(part / whole, 4) if whole else None
+
+
+class PossibleAnswerAnalyticsSerializer(ModelSerializer):
+    class Meta:
+        model = PossibleAnswer
+        fields = ('id', 'answer', 'is_correct', 'selected', 'selection_rate')
+
+    selected = IntegerField(read_only=True)
+    selection_rate = SerializerMethodField(help_text='Share of the attempts answering the question that checked it')
+
+    def get_selection_rate(self, possible_answer) -> float:
+        return ratio(possible_answer.selected, possible_answer.question.answered)
+
+
+class QuestionAnalyticsSerializer(ModelSerializer):
+    class Meta:
+        model = Question
+        fields = (
+            'id',
+            'question',
+            'answered',
+            'correct',
+            'percent_correct',
+            'average_seconds_to_answer',
+            'possible_answers',
+        )
+
+    answered = IntegerField(read_only=True)
+    correct = IntegerField(read_only=True)
+    percent_correct = SerializerMethodField()
+    average_seconds_to_answer = SerializerMethodField(help_text='From the start of the attempt to the first answer')
+    possible_answers = PossibleAnswerAnalyticsSerializer(many=True, read_only=True)
+
+    def get_percent_correct(self, question) -> float:
+        return round(100 * question.correct / question.answered, 2) if question.answered else None
+
+    def get_average_seconds_to_answer(self, question) -> float:
+        return None if not question.answered else round(question.answer_seconds / question.answered, 1)
+
+
 class InviteToQuizSerializer(Serializer):
     email = EmailField()
 
     def create(self, validated_data):
         email = validated_data.get('email')
-        user, _ = User.objects.get_or_create(
-            email=email,
-            defaults={
-                'user_type': User.UserType.PARTICIPANT,
-                'username': email,
-            },
-        )
-        token, _ = Token.objects.get_or_create(user=user)
+        quiz = validated_data.get('quiz')
+
+        with transaction.atomic():
+            user, _ = User.objects.get_or_create(
+                email=email,
+                defaults={
+                    'user_type': User.UserType.PARTICIPANT,
+                    'username': email,
+                },
+            )
+            token, _ = Token.objects.get_or_create(user=user)
+
+            instance = UserQuiz.objects.create(
+                user=user,
+                quiz=quiz,
+                email=email,
+            )
+
+            EmailService.queue_invitation(email, token, quiz.id)
+
+        return instance
+
+
+class InvitationResultSerializer(Serializer):
+    class Status:
+        INVITED = 'INVITED'
+        CREATED = 'CREATED'
+        DUPLICATE = 'DUPLICATE'
+        INVALID = 'INVALID'
 
+    email = CharField()
+    status = CharField()
+
+
+class BulkInviteToQuizSerializer(Serializer):
+    CHUNK_SIZE = 400  # keeps email + username lookups under SQLite's 999 parameter limit
+
+    emails = ListField(child=CharField(allow_blank=True), required=False, write_only=True)
+    file = FileField(required=False, write_only=True, help_text='CSV file with emails in the first column')
+    results = InvitationResultSerializer(many=True, read_only=True)
+
+    def validate_file(self, file):
         try:
-            quiz = Quiz.objects.get(id=self.context['request'].quiz_id)
+            reader = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig'))
+            emails = [row[0] for row in reader if row]
+        except (UnicodeDecodeError, csv.Error):
+            raise ValidationError('File is not a valid CSV')
 
-        except Quiz.DoesNotExist:
-            raise ValidationError('Quiz does not exist')
+        if emails and '@' not in emails[0]:  # header row
+            emails = emails[1:]
 
-        instance = UserQuiz.objects.create(
-            user=user,
-            quiz=quiz,
-            email=email,
-        )
+        return emails
 
-        EmailService.send_invitation(email, token, quiz.id)
+    def validate(self, attrs):
+        emails = attrs.get('emails', []) + attrs.get('file', [])
+        if not emails:
+            raise ValidationError('Provide emails either as a list or as a CSV file')
 
-        return instance
+        return {'emails': emails}
+
+    def create(self, validated_data):
+        quiz = validated_data.get('quiz')
+        now = timezone.now()
+        results = []
+        invited = {}
+        for email in validated_data.get('emails'):
+            email = email.strip()
+            result = {'email': email, 'status': InvitationResultSerializer.Status.INVITED}
+            results.append(result)
+
+            try:
+                validate_email(email)
+            except DjangoValidationError:
+                result['status'] = InvitationResultSerializer.Status.INVALID
+                continue
+
+            if email in invited:
+                result['status'] = InvitationResultSerializer.Status.DUPLICATE
+                continue
+
+            invited[email] = result
+
+        with transaction.atomic():
+            users = self.get_users(list(invited))
+            new_users = [
+                User(
+                    email=email,
+                    username=email,
+                    user_type=User.UserType.PARTICIPANT,
+                    created_at=now,
+                    updated_at=now,
+                )
+                for email in invited
+                if email not in users
+            ]
+            User.objects.bulk_create(new_users, batch_size=self.CHUNK_SIZE)
+            for user in new_users:
+                users[user.email] = user
+                invited[user.email]['status'] = InvitationResultSerializer.Status.CREATED
+
+            tokens = self.get_tokens(users.values())
+            UserQuiz.objects.bulk_create(
+                [
+                    UserQuiz(user=users[email], quiz=quiz, email=email, created_at=now, updated_at=now)
+                    for email in invited
+                ],
+                batch_size=self.CHUNK_SIZE,
+            )
+
+            EmailService.queue_invitations((email, tokens[users[email].id], quiz.id) for email in invited)
+
+        return {'results': results}
+
+    def get_users(self, emails):
+        """Map each email to an existing user, matched by email or by username as get_or_create would."""
+        users = {}
+        for chunk in chunked(emails, self.CHUNK_SIZE):
+            for user in User.objects.filter(Q(email__in=chunk) | Q(username__in=chunk)):
+                users.setdefault(user.email, user)
+                users.setdefault(user.username, user)
+
+        return {email: users[email] for email in emails if email in users}
+
+    def get_tokens(self, users):
+        """Map user ids to token keys, creating the tokens users don't have yet."""
+        user_ids = list({user.id for user in users})
+        tokens = {}
+        for chunk in chunked(user_ids, self.CHUNK_SIZE):
+            tokens.update(Token.objects.filter(user_id__in=chunk).values_list('user_id', 'key'))
+
+        new_tokens = [
+            Token(user_id=user_id, key=Token.generate_key()) for user_id in user_ids if user_id not in tokens
+        ]
+        Token.objects.bulk_create(new_tokens, batch_size=self.CHUNK_SIZE)
+        tokens.update((token.user_id, token.key) for token in new_tokens)
+
+        return tokens
 
 
 class UserAnswerSerializer(Serializer):
@@ -128,37 +425,54 @@ class UserAnswerListSerializer(Serializer):
         user = self.context['request'].user
         user_quiz_id = self.context['request'].user_quiz_id
 
-        try:
-            user_quiz = UserQuiz.objects.get(id=user_quiz_id, user=user)
-            quiz = user_quiz.quiz
-        except UserQuiz.DoesNotExist:
-            raise NotFound('Quiz not found')
-
-        try:
-            question = quiz.questions.get(id=validated_data.get('question'))
-
-        except Question.DoesNotExist:
-            raise NotFound('Question not found')
-
-        answers = []
-        for answer_data in validated_data.get('answers'):
+        with transaction.atomic():
             try:
-                answer = question.possible_answers.get(id=answer_data.get('answer'))
-
-            except PossibleAnswer.DoesNotExist:
-                raise NotFound('Answer not found')
-
-            is_checked = answer_data.get('is_checked')
+                # Locked, so concurrent uploads of one attempt apply their statistics one after another.
+                user_quiz = (
+                    UserQuiz.objects.active()
+                    .select_for_update(of=('self',))
+                    .select_related('snapshot')
+                    .defer('snapshot__content')
+                    .get(id=user_quiz_id, user=user)
+                )
+            except UserQuiz.DoesNotExist:
+                raise NotFound('Either not found or time is up')
+
+            # The question as the attempt's snapshot shows it, edits of the live quiz since the start don't count.
+            possible_answers = {
+                answer.id: answer
+                for answer in PossibleAnswer.objects.of_attempt(user_quiz)
+                .filter(question_id=validated_data.get('question'))
+                .select_related('question')
+            }
+            if not possible_answers:
+                raise NotFound('Question not found')
+
+            question = next(iter(possible_answers.values())).question
+            now = timezone.now()
+            previous = AnalyticsService.answers_of(user_quiz.id, [question.id])
+            submitted = {}
+            answers = []
+            for answer_data in validated_data.get('answers'):
+                answer = possible_answers.get(answer_data.get('answer'))
+                if answer is None:
+                    raise NotFound('Answer not found')
+
+                is_checked = answer_data.get('is_checked')
+                submitted[(question.id, answer.id)] = is_checked
+
+                answer, created = UserAnswer.objects.update_or_create(
+                    user_quiz=user_quiz,
+                    question=question,
+                    answer=answer,
+                    defaults={
+                        'is_checked': is_checked,
+                    },
+                )
+                answers.append(answer)
 
-            answer, created = UserAnswer.objects.update_or_create(
-                user_quiz=user_quiz,
-                question=question,
-                answer=answer,
-                defaults={
-                    'is_checked': is_checked,
-                },
-            )
-            answers.append(answer)
+            ProgressService.record_answers(user_quiz.id, now)
+            AnalyticsService.record_answers(user_quiz, previous, submitted, now)
 
         @dataclass
         class RetObject:
@@ -166,3 +480,62 @@ class UserAnswerListSerializer(Serializer):
             answers: List
 
         return RetObject(question=question, answers=answers)
+
+
+class UserAnswerBatchSerializer(Serializer):
+    questions = UserAnswerListSerializer(many=True)
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        user_quiz_id = self.context['request'].user_quiz_id
+
+        with transaction.atomic():
+            try:
+                # Locked, so concurrent uploads of one attempt apply their statistics one after another.
+                user_quiz = (
+                    UserQuiz.objects.active()
+                    .select_for_update(of=('self',))
+                    .select_related('snapshot')
+                    .defer('snapshot__content')
+                    .get(id=user_quiz_id, user=user)
+                )
+            except UserQuiz.DoesNotExist:
+                raise NotFound('Either not found or time is up')
+
+            submitted = {}
+            for question_data in validated_data.get('questions'):
+                for answer_data in question_data.get('answers'):
+                    key = (question_data.get('question'), answer_data.get('answer'))
+                    submitted[key] = answer_data.get('is_checked')
+
+            # One query validates every submitted answer against the attempt's snapshot it has to belong to.
+            valid_pairs = set(
+                PossibleAnswer.objects.of_attempt(user_quiz)
+                .filter(id__in={answer_id for _, answer_id in submitted})
+                .values_list('question_id', 'id')
+            )
+            if not valid_pairs.issuperset(submitted):
+                raise NotFound('Answer not found')
+
+            now = timezone.now()
+            previous = AnalyticsService.answers_of(user_quiz.id, {question_id for question_id, _ in submitted})
+            UserAnswer.objects.bulk_create(
+                [
+                    UserAnswer(
+                        user_quiz=user_quiz,
+                        question_id=question_id,
+                        answer_id=answer_id,
+                        is_checked=is_checked,
+                        created_at=now,
+                        updated_at=now,
+                    )
+                    for (question_id, answer_id), is_checked in submitted.items()
+                ],
+                update_conflicts=True,
+                unique_fields=('user_quiz', 'question', 'answer'),
+                update_fields=('is_checked', 'updated_at'),
+            )
+            ProgressService.record_answers(user_quiz.id, now)
+            AnalyticsService.record_answers(user_quiz, previous, submitted, now)
+
+        return validated_data
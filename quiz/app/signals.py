@@ -0,0 +1,36 @@
+from app.authentication import CachedTokenAuthentication
+from app.middleware import install_query_recorder
+from app.models import Question, Quiz, User
+from app.search_service import QuizSearchService
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    CachedTokenAuthentication.invalidate(instance.key)
+
+
+@receiver(post_save, sender=User)
+def evict_user_tokens(sender, instance, created, **kwargs):
+    # covers deactivation as well as any other change to the cached user
+    if not created:
+        CachedTokenAuthentication.invalidate(*Token.objects.filter(user_id=instance.id).values_list('key', flat=True))
+
+
+@receiver(connection_created)
+def install_connection_query_recorder(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def index_changed_quiz(sender, instance, using, raw=False, origin=None, **kwargs):
+    # a deleted quiz takes its search document along, so questions deleted with it need no reindexing
+    if raw or isinstance(origin, Quiz) or getattr(origin, 'model', None) is Quiz:
+        return
+
+    QuizSearchService.index_on_commit(instance.id if sender is Quiz else instance.quiz_id, using)
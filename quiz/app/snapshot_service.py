@@ -0,0 +1,81 @@
+from app.analytics_service import AnalyticsService
+from app.models import Quiz, QuizSnapshot, QuizSnapshotAnswer, UserQuiz
+from app.scoring_service import ScoringService
+from app.serializers import ParticipantQuizSerializer
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+
+class SnapshotService:
+    """
+    What a participant sees is frozen when the attempt starts: the participant representation of the quiz and the
+    answer key it is graded by are stored once per quiz content version (its updated_at, bumped on every edit)
+    and shared by all attempts started on that version.
+    """
+
+    @classmethod
+    def get_or_create(cls, quiz):
+        try:
+            return QuizSnapshot.objects.get(quiz=quiz, version=quiz.updated_at)
+        except QuizSnapshot.DoesNotExist:
+            return cls.create(quiz)
+
+    @classmethod
+    async def aget_or_create(cls, quiz):
+        try:
+            return await QuizSnapshot.objects.aget(quiz=quiz, version=quiz.updated_at)
+        except QuizSnapshot.DoesNotExist:
+            return await sync_to_async(cls.create)(quiz)
+
+    @classmethod
+    def create(cls, quiz):
+        try:
+            with transaction.atomic():
+                content = ParticipantQuizSerializer(quiz).data
+                answer_key = ScoringService.answer_keys([quiz.id]).get(quiz.id, {})
+                snapshot = QuizSnapshot.objects.create(
+                    quiz=quiz,
+                    version=quiz.updated_at,
+                    content=content,
+                    answer_key=answer_key,
+                    question_count=len(content['questions']),
+                )
+                QuizSnapshotAnswer.objects.bulk_create(
+                    [
+                        QuizSnapshotAnswer(
+                            snapshot=snapshot,
+                            question_id=question['id'],
+                            answer_id=answer['id'],
+                            is_correct=answer['id'] in answer_key.get(question['id'], ()),
+                        )
+                        for question in content['questions']
+                        for answer in question['possible_answers']
+                    ]
+                )
+                AnalyticsService.create_snapshot_rows(snapshot)
+                return snapshot
+        except IntegrityError:
+            # Another attempt of the same version stored it first.
+            return QuizSnapshot.objects.get(quiz=quiz, version=quiz.updated_at)
+
+    @classmethod
+    def attach(cls, user_quiz):
+        """Snapshot an attempt started before snapshots existed, on the quiz as it is now."""
+        snapshot = cls.get_or_create(Quiz.objects.get(id=user_quiz.quiz_id))
+        UserQuiz.objects.filter(id=user_quiz.id, snapshot__isnull=True).update(
+            snapshot=snapshot, updated_at=timezone.now()
+        )
+        user_quiz.snapshot = snapshot
+
+        return snapshot
+
+    @classmethod
+    async def aattach(cls, user_quiz):
+        snapshot = await cls.aget_or_create(await Quiz.objects.aget(id=user_quiz.quiz_id))
+        await UserQuiz.objects.filter(id=user_quiz.id, snapshot__isnull=True).aupdate(
+            snapshot=snapshot, updated_at=timezone.now()
+        )
+        user_quiz.snapshot = snapshot
+
+        return snapshot
@@ -1,13 +1,63 @@
+import asyncio
+import math
+import os
+import re
+import sqlite3
+import tempfile
+import time
+import uuid
+from contextlib import closing
 from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
 
-from django.test import TestCase
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.admin import helpers
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection, connections, router
+from django.db.models import RestrictedError, prefetch_related_objects
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.authentication import get_user_model
 from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 
-from .models import Quiz, UserQuiz
+from .admin import estimate_count
+from .authentication import CachedTokenAuthentication
+from .benchmark import ApiBenchmark
+from .checks import check_replica_sticky_cache
+from .email_service import EmailService
+from .helpers import generate_id, uuid7
+from .middleware import SLOW_REQUEST_SQL_LOGGED_CHARS, ReplicaRoutingMiddleware, RequestMetricsMiddleware
+from .models import (
+    OutboxEmail,
+    PossibleAnswer,
+    Question,
+    Quiz,
+    QuizSnapshot,
+    UserAnswer,
+    UserQuiz,
+    UserQuizResult,
+)
+from .renderers import FastJSONRenderer
+from .scoring_service import ScoringService
+from .serializers import CreatorQuizSerializer, ParticipantQuizSerializer
+from .search_service import QuizSearchService
+from .snapshot_service import SnapshotService
+from .throttling import CacheBucketStore, LocalBucketStore, PerQuizThrottle, TokenBucketThrottle
+from .version_service import QuizVersionService
+from .views import BulkInviteToQuizView
 
 User = get_user_model()
 
@@ -25,7 +75,33 @@ class QuizListViewTest(TestCase):
         response = client.get(reverse('quiz-list'))
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_list_quizzes_cursor_pagination(self):
+        client = APIClient()
+        user = User.objects.create_user(username='testuser', password='testpassword', user_type=User.UserType.CREATOR)
+        token = Token.objects.create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        for i in range(25):
+            Quiz.objects.create(name=f'Quiz {i}', time_limit=timedelta(minutes=30), creator=user)
+        Quiz.objects.create(name='Other', time_limit=timedelta(minutes=30), creator=user)
+
+        names = []
+        url = reverse('quiz-list') + '?limit=10&name_contains=quiz'
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            names.extend(quiz['name'] for quiz in response.data['results'])
+            url = response.data['next']
+
+            quiz_query = next(query['sql'] for query in context.captured_queries if 'FROM "app_quiz"' in query['sql'])
+            self.assertNotIn('OFFSET', quiz_query)
+            self.assertNotIn('COUNT(', quiz_query)
+
+        self.assertEqual(names, [f'Quiz {i}' for i in range(25)])
 
     def test_create_quiz_unauthenticated(self):
         data = {'name': 'New Quiz', 'time_limit': 2400, 'questions': []}
@@ -75,3 +151,1951 @@ class QuizListViewTest(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(UserQuiz.objects.count(), 0)
+
+
+class QuizCreateViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='creator', password='password', user_type=User.UserType.CREATOR)
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def build_quiz(self, questions_count, answers_count=3):
+        return {
+            'name': f'Quiz {questions_count}',
+            'time_limit': '01:00:00',
+            'questions': [
+                {
+                    'question': f'Question {i}',
+                    'possible_answers': [
+                        {'answer': f'Answer {i}.{j}', 'is_correct': j == 0} for j in range(answers_count)
+                    ],
+                }
+                for i in range(questions_count)
+            ],
+        }
+
+    def create_quiz(self, data):
+        CachedTokenAuthentication.local_cache.clear()  # compare cold requests, token lookup included
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(reverse('quiz-list'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response, len(context.captured_queries)
+
+    def test_create_quiz(self):
+        response, _ = self.create_quiz(self.build_quiz(2))
+
+        quiz = Quiz.objects.get(id=response.data['id'])
+        self.assertEqual(quiz.creator, self.user)
+        self.assertIsNotNone(quiz.created_at)
+        self.assertEqual(Question.objects.filter(quiz=quiz).count(), 2)
+        self.assertEqual(PossibleAnswer.objects.filter(question__quiz=quiz).count(), 6)
+        self.assertEqual(len(response.data['questions']), 2)
+        self.assertEqual(len(response.data['questions'][0]['possible_answers']), 3)
+
+    def test_create_quiz_query_count_is_constant(self):
+        _, small_count = self.create_quiz(self.build_quiz(2))
+        _, large_count = self.create_quiz(self.build_quiz(50))
+
+        # 150 possible answers still fit a single insert batch on SQLite
+        self.assertEqual(small_count, large_count)
+
+    def test_create_quiz_query_count_grows_per_insert_batch(self):
+        _, small_count = self.create_quiz(self.build_quiz(2))
+        _, large_count = self.create_quiz(self.build_quiz(200))
+
+        def batches(model, count):
+            return math.ceil(count / connection.ops.bulk_batch_size(model._meta.concrete_fields, [None] * count))
+
+        # 200 questions and 600 possible answers take 2 and 4 insert batches on SQLite, one query each
+        self.assertEqual((batches(Question, 200), batches(PossibleAnswer, 600)), (2, 4))
+        self.assertEqual(large_count, small_count + 1 + 3)
+
+
+class UserAnswerBatchUploadViewTest(TestCase):
+    def setUp(self):
+        creator = User.objects.create_user(username='creator', password='password', user_type=User.UserType.CREATOR)
+        self.participant = User.objects.create_user(
+            username='participant', password='password', user_type=User.UserType.PARTICIPANT
+        )
+        token = Token.objects.create(user=self.participant)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.quiz = Quiz.objects.create(name='Quiz', time_limit=timedelta(minutes=60), creator=creator)
+        self.questions = [Question.objects.create(question=f'Question {i}', quiz=self.quiz) for i in range(10)]
+        for question in self.questions:
+            PossibleAnswer.objects.create(question=question, answer='Yes', is_correct=True)
+            PossibleAnswer.objects.create(question=question, answer='No', is_correct=False)
+
+        now = timezone.now()
+        self.user_quiz = UserQuiz.objects.create(
+            user=self.participant,
+            quiz=self.quiz,
+            email='participant@example.com',
+            started_at=now,
+            expires_at=now + self.quiz.time_limit,
+            snapshot=SnapshotService.get_or_create(self.quiz),
+        )
+        self.url = reverse('user-answer-batch-upload', kwargs={'pk': self.user_quiz.id})
+
+    def build_answers(self, questions, is_checked=True):
+        return {
+            'questions': [
+                {
+                    'question': str(question.id),
+                    'answers': [
+                        {'answer': str(answer.id), 'is_checked': is_checked}
+                        for answer in question.possible_answers.all()
+                    ],
+                }
+                for question in questions
+            ]
+        }
+
+    def test_upload_answers_for_many_questions(self):
+        response = self.client.post(self.url, self.build_answers(self.questions), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(UserAnswer.objects.filter(user_quiz=self.user_quiz, is_checked=True).count(), 20)
+
+    def test_upload_answers_updates_existing(self):
+        self.client.post(self.url, self.build_answers(self.questions), format='json')
+        response = self.client.post(self.url, self.build_answers(self.questions[:2], is_checked=False), format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(UserAnswer.objects.filter(user_quiz=self.user_quiz).count(), 20)
+        self.assertEqual(UserAnswer.objects.filter(user_quiz=self.user_quiz, is_checked=False).count(), 4)
+
+    def test_upload_answers_query_budget(self):
+        one_question = self.build_answers(self.questions[:1])
+        all_questions = self.build_answers(self.questions)
+
+        # token authentication, user quiz lookup, answer validation, previous answers, upsert, progress counters,
+        # question and answer statistics, and the savepoint around them
+        with self.assertNumQueries(10):
+            self.client.post(self.url, one_question, format='json')
+
+        # the token is cached from now on
+        with self.assertNumQueries(9):
+            self.client.post(self.url, all_questions, format='json')
+
+    def test_upload_answer_from_another_question(self):
+        data = self.build_answers(self.questions[:1])
+        data['questions'][0]['question'] = str(self.questions[1].id)
+
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(UserAnswer.objects.count(), 0)
+
+    def test_upload_answers_to_foreign_user_quiz(self):
+        other = User.objects.create_user(username='other', password='password', user_type=User.UserType.PARTICIPANT)
+        user_quiz = UserQuiz.objects.create(user=other, quiz=self.quiz, email='other@example.com')
+
+        response = self.client.post(
+            reverse('user-answer-batch-upload', kwargs={'pk': user_quiz.id}),
+            self.build_answers(self.questions),
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BulkInviteToQuizViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        user = User.objects.create_user(username='creator', password='password', user_type=User.UserType.CREATOR)
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.quiz = Quiz.objects.create(name='Quiz', time_limit=timedelta(minutes=60), creator=user)
+        self.url = reverse('quiz-bulk-invite', kwargs={'quiz_id': self.quiz.id})
+
+    def test_bulk_invite(self):
+        existing = User.objects.create_user(
+            username='existing@example.com', email='existing@example.com', user_type=User.UserType.PARTICIPANT
+        )
+        emails = ['existing@example.com', 'new@example.com', 'invalid-email', 'new@example.com']
+
+        response = self.client.post(self.url, {'emails': emails}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['INVITED', 'CREATED', 'INVALID', 'DUPLICATE'],
+        )
+        self.assertEqual(UserQuiz.objects.filter(quiz=self.quiz).count(), 2)
+        self.assertTrue(Token.objects.filter(user=existing).exists())
+        self.assertEqual(User.objects.get(email='new@example.com').user_type, User.UserType.PARTICIPANT)
+        self.assertEqual(OutboxEmail.objects.count(), 2)
+
+    def test_bulk_invite_csv(self):
+        content = 'email\nfirst@example.com\nsecond@example.com\n'
+        file = SimpleUploadedFile('emails.csv', content.encode(), content_type='text/csv')
+
+        response = self.client.post(self.url, {'file': file}, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertEqual(UserQuiz.objects.filter(quiz=self.quiz).count(), 2)
+
+    def test_bulk_invite_query_count_is_constant(self):
+        def invite(count, prefix):
+            emails = [f'{prefix}{i}@example.com' for i in range(count)]
+            CachedTokenAuthentication.local_cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                self.client.post(self.url, {'emails': emails}, format='json')
+            return len(context.captured_queries)
+
+        # stays within a single insert batch for every table on SQLite
+        self.assertEqual(invite(2, 'small'), invite(60, 'large'))
+
+    def test_bulk_invite_beyond_the_quiz_bucket(self):
+        capacity, _ = PerQuizThrottle().get_rate(BulkInviteToQuizView())
+        emails = [f'{i}@example.com' for i in range(capacity + 100)]
+
+        response = self.client.post(self.url, {'emails': emails}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(UserQuiz.objects.filter(quiz=self.quiz).count(), capacity + 100)
+
+    def test_bulk_invite_without_emails(self):
+        response = self.client.post(self.url, {'emails': []}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SendEmailsCommandTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        user = User.objects.create_user(username='creator', password='password', user_type=User.UserType.CREATOR)
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.quiz = Quiz.objects.create(name='Quiz', time_limit=timedelta(minutes=60), creator=user)
+
+    def invite(self, *emails):
+        self.client.post(
+            reverse('quiz-bulk-invite', kwargs={'quiz_id': self.quiz.id}), {'emails': list(emails)}, format='json'
+        )
+
+    def test_invitation_is_queued_not_sent(self):
+        response = self.client.post(
+            reverse('quiz-invite', kwargs={'quiz_id': self.quiz.id}), {'email': 'a@example.com'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboxEmail.objects.get().status, OutboxEmail.Status.PENDING)
+
+    def test_send_emails(self):
+        self.invite('a@example.com', 'b@example.com', 'c@example.com')
+
+        call_command('send_emails', '--once', '--batch-size=2', stdout=StringIO())
+
+        recipients = sorted(message.to[0] for message in mail.outbox)
+        self.assertEqual(recipients, ['a@example.com', 'b@example.com', 'c@example.com'])
+        self.assertEqual(OutboxEmail.objects.filter(status=OutboxEmail.Status.SENT).count(), 3)
+
+    def test_send_emails_retries_with_backoff(self):
+        self.invite('a@example.com')
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=SMTPException):
+            call_command('send_emails', '--once', '--max-attempts=2', stdout=StringIO())
+
+        email = OutboxEmail.objects.get()
+        self.assertEqual(email.status, OutboxEmail.Status.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.next_attempt_at, timezone.now())
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=SMTPException):
+            call_command('send_emails', '--once', '--max-attempts=2', stdout=StringIO())
+
+        self.assertEqual(OutboxEmail.objects.get().status, OutboxEmail.Status.FAILED)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_send_emails_backs_off_when_server_is_unreachable(self):
+        self.invite('a@example.com', 'b@example.com')
+
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.open', side_effect=ConnectionRefusedError):
+            call_command('send_emails', '--once', stdout=StringIO())
+
+        for email in OutboxEmail.objects.all():
+            self.assertEqual(email.status, OutboxEmail.Status.PENDING)
+            self.assertEqual(email.attempts, 1)
+            self.assertIn('ConnectionRefusedError', email.last_error)
+            self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_concurrent_workers_send_each_email_once(self):
+        self.invite('a@example.com', 'b@example.com')
+        other_worker = []
+        send_messages = EmailBackend.send_messages
+
+        def send_while_other_worker_runs(backend, messages):
+            if not other_worker:
+                other_worker.append(EmailService.send_pending())
+            return send_messages(backend, messages)
+
+        with mock.patch.object(EmailBackend, 'send_messages', send_while_other_worker_runs):
+            sent, failed, _ = EmailService.send_pending()
+
+        self.assertEqual((sent, failed), (2, 0))
+        self.assertEqual(other_worker[0][:2], (0, 0))
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_abandoned_claim_is_retried(self):
+        self.invite('a@example.com')
+
+        with mock.patch('app.email_service.get_connection', side_effect=SystemExit):
+            with self.assertRaises(SystemExit):
+                EmailService.send_pending()
+
+        self.assertEqual(EmailService.send_pending()[:2], (0, 0))
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(EmailService.send_pending()[:2], (1, 0))
+
+
+class RetriveUserQuizViewTest(TestCase):
+    def setUp(self):
+        creator = User.objects.create_user(username='creator', password='password', user_type=User.UserType.CREATOR)
+        participant = User.objects.create_user(
+            username='participant', password='password', user_type=User.UserType.PARTICIPANT
+        )
+        token = Token.objects.create(user=participant)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.quiz = Quiz.objects.create(name='Quiz', time_limit=timedelta(minutes=60), creator=creator)
+        self.question = Question.objects.create(question='Question', quiz=self.quiz)
+        PossibleAnswer.objects.create(question=self.question, answer='Yes', is_correct=True)
+
+        now = timezone.now()
+        user_quiz = UserQuiz.objects.create(
+            user=participant,
+            quiz=self.quiz,
+            email='participant@example.com',
+            started_at=now,
+            expires_at=now + self.quiz.time_limit,
+        )
+        self.url = reverse('user-quiz-detail', kwargs={'pk': user_quiz.id})
+
+    def test_retrieve_hides_correct_answers(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['quiz']['questions'][0]['question'], 'Question')
+        self.assertNotIn('is_correct', response.data['quiz']['questions'][0]['possible_answers'][0])
+
+    def test_retrieve_is_one_query(self):
+        self.client.get(self.url)
+
+        # user quiz lookup only, the token is cached as well
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['quiz']['questions']), 1)
+
+    def test_retrieve_keeps_snapshot_after_edit(self):
+        self.client.get(self.url)
+        self.question.question = 'Changed'
+        self.question.save()
+
+        QuizVersionService.invalidate(self.quiz.id)
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.data['quiz']['questions'][0]['question'], 'Question')
+
+
+class ScoringServiceTest(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user(
+            username='creator', password='password', user_type=User.UserType.CREATOR
+        )
+        self.quiz = Quiz.objects.create(name='Quiz', time_limit=timedelta(minutes=60), creator=self.creator)
+
+        self.single = Question.objects.create(question='Single', quiz=self.quiz)
+        self.single_yes = PossibleAnswer.objects.create(question=self.single, answer='Yes', is_correct=True)
+        self.single_no = PossibleAnswer.objects.create(question=self.single, answer='No', is_correct=False)
+
+        self.multiple = Question.objects.create(question='Multiple', quiz=self.quiz)
+        self.multiple_a = PossibleAnswer.objects.create(question=self.multiple, answer='A', is_correct=True)
+        self.multiple_b = PossibleAnswer.objects.create(question=self.multiple, answer='B', is_correct=True)
+
+        self.participant = User.objects.create_user(
+            username='participant', password='password', user_type=User.UserType.PARTICIPANT
+        )
+        started_at = timezone.now() - timedelta(hours=2)
+        self.user_quiz = self.create_user_quiz(
+            self.participant, started_at=started_at, expires_at=started_at + self.quiz.time_limit
+        )
+
+    def create_user_quiz(self, user, **kwargs):
+        return UserQuiz.objects.create(user=user, quiz=self.quiz, email=f'{user.username}@example.com', **kwargs)
+
+    def answer(self, user_quiz, answer, is_checked=True):
+        UserAnswer.objects.update_or_create(
+            user_quiz=user_quiz, question=answer.question, answer=answer, defaults={'is_checked': is_checked}
+        )
+
+    def test_score_quiz(self):
+        self.answer(self.user_quiz, self.single_yes)
+        self.answer(self.user_quiz, self.single_no, is_checked=False)
+        self.answer(self.user_quiz, self.multiple_a)
+
+        other = self.create_user_quiz(
+            User.objects.create_user(username='other', password='password', user_type=User.UserType.PARTICIPANT),
+            started_at=timezone.now(),
+        )
+        self.answer(other, self.single_yes)
+        self.answer(other, self.single_no)
+        self.answer(other, self.multiple_a)
+        self.answer(other, self.multiple_b)
+
+        self.assertEqual(ScoringService.score_quiz(self.quiz.id), 2)
+
+        self.assertEqual(UserQuizResult.objects.get(user_quiz=self.user_quiz).score, 1)
+        self.assertEqual(UserQuizResult.objects.get(user_quiz=other).score, 1)
+        self.assertEqual(UserQuizResult.objects.get(user_quiz=other).max_score, 2)
+
+    def test_score_quiz_skips_invitations_never_started(self):
+        self.create_user_quiz(
+            User.objects.create_user(username='invited', password='password', user_type=User.UserType.PARTICIPANT)
+        )
+
+        self.assertEqual(ScoringService.score_quiz(self.quiz.id), 1)
+        self.assertEqual(UserQuizResult.objects.get().user_quiz, self.user_quiz)
+
+    def test_score_quiz_recomputes_only_changed_attempts(self):
+        other = self.create_user_quiz(
+            User.objects.create_user(username='other', password='password', user_type=User.UserType.PARTICIPANT),
+            started_at=timezone.now(),
+        )
+        self.answer(self.user_quiz, self.single_yes)
+        self.answer(other, self.single_yes)
+        ScoringService.score_quiz(self.quiz.id)
+
+        self.assertEqual(ScoringService.score_quiz(self.quiz.id), 0)
+
+        self.answer(self.user_quiz, self.multiple_a)
+        self.answer(self.user_quiz, self.multiple_b)
+
+        self.assertEqual(ScoringService.score_quiz(self.quiz.id), 1)
+        self.assertEqual(UserQuizResult.objects.get(user_quiz=self.user_quiz).score, 2)
+
+    def test_creator_results(self):
+        self.answer(self.user_quiz, self.single_yes)
+        call_command('send_results', stdout=StringIO())
+        token = Token.objects.create(user=self.creator)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        response = client.get(reverse('quiz-results', kwargs={'quiz_id': self.quiz.id}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['score'], 1)
+        self.assertEqual(response.data[0]['email'], 'participant@example.com')
+
+    def test_participant_result(self):
+        self.answer(self.user_quiz, self.single_yes)
+        call_command('send_results', stdout=StringIO())
+        token = Token.objects.create(user=self.participant)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        response = client.get(reverse('user-quiz-result', kwargs={'pk': self.user_quiz.id}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['score'], 1)
+
+    def test_results_are_read_only(self):
+        self.answer(self.user_quiz, self.single_yes)
+        self.create_user_quiz(
+            User.objects.create_user(username='invited', password='password', user_type=User.UserType.PARTICIPANT)
+        )
+        creator_client = APIClient()
+        creator_client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.creator).key}')
+        participant_client = APIClient()
+        participant_client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.participant).key}')
+
+        # expired, but not graded until send_results finishes it
+        response = participant_client.get(reverse('user-quiz-result', kwargs={'pk': self.user_quiz.id}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = creator_client.get(reverse('quiz-results', kwargs={'quiz_id': self.quiz.id}))
+        self.assertEqual(response.data, [])
+        self.assertFalse(UserQuizResult.objects.exists())
+
+    def test_finish_grades_the_attempt(self):
+        started_at = timezone.now()
+        user_quiz = self.create_user_quiz(
+            User.objects.create_user(username='other', password='password', user_type=User.UserType.PARTICIPANT),
+            started_at=started_at,
+            expires_at=started_at + self.quiz.time_limit,
+        )
+        self.answer(user_quiz, self.multiple_a)
+        self.answer(user_quiz, self.multiple_b)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user_quiz.user).key}')
+
+        client.post(reverse('user-quiz-finish', kwargs={'pk': user_quiz.id}))
+
+        self.assertEqual(UserQuizResult.objects.get().user_quiz, user_quiz)
+        response = client.get(reverse('user-quiz-result', kwargs={'pk': user_quiz.id}))
+        self.assertEqual((response.data['score'], response.data['max_score']), (1, 2))
+
+    def test_participant_result_hidden_during_attempt(self):
+        self.user_quiz.started_at = timezone.now()
+        self.user_quiz.expires_at = self.user_quiz.started_at + self.quiz.time_limit
+        self.user_quiz.save()
+        token = Token.objects.create(user=self.participant)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        response = client.get(reverse('user-quiz-result', kwargs={'pk': self.user_quiz.id}))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class AdminExportTest(TestCase):
+    def setUp(self):
+        admin = User.objects.create_superuser(username='admin', password='password', email='admin@example.com')
+        self.client.force_login(admin)
+
+        self.quiz = Quiz.objects.create(name='Quiz', time_limit=timedelta(minutes=60), creator=admin)
+        question = Question.objects.create(question='Question', quiz=self.quiz)
+        answer = PossibleAnswer.objects.create(question=question, answer='Yes', is_correct=True)
+        participant = User.objects.create_user(
+            username='participant', password='password', user_type=User.UserType.PARTICIPANT
+        )
+        user_quiz = UserQuiz.objects.create(
+            user=participant, quiz=self.quiz, email='participant@example.com', started_at=timezone.now()
+        )
+        UserAnswer.objects.create(user_quiz=user_quiz, question=question, answer=answer, is_checked=True)
+
+    def export(self, url, action, ids):
+        response = self.client.post(url, {'action': action, helpers.ACTION_CHECKBOX_NAME: [str(i) for i in ids]})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_export_daily_report(self):
+        lines = self.export(reverse('admin:app_quiz_changelist'), 'export_daily_report', [self.quiz.id])
+
+        self.assertEqual(lines[0], 'Date,Number of Quizzes')
+        self.assertEqual(len(lines), 2)
+
+    def test_export_results(self):
+        lines = self.export(reverse('admin:app_quiz_changelist'), 'export_results', [self.quiz.id])
+
+        self.assertEqual(lines[1], f'{self.quiz.id},Quiz,participant@example.com,1,1')
+
+    def test_export_answers(self):
+        quiz_lines = self.export(reverse('admin:app_quiz_changelist'), 'export_quiz_answers', [self.quiz.id])
+        answer_lines = self.export(
+            reverse('admin:app_useranswer_changelist'),
+            'export_user_answers',
+            UserAnswer.objects.values_list('id', flat=True),
+        )
+
+        self.assertEqual(len(quiz_lines), 2)
+        self.assertEqual(quiz_lines, answer_lines)
+        self.assertTrue(quiz_lines[1].endswith(',Yes,True'))
+
+
+class AdminChangelistTest(TestCase):
+    """Changelists of the big tables take the same handful of queries however many rows they show."""
+
+    def setUp(self):
+        admin = User.objects.create_superuser(username='admin', password='password', email='admin@example.com')
+        self.client.force_login(admin)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.quiz = Quiz.objects.create(name='Quiz', time_limit=timedelta(minutes=60), creator=admin)
+            self.question = Question.objects.create(question='Question', quiz=self.quiz)
+        self.answer = PossibleAnswer.objects.create(question=self.question, answer='Yes', is_correct=True)
+        for i in range(3):
+            self.add_attempt(i)
+
+    def add_attempt(self, i):
+        participant = User.objects.create_user(
+            username=f'participant{i}', email=f'participant{i}@example.com', user_type=User.UserType.PARTICIPANT
+        )
+        user_quiz = UserQuiz.objects.create(user=participant, quiz=self.quiz, email=participant.email)
+        UserAnswer.objects.create(user_quiz=user_quiz, question=self.question, answer=self.answer, is_checked=True)
+        OutboxEmail.objects.create(to_email=participant.email, subject='Invitation', body='Invitation')
+
+    def changelist(self, name, **params):
+        response = self.client.get(reverse(f'admin:app_{name}_changelist'), params)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.context['cl']
+
+    def test_changelist_queries(self):
+        # session, user, the count (an estimate, then an exact one on tables this small) and the rows
+        for name in ('useranswer', 'userquiz', 'quiz', 'user', 'outboxemail'):
+            with self.subTest(name), self.assertNumQueries(5):
+                self.changelist(name)
+
+        for i in range(3, 10):
+            self.add_attempt(i)
+
+        for name in ('useranswer', 'userquiz', 'quiz', 'user', 'outboxemail'):
+            with self.subTest(name), self.assertNumQueries(5):
+                self.changelist(name)
+
+    def test_estimated_count(self):
+        with mock.patch('app.admin.EXACT_COUNT_LIMIT', 1), CaptureQueriesContext(connection) as context:
+            cl = self.changelist('useranswer')
+
+        self.assertEqual(cl.result_count, estimate_count(UserAnswer, 'default'))
+        self.assertEqual(cl.result_count, 3)
+        self.assertFalse([query['sql'] for query in context.captured_queries if 'COUNT(' in query['sql']])
+
+    def test_filtered_count_is_exact(self):
+        UserAnswer.objects.filter(user_quiz__email='participant0@example.com').delete()
+
+        with mock.patch('app.admin.EXACT_COUNT_LIMIT', 1):
+            self.assertEqual(self.changelist('useranswer').result_count, 3)
+            self.assertEqual(self.changelist('useranswer', q='participant1@example.com').result_count, 1)
+            self.assertEqual(self.changelist('useranswer', q='participant').result_count, 0)
+
+    def test_small_table_count_is_exact(self):
+        UserAnswer.objects.filter(user_quiz__email='participant0@example.com').delete()
+
+        self.assertEqual(self.changelist('useranswer').result_count, 2)
+
+    def test_quiz_search(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Quiz.objects.create(name='Other', time_limit=timedelta(minutes=60), creator=self.quiz.creator)
+
+        cl = self.changelist('quiz', q='oth')
+
+        self.assertEqual(list(cl.result_list), [other])
+
+    def test_useranswer_change_form(self):
+        user_answer = UserAnswer.objects.select_related('user_quiz__user').first()
+
+        response = self.client.get(reverse('admin:app_useranswer_change', args=[user_answer.id]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertContains(response, user_answer.user_quiz.user.email)
+
+
+class QueryPlanTest(TestCase):
+    """Every query behind the hot endpoints has to be served by an index, never by a full table scan."""
+
+    def setUp(self):
+        self.creator = User.objects.create_user(
+            username='creator', password='password', user_type=User.UserType.CREATOR
+        )
+        self.participant = User.objects.create_user(
+            username='participant', password='password', user_type=User.UserType.PARTICIPANT
+        )
+        self.creator_client = self.get_client(self.creator)
+        self.participant_client = self.get_client(self.participant)
+
+        self.quiz = Quiz.objects.create(name='Quiz', time_limit=timedelta(minutes=60), creator=self.creator)
+        self.question = Question.objects.create(question='Question', quiz=self.quiz)
+        self.answer = PossibleAnswer.objects.create(question=self.question, answer='Yes', is_correct=True)
+        self.user_quiz = UserQuiz.objects.create(
+            user=self.participant, quiz=self.quiz, email='participant@example.com'
+        )
+
+    def get_client(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        return client
+
+    def assertNoFullScans(self, request):
+        with CaptureQueriesContext(connection) as context:
+            response = request()
+
+        self.assertLess(response.status_code, 400, getattr(response, 'data', None))
+
+        for query in context.captured_queries:
+            sql = query['sql']
+            if not sql.startswith(('SELECT', 'UPDATE', 'DELETE')):
+                continue
+
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[-1] for row in cursor.fetchall()]
+
+            # Only SEARCH steps look rows up through an index, "SCAN <table> USING [COVERING] INDEX" still reads all
+            # of it. FTS5 reports index-driven lookups as "SCAN <table> VIRTUAL TABLE INDEX <n>:<constraints>".
+            full_scans = [
+                step
+                for step in plan
+                if step.startswith('SCAN')
+                and step != 'SCAN CONSTANT ROW'
+                and not re.search(r'VIRTUAL TABLE INDEX \d+:\S', step)
+            ]
+            self.assertEqual(full_scans, [], f'Full table scan in {sql}')
+
+    def accept(self):
+        self.participant_client.post(reverse('quiz-accept-invitation', kwargs={'pk': self.quiz.id}))
+
+    def test_quiz_list(self):
+        self.accept()
+
+        self.assertNoFullScans(lambda: self.creator_client.get(reverse('quiz-list') + '?name_contains=quiz'))
+        self.assertNoFullScans(lambda: self.creator_client.get(reverse('quiz-list') + '?search=quiz'))
+        self.assertNoFullScans(lambda: self.participant_client.get(reverse('quiz-list')))
+
+    def test_quiz_list_deep_pages(self):
+        created_at = timezone.now()
+        Quiz.objects.bulk_create(
+            Quiz(
+                name=f'Quiz {i}',
+                time_limit=timedelta(minutes=60),
+                creator=self.creator,
+                created_at=created_at + timedelta(seconds=i),
+            )
+            for i in range(30)
+        )
+
+        plans = []
+        url = reverse('quiz-list') + '?limit=5'
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                response = self.creator_client.get(url)
+            url = response.data['next']
+
+            sql = next(query['sql'] for query in context.captured_queries if 'FROM "app_quiz"' in query['sql'])
+            self.assertNotIn('OFFSET', sql)
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plans.append([row[-1] for row in cursor.fetchall()])
+
+        # the first page has no cursor to seek from, every later one seeks the index the same way
+        self.assertEqual(len(plans), 7)
+        self.assertTrue(all('quiz_creator_created_idx' in ' '.join(plan) for plan in plans), plans)
+        self.assertIn('created_at>?', ' '.join(plans[1]))
+        self.assertEqual([plan for plan in plans[1:] if plan != plans[1]], [])
+
+    def test_invite(self):
+        url = reverse('quiz-invite', kwargs={'quiz_id': self.quiz.id})
+
+        self.assertNoFullScans(lambda: self.creator_client.post(url, {'email': 'a@example.com'}, format='json'))
+
+    def test_bulk_invite(self):
+        url = reverse('quiz-bulk-invite', kwargs={'quiz_id': self.quiz.id})
+        data = {'emails': ['a@example.com', 'participant@example.com']}
+
+        self.assertNoFullScans(lambda: self.creator_client.post(url, data, format='json'))
+
+    def test_accept(self):
+        url = reverse('quiz-accept-invitation', kwargs={'pk': self.quiz.id})
+
+        self.assertNoFullScans(lambda: self.participant_client.post(url))
+
+    def test_retrieve(self):
+        self.accept()
+        url = reverse('user-quiz-detail', kwargs={'pk': self.user_quiz.id})
+
+        self.assertNoFullScans(lambda: self.participant_client.get(url))
+
+    def test_answer_upload(self):
+        self.accept()
+        answer = {'answer': str(self.answer.id), 'is_checked': True}
+
+        self.assertNoFullScans(
+            lambda: self.participant_client.post(
+                reverse('user-answer-upload', kwargs={'pk': self.user_quiz.id}),
+                {'question': str(self.question.id), 'answers': [answer]},
+                format='json',
+            )
+        )
+        self.assertNoFullScans(
+            lambda: self.participant_client.post(
+                reverse('user-answer-batch-upload', kwargs={'pk': self.user_quiz.id}),
+                {'questions': [{'question': str(self.question.id), 'answers': [answer]}]},
+                format='json',
+            )
+        )
+
+    def test_results(self):
+        self.accept()
+        self.participant_client.post(reverse('user-quiz-finish', kwargs={'pk': self.user_quiz.id}))
+
+        self.assertNoFullScans(
+            lambda: self.creator_client.get(reverse('quiz-results', kwargs={'quiz_id': self.quiz.id}))
+        )
+        self.assertNoFullScans(
+            lambda: self.participant_client.get(reverse('user-quiz-result', kwargs={'pk': self.user_quiz.id}))
+        )
+
+    def test_admin_search(self):
+        self.client.force_login(User.objects.create_superuser(username='admin', email='admin@example.com'))
+        UserAnswer.objects.create(user_quiz=self.user_quiz, question=self.question, answer=self.answer)
+        OutboxEmail.objects.create(to_email='participant@example.com', subject='Invitation', body='Invitation')
+
+        for name in ('user', 'userquiz', 'useranswer', 'outboxemail'):
+            url = reverse(f'admin:app_{name}_changelist')
+            self.assertNoFullScans(lambda: self.client.get(url, {'q': 'participant@example.com'}))
+        self.assertNoFullScans(lambda: self.client.get(reverse('admin:app_quiz_changelist'), {'q': 'quiz'}))
+
+
+class QuizSearchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='creator', password='password', user_type=User.UserType.CREATOR)
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def create_quiz(self, name, *questions):
+        data = {
+            'name': name,
+            'time_limit': '01:00:00',
+            'questions': [
+                {'question': question, 'possible_answers': [{'answer': 'Yes', 'is_correct': True}]}
+                for question in questions
+            ],
+        }
+        return self.client.post(reverse('quiz-list'), data, format='json').data['id']
+
+    def search(self, query):
+        response = self.client.get(reverse('quiz-list'), {'search': query})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [quiz['name'] for quiz in response.data['results']]
+
+    def test_search_ranks_names_above_questions(self):
+        self.create_quiz('General knowledge', 'What is the capital of Poland?')
+        self.create_quiz('Capitals of Europe', 'Which city is bigger?')
+        self.create_quiz('Maths', 'How much is 2 + 2?')
+
+        self.assertEqual(self.search('capital'), ['Capitals of Europe', 'General knowledge'])
+        self.assertEqual(self.search('capital poland'), ['General knowledge'])
+        self.assertEqual(self.search('"*'), [])
+
+    def test_search_only_own_quizzes(self):
+        self.create_quiz('History')
+        other = User.objects.create_user(username='other', password='password', user_type=User.UserType.CREATOR)
+        Quiz.objects.create(name='History of art', time_limit=timedelta(minutes=10), creator=other)
+
+        self.assertEqual(self.search('history'), ['History'])
+
+    def test_search_follows_changes(self):
+        quiz = Quiz.objects.get(id=self.create_quiz('History', 'Who built the pyramids?'))
+        with self.captureOnCommitCallbacks(execute=True):
+            question = Question.objects.create(question='When did Rome fall?', quiz=quiz)
+
+        self.assertEqual(self.search('rome'), ['History'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            question.delete()
+            quiz.name = 'Geography'
+            quiz.save()
+
+        self.assertEqual(self.search('rome'), [])
+        self.assertEqual(self.search('history'), [])
+        self.assertEqual(self.search('geography pyramids'), ['Geography'])
+
+        quiz.delete()
+
+        self.assertEqual(self.search('geography'), [])
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM app_quiz_search WHERE app_quiz_search MATCH 'geography'")
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_reindexed_once_per_transaction(self):
+        quiz = Quiz.objects.get(id=self.create_quiz('History'))
+
+        with mock.patch.object(QuizSearchService, 'index_quizzes', wraps=QuizSearchService.index_quizzes) as index:
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(5):
+                    Question.objects.create(question=f'Question {i}', quiz=quiz)
+                quiz.save()
+
+        index.assert_called_once_with([quiz.id])
+        self.assertEqual(self.search('question'), ['History'])
+
+    def test_search_pagination(self):
+        for i in range(5):
+            self.create_quiz(f'Quiz {i}', *['quiz'] * i)
+
+        names = []
+        url = reverse('quiz-list') + '?search=quiz&limit=2'
+        while url:
+            response = self.client.get(url)
+            names.extend(quiz['name'] for quiz in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(sorted(names), [f'Quiz {i}' for i in range(5)])
+
+
+class ApiBenchmarkTest(TestCase):
+    # Per request SQL budgets, they must not depend on quiz, invitation or answer volumes
+    QUERY_BUDGETS = {
+        'create quiz': 11,
+        'invite': 13,
+        'bulk invite': 9,
+        'accept': 14,  # 4 once the quiz version is snapshotted, the first accept stores the snapshot
+        'retrieve user quiz': 1,
+        'list quizes (participant)': 2,
+        'answer': 32,
+        'answer batch': 9,
+        'progress': 1,
+        'quiz progress': 2,
+        'finish': 8,  # grades the attempt
+        'participant result': 1,
+        'quiz results': 2,
+        'quiz analytics': 3,
+        'list quizes (creator)': 3,
+        'list quizes (deep page)': 3,
+        'search quizes': 3,
+    }
+
+    def run_benchmark(self, **volumes):
+        return {name: max(stats.queries) for name, stats in ApiBenchmark(**volumes).run().items()}
+
+    def test_query_budgets(self):
+        small = self.run_benchmark(quizzes=2, questions=2, participants=2)
+        large = self.run_benchmark(quizzes=3, questions=20, participants=6)
+
+        self.assertEqual(small, self.QUERY_BUDGETS)
+        self.assertEqual(large, self.QUERY_BUDGETS)
+
+
+class RequestMetricsMiddlewareTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        user = User.objects.create_user(username='creator', password='password', user_type=User.UserType.CREATOR)
+        token = Token.objects.create(user=user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_server_timing(self):
+        response = self.client.get(reverse('quiz-list'))
+
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", total;dur=[\d.]+$')
+
+    @override_settings(METRICS_ALLOWED_IPS=['127.0.0.1'])
+    def test_metrics(self):
+        self.client.get(reverse('quiz-list'))
+
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = response.content.decode()
+        self.assertIn('http_requests_total{method="GET",route="api/quizes",status="200"}', content)
+        self.assertIn('http_request_sql_queries_bucket{method="GET",route="api/quizes",le="+Inf"}', content)
+
+    def test_metrics_are_not_public(self):
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        staff = User.objects.create_user(username='staff', password='password', is_staff=True)
+        self.client.force_login(staff)
+
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_200_OK)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD=0)
+    def test_slow_request_is_logged(self):
+        with self.assertLogs('app.middleware', 'WARNING') as logs:
+            self.client.get(reverse('quiz-list'))
+
+        self.assertIn('Slow request GET /api/quizes', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    def test_slow_query_is_truncated(self):
+        sql = f'SELECT * FROM app_quiz WHERE id IN ({", ".join(["%s"] * 1000)})'
+
+        line = RequestMetricsMiddleware.format_query(0.5, sql, 1000)
+
+        self.assertEqual(line, f'0.5000s {sql[:SLOW_REQUEST_SQL_LOGGED_CHARS]}... ({len(sql)} chars) [1000 params]')
+
+
+class CachedTokenAuthenticationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='creator', password='password', user_type=User.UserType.CREATOR)
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def test_token_lookup_is_cached(self):
+        self.client.get(reverse('quiz-list'))
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('quiz-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('authtoken_token' in query['sql'] for query in context.captured_queries))
+
+    def test_deleted_token_is_evicted(self):
+        self.client.get(reverse('quiz-list'))
+        self.token.delete()
+
+        response = self.client.get(reverse('quiz-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_evicted(self):
+        self.client.get(reverse('quiz-list'))
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(reverse('quiz-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_AUTH_CACHE={'MAX_SIZE': 10, 'TTL': 60, 'CACHE_ALIAS': 'default'})
+    def test_shared_cache(self):
+        self.client.get(reverse('quiz-list'))
+        CachedTokenAuthentication.local_cache.clear()
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(reverse('quiz-list'))
+
+        self.assertFalse(any('authtoken_token' in query['sql'] for query in context.captured_queries))
+
+        self.token.delete()
+
+        self.assertEqual(self.client.get(reverse('quiz-list')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AttemptDeadlineTest(TestCase):
+    def setUp(self):
+        creator = User.objects.create_user(username='creator', password='password', user_type=User.UserType.CREATOR)
+        participant = User.objects.create_user(
+            username='participant', password='password', user_type=User.UserType.PARTICIPANT
+        )
+        token = Token.objects.create(user=participant)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.quiz = Quiz.objects.create(name='Quiz', time_limit=timedelta(minutes=30), creator=creator)
+        self.question = Question.objects.create(question='Question', quiz=self.quiz)
+        self.answer = PossibleAnswer.objects.create(question=self.question, answer='Yes', is_correct=True)
+        self.user_quiz = UserQuiz.objects.create(user=participant, quiz=self.quiz, email='participant@example.com')
+
+    def accept(self):
+        response = self.client.post(reverse('quiz-accept-invitation', kwargs={'pk': self.quiz.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user_quiz.refresh_from_db()
+
+    def expire(self):
+        UserQuiz.objects.filter(id=self.user_quiz.id).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    def retrieve(self):
+        return self.client.get(reverse('user-quiz-detail', kwargs={'pk': self.user_quiz.id}))
+
+    def upload_answer(self):
+        return self.client.post(
+            reverse('user-answer-upload', kwargs={'pk': self.user_quiz.id}),
+            {'question': str(self.question.id), 'answers': [{'answer': str(self.answer.id), 'is_checked': True}]},
+            format='json',
+        )
+
+    def test_accept_sets_expires_at(self):
+        self.accept()
+
+        self.assertEqual(self.user_quiz.expires_at, self.user_quiz.started_at + self.quiz.time_limit)
+
+    def test_active_attempt(self):
+        self.accept()
+
+        self.assertEqual(self.retrieve().status_code, status.HTTP_200_OK)
+        self.assertEqual(self.upload_answer().status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(self.client.get(reverse('quiz-list')).data['results']), 1)
+
+    def test_expired_attempt(self):
+        self.accept()
+        self.expire()
+
+        self.assertEqual(self.retrieve().status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.upload_answer().status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(len(self.client.get(reverse('quiz-list')).data['results']), 0)
+        self.assertEqual(UserAnswer.objects.count(), 0)
+
+
+class ResultsPipelineTest(TestCase):
+    def setUp(self):
+        creator = User.objects.create_user(username='creator', password='password', user_type=User.UserType.CREATOR)
+        self.participant = User.objects.create_user(
+            username='participant', password='password', user_type=User.UserType.PARTICIPANT
+        )
+        token = Token.objects.create(user=self.participant)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.quiz = Quiz.objects.create(name='Quiz', time_limit=timedelta(minutes=30), creator=creator)
+        question = Question.objects.create(question='Question', quiz=self.quiz)
+        self.correct = PossibleAnswer.objects.create(question=question, answer='Yes', is_correct=True)
+        PossibleAnswer.objects.create(question=question, answer='No', is_correct=False)
+
+    def create_user_quiz(self, email, expires_in, **kwargs):
+        started_at = timezone.now() - timedelta(minutes=10)
+        return UserQuiz.objects.create(
+            user=self.participant,
+            quiz=self.quiz,
+            email=email,
+            started_at=started_at,
+            expires_at=timezone.now() + expires_in,
+            **kwargs,
+        )
+
+    def finish(self, user_quiz):
+        return self.client.post(reverse('user-quiz-finish', kwargs={'pk': user_quiz.id}))
+
+    def test_finish(self):
+        user_quiz = self.create_user_quiz('participant@example.com', timedelta(minutes=20))
+
+        response = self.finish(user_quiz)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user_quiz.refresh_from_db()
+        self.assertEqual(user_quiz.finished_at, response.data['finished_at'])
+        self.assertEqual(self.finish(user_quiz).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_finish_expired_attempt(self):
+        user_quiz = self.create_user_quiz('participant@example.com', -timedelta(minutes=1))
+
+        self.assertEqual(self.finish(user_quiz).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_send_results(self):
+        finished = self.create_user_quiz('a@example.com', timedelta(minutes=20), finished_at=timezone.now())
+        UserAnswer.objects.create(
+            user_quiz=finished, question=self.correct.question, answer=self.correct, is_checked=True
+        )
+        expired = self.create_user_quiz('b@example.com', -timedelta(minutes=1))
+        active = self.create_user_quiz('c@example.com', timedelta(minutes=20))
+        self.create_user_quiz('d@example.com', timedelta(minutes=20), finished_at=timezone.now(), results_sent=True)
+
+        call_command('send_results', '--chunk-size=1', stdout=StringIO())
+
+        expired.refresh_from_db()
+        self.assertEqual(expired.finished_at, expired.expires_at)
+        self.assertEqual(UserQuiz.objects.get(id=active.id).finished_at, None)
+        self.assertEqual(UserQuiz.objects.filter(results_sent=True).count(), 3)
+        self.assertEqual(UserQuizResult.objects.get(user_quiz=finished).score, 1)
+
+        call_command('send_emails', '--once', stdout=StringIO())
+
+        bodies = {message.to[0]: message.body for message in mail.outbox}
+        self.assertEqual(sorted(bodies), ['a@example.com', 'b@example.com'])
+        self.assertIn('Quiz: 1/1', bodies['a@example.com'])
+        self.assertIn('Quiz: 0/1', bodies['b@example.com'])
+
+    def test_send_results_query_count_is_constant_per_chunk(self):
+        for i in range(20):
+            self.create_user_quiz(f'{i}@example.com', timedelta(minutes=20), finished_at=timezone.now())
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command('send_results', '--chunk-size=10', stdout=StringIO())
+        small_chunks = len(queries)
+        UserQuiz.objects.update(results_sent=False)
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command('send_results', '--chunk-size=20', stdout=StringIO())
+
+        self.assertEqual(UserQuiz.objects.filter(results_sent=False).count(), 0)
+        self.assertLess(len(queries), small_chunks)
+
+
+class QuizProgressTest(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user(
+            username='creator', password='password', user_type=User.UserType.CREATOR
+        )
+        participant = User.objects.create_user(
+            username='participant', password='password', user_type=User.UserType.PARTICIPANT
+        )
+        token = Token.objects.create(user=participant)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.quiz = Quiz.objects.create(name='Quiz', time_limit=timedelta(minutes=30), creator=self.creator)
+        self.questions = [Question.objects.create(question=f'Question {i}', quiz=self.quiz) for i in range(3)]
+        self.answers = [
+            [
+                PossibleAnswer.objects.create(question=question, answer=answer, is_correct=answer == 'Yes')
+                for answer in ('Yes', 'No')
+            ]
+            for question in self.questions
+        ]
+        started_at = timezone.now()
+        self.user_quiz = UserQuiz.objects.create(
+            user=participant,
+            quiz=self.quiz,
+            email='participant@example.com',
+            started_at=started_at,
+            expires_at=started_at + self.quiz.time_limit,
+        )
+
+    def upload(self, *questions):
+        self.client.post(
+            reverse('user-answer-batch-upload', kwargs={'pk': self.user_quiz.id}),
+            {
+                'questions': [
+                    {
+                        'question': str(self.questions[i].id),
+                        'answers': [{'answer': str(answer.id), 'is_checked': True} for answer in self.answers[i]],
+                    }
+                    for i in questions
+                ]
+            },
+            format='json',
+        )
+
+    def progress(self):
+        return self.client.get(reverse('user-quiz-progress', kwargs={'pk': self.user_quiz.id}))
+
+    def test_progress_counts_each_question_once(self):
+        self.upload(0)
+        self.upload(0, 1)
+        self.client.post(
+            reverse('user-answer-upload', kwargs={'pk': self.user_quiz.id}),
+            {'question': str(self.questions[1].id), 'answers': [{'answer': str(self.answers[1][0].id)}]},
+            format='json',
+        )
+
+        response = self.progress()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['questions_answered'], 2)
+        self.assertEqual(response.data['question_count'], 3)
+        self.assertIsNotNone(response.data['last_activity_at'])
+
+    def test_progress_is_read_from_counters(self):
+        self.upload(0, 1, 2)
+        self.progress()
+
+        # the token is cached, a single query reads the counters and the question count
+        with self.assertNumQueries(1):
+            self.progress()
+
+    def test_creator_progress(self):
+        self.upload(2)
+        token = Token.objects.create(user=self.creator)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        response = client.get(reverse('quiz-progress', kwargs={'quiz_id': self.quiz.id}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['email'], 'participant@example.com')
+        self.assertEqual(response.data[0]['questions_answered'], 1)
+        self.assertEqual(self.progress().status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            client.get(reverse('user-quiz-progress', kwargs={'pk': self.user_quiz.id})).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+
+class TimeOrderedIdTest(TestCase):
+    def test_uuid7(self):
+        ids = []
+        for _ in range(3):
+            ids.append(uuid7())
+            time.sleep(0.002)
+
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual({(id.version, id.variant) for id in ids}, {(7, uuid.RFC_4122)})
+        self.assertNotEqual(uuid7(), uuid7())
+
+    def test_generate_id_setting(self):
+        with override_settings(TIME_ORDERED_IDS=False):
+            self.assertEqual(generate_id().version, 4)
+
+        with override_settings(TIME_ORDERED_IDS=True):
+            self.assertEqual(generate_id().version, 7)
+            self.assertEqual(User.objects.create_user(username='user', password='password').id.version, 7)
+
+    def test_benchmark_ids(self):
+        out = StringIO()
+
+        call_command('benchmark_ids', '--rows=300', '--batch-size=100', '--report-every=200', stdout=out)
+
+        self.assertIn('uuid4: 300 rows in', out.getvalue())
+        self.assertIn('uuid7: 300 rows in', out.getvalue())
+        self.assertNotIn('benchmark_ids_uuid7', connection.introspection.table_names())
+
+
+@override_settings(REPLICA_DATABASE='replica')
+class ReplicaRoutingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def route(self, method, write=False, **headers):
+        """Run a request through the middleware, returning the alias its reads went to."""
+        aliases = []
+
+        def view(request):
+            aliases.append(router.db_for_read(Quiz))
+            if write:
+                router.db_for_write(Quiz)
+                aliases.append(router.db_for_read(Quiz))
+            return HttpResponse()
+
+        ReplicaRoutingMiddleware(view)(getattr(self.factory, method)('/', **headers))
+        return aliases
+
+    def test_reads_of_read_only_requests_go_to_the_replica(self):
+        self.assertEqual(self.route('get'), ['replica'])
+        self.assertEqual(self.route('post'), ['default'])
+
+    def test_reads_after_a_write_go_to_the_primary(self):
+        self.assertEqual(self.route('get', write=True), ['replica', 'default'])
+
+    def test_read_your_writes(self):
+        self.route('post', write=True, HTTP_AUTHORIZATION='Token writer')
+
+        self.assertEqual(self.route('get', HTTP_AUTHORIZATION='Token writer'), ['default'])
+        self.assertEqual(self.route('get', HTTP_AUTHORIZATION='Token other'), ['replica'])
+
+    def test_outside_of_requests_everything_goes_to_the_primary(self):
+        self.assertEqual(router.db_for_read(Quiz), 'default')
+
+    @override_settings(REPLICA_DATABASE=None)
+    def test_without_replica(self):
+        self.assertEqual(self.route('get'), ['default'])
+
+
+@override_settings(REPLICA_DATABASE='replica')
+class ReplicaDatabaseTest(TransactionTestCase):
+    """
+    Requests against a replica in a database file of its own, replicated by copying the primary over it. Copying
+    needs the primary's data committed, hence a TransactionTestCase.
+    """
+
+    def setUp(self):
+        cache.clear()
+        with tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False) as replica_file:
+            self.replica_path = replica_file.name
+        connections.settings['replica'] = {**connections.settings['default'], 'NAME': self.replica_path}
+        self.addCleanup(os.remove, self.replica_path)
+        self.addCleanup(connections.settings.pop, 'replica')
+        self.addCleanup(self.close_replica)
+
+        user = User.objects.create_user(username='creator', password='password', user_type=User.UserType.CREATOR)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        self.replicate()
+
+    def close_replica(self):
+        connections['replica'].close()
+        del connections['replica']
+
+    def replicate(self):
+        connection.ensure_connection()
+        with closing(sqlite3.connect(self.replica_path)) as replica:
+            connection.connection.backup(replica)
+
+    def quiz_names(self):
+        return [quiz['name'] for quiz in self.client.get(reverse('quiz-list')).data['results']]
+
+    def test_read_your_writes(self):
+        response = self.client.post(
+            reverse('quiz-list'), {'name': 'Quiz', 'time_limit': '01:00:00', 'questions': []}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self.quiz_names(), ['Quiz'])
+
+        # without the sticky flag, e.g. in a process that doesn't share the cache, reads see the replica lag
+        cache.clear()
+        self.assertEqual(self.quiz_names(), [])
+
+        self.replicate()
+        self.assertEqual(self.quiz_names(), ['Quiz'])
+
+
+class ReplicaStickyCacheCheckTest(TestCase):
+    @override_settings(REPLICA_DATABASE='replica')
+    def test_process_local_cache(self):
+        self.assertEqual([warning.id for warning in check_replica_sticky_cache(None)], ['app.W001'])
+
+    @override_settings(
+        REPLICA_DATABASE='replica',
+        REPLICA_STICKY_CACHE_ALIAS='shared',
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'shared': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache'},
+        },
+    )
+    def test_shared_cache(self):
+        self.assertEqual(check_replica_sticky_cache(None), [])
+
+    def test_without_replica(self):
+        self.assertEqual(check_replica_sticky_cache(None), [])
+
+
+class AsyncParticipantViewTest(TestCase):
+    def setUp(self):
+        creator = User.objects.create_user(username='creator', password='password', user_type=User.UserType.CREATOR)
+        participant = User.objects.create_user(
+            username='participant', password='password', user_type=User.UserType.PARTICIPANT
+        )
+        self.token = Token.objects.create(user=participant)
+
+        self.quiz = Quiz.objects.create(name='Quiz', time_limit=timedelta(minutes=30), creator=creator)
+        self.question = Question.objects.create(question='Question', quiz=self.quiz)
+        self.answers = [
+            PossibleAnswer.objects.create(question=self.question, answer='Yes', is_correct=True),
+            PossibleAnswer.objects.create(question=self.question, answer='No', is_correct=False),
+        ]
+        UserQuiz.objects.create(user=participant, quiz=self.quiz, email='participant@example.com')
+
+    async def test_participant_flow(self):
+        client = AsyncClient()
+        headers = {'authorization': f'Token {self.token.key}'}
+
+        response = await client.post(reverse('quiz-accept-invitation', kwargs={'pk': self.quiz.id}), headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user_quiz_id = response.json()['user_quiz_id']
+
+        response = await client.get(reverse('user-quiz-detail', kwargs={'pk': user_quiz_id}), headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['quiz']['questions'][0]['id'], str(self.question.id))
+
+        response = await client.post(
+            reverse('user-answer-batch-upload', kwargs={'pk': user_quiz_id}),
+            {
+                'questions': [
+                    {
+                        'question': str(self.question.id),
+                        'answers': [
+                            {'answer': str(answer.id), 'is_checked': answer.is_correct} for answer in self.answers
+                        ],
+                    }
+                ]
+            },
+            content_type='application/json',
+            headers=headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(await UserAnswer.objects.filter(user_quiz_id=user_quiz_id).acount(), 2)
+
+        # queries of the async ORM are measured too
+        queries = int(re.search(r'desc="(\d+) queries"', response['Server-Timing']).group(1))
+        self.assertGreater(queries, 0)
+
+    def invite_to_quizzes(self, count):
+        user_quiz = UserQuiz.objects.select_related('user').get(quiz=self.quiz)
+        quizzes = []
+        for i in range(count):
+            quiz = Quiz.objects.create(name=f'Quiz {i}', time_limit=timedelta(minutes=30), creator=self.quiz.creator)
+            question = Question.objects.create(question='Question', quiz=quiz)
+            PossibleAnswer.objects.create(question=question, answer='Yes', is_correct=True)
+            PossibleAnswer.objects.create(question=question, answer='No', is_correct=False)
+            UserQuiz.objects.create(user=user_quiz.user, quiz=quiz, email=user_quiz.email)
+            quizzes.append(quiz)
+
+        return quizzes
+
+    async def test_concurrent_requests_count_their_own_queries(self):
+        client = AsyncClient()
+        headers = {'authorization': f'Token {self.token.key}'}
+        quizzes = await sync_to_async(self.invite_to_quizzes)(6)
+        response = await client.post(reverse('quiz-accept-invitation', kwargs={'pk': self.quiz.id}), headers=headers)
+        user_quiz_id = response.json()['user_quiz_id']
+
+        def accept(quiz):
+            return client.post(reverse('quiz-accept-invitation', kwargs={'pk': quiz.id}), headers=headers)
+
+        requests = {
+            'retrieve': lambda: client.get(reverse('user-quiz-detail', kwargs={'pk': user_quiz_id}), headers=headers),
+            'progress': lambda: client.get(
+                reverse('user-quiz-progress', kwargs={'pk': user_quiz_id}), headers=headers
+            ),
+            'unauthenticated': lambda: client.get(reverse('user-quiz-detail', kwargs={'pk': user_quiz_id})),
+        }
+
+        def query_count(response):
+            return int(re.search(r'desc="(\d+) queries"', response['Server-Timing']).group(1))
+
+        expected = {name: query_count(await request()) for name, request in requests.items()}
+        expected['accept'] = query_count(await accept(quizzes[0]))
+        self.assertGreater(expected['accept'], expected['retrieve'])
+        self.assertEqual(expected['unauthenticated'], 0)
+
+        # The accepts start after the short requests and are held halfway until those finished, so requests that
+        # are done leave the connection while others still run queries on it
+        release = asyncio.Event()
+        aget_or_create = SnapshotService.aget_or_create
+
+        async def held(quiz):
+            await release.wait()
+            return await aget_or_create(quiz)
+
+        with mock.patch.object(SnapshotService, 'aget_or_create', held):
+            short = asyncio.gather(*(request() for request in requests.values()))
+            accepts = asyncio.gather(*(accept(quiz) for quiz in quizzes[1:]))
+            short_responses = await short
+            release.set()
+            accept_responses = await accepts
+
+        self.assertEqual([query_count(response) for response in short_responses], [expected[name] for name in requests])
+        self.assertEqual([query_count(response) for response in accept_responses], [expected['accept']] * 5)
+
+    async def test_unauthenticated(self):
+        response = await AsyncClient().post(reverse('quiz-accept-invitation', kwargs={'pk': self.quiz.id}))
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user(
+            username='creator', password='password', user_type=User.UserType.CREATOR
+        )
+        participant = User.objects.create_user(
+            username='participant', password='password', user_type=User.UserType.PARTICIPANT
+        )
+        self.quiz = Quiz.objects.create(name='Quiz', time_limit=timedelta(minutes=30), creator=self.creator)
+        question = Question.objects.create(question='Question', quiz=self.quiz)
+        PossibleAnswer.objects.create(question=question, answer='Yes', is_correct=True)
+        started_at = timezone.now()
+        self.user_quiz = UserQuiz.objects.create(
+            user=participant,
+            quiz=self.quiz,
+            email='participant@example.com',
+            started_at=started_at,
+            expires_at=started_at + self.quiz.time_limit,
+        )
+
+        self.client = self.get_client(participant)
+
+    def get_client(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        return client
+
+    def test_retrieve_not_modified(self):
+        url = reverse('user-quiz-detail', kwargs={'pk': self.user_quiz.id})
+        etag = self.client.get(url)['ETag']
+
+        # the token is cached, only the attempt is looked up
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        # the attempt keeps the snapshot it started on
+        QuizVersionService.invalidate(self.quiz.id)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_not_modified(self):
+        client = self.get_client(self.creator)
+        url = reverse('quiz-list')
+        response = client.get(url)
+        etag = response['ETag']
+
+        # the token is cached, only the page of quizzes is read, without questions and answers
+        with self.assertNumQueries(1):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIn('private', response['Cache-Control'])
+
+        Quiz.objects.create(name='Other', time_limit=timedelta(minutes=30), creator=self.creator)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_list_etag_depends_on_user_type(self):
+        url = reverse('quiz-list')
+        etag = self.get_client(self.creator).get(url)['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+class FastSerializationTest(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user(
+            username='creator', password='password', user_type=User.UserType.CREATOR
+        )
+        self.quizzes = [
+            Quiz.objects.create(name=name, time_limit=time_limit, creator=self.creator)
+            for name, time_limit in [
+                ('Zażółć gęślą jaźń', timedelta(minutes=30)),
+                ('Line\u2028separator "quoted" \\ \t', timedelta(days=1, seconds=5, microseconds=7)),
+                ('Empty', timedelta(0)),
+            ]
+        ]
+        for quiz in self.quizzes[:2]:
+            for i in range(5):
+                question = Question.objects.create(question=f'{quiz.name} {i} ✓', quiz=quiz)
+                for j in range(3):
+                    PossibleAnswer.objects.create(question=question, answer=f'Answer {j} 🙂', is_correct=j == i % 3)
+
+    def nested_payload(self, serializer_class, quizzes):
+        # The generic serializer walk over prefetched models, rendered by the stock JSONRenderer.
+        prefetch_related_objects(quizzes, 'questions__possible_answers')
+        serializer = serializer_class()
+        return JSONRenderer().render([serializer.nested_representation(quiz) for quiz in quizzes])
+
+    def test_output_is_byte_identical(self):
+        for serializer_class in (CreatorQuizSerializer, ParticipantQuizSerializer):
+            quizzes = list(Quiz.objects.order_by('created_at'))
+
+            with self.assertNumQueries(2):
+                fast = FastJSONRenderer().render(serializer_class(quizzes, many=True).data)
+
+            self.assertEqual(fast, self.nested_payload(serializer_class, list(Quiz.objects.order_by('created_at'))))
+            self.assertIn(b'\\u2028', fast)
+
+    def test_single_quiz(self):
+        quiz = Quiz.objects.get(id=self.quizzes[0].id)
+
+        self.assertEqual(
+            FastJSONRenderer().render([ParticipantQuizSerializer(quiz).data]),
+            self.nested_payload(ParticipantQuizSerializer, [quiz]),
+        )
+
+        empty = Quiz.objects.get(id=self.quizzes[2].id)
+        with self.assertNumQueries(1):
+            self.assertEqual(CreatorQuizSerializer(empty).data['questions'], [])
+
+    def test_renderer_matches_json_renderer(self):
+        data = {
+            'id': uuid.uuid4(),
+            'at': timezone.now(),
+            'limit': timedelta(minutes=5),
+            'text': 'a b\x00"',
+            'nested': [None, True, 2**70, {'key': 'value'}],
+            1: 'non-string key',
+        }
+
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class QuizSnapshotTest(TestCase):
+    def setUp(self):
+        creator = User.objects.create_user(username='creator', password='password', user_type=User.UserType.CREATOR)
+        self.quiz = Quiz.objects.create(name='Quiz', time_limit=timedelta(minutes=30), creator=creator)
+        self.question = Question.objects.create(question='Question', quiz=self.quiz)
+        self.right = PossibleAnswer.objects.create(question=self.question, answer='Right', is_correct=True)
+        self.wrong = PossibleAnswer.objects.create(question=self.question, answer='Wrong', is_correct=False)
+
+    def participant(self, email):
+        user = User.objects.create_user(username=email, email=email, user_type=User.UserType.PARTICIPANT)
+        user_quiz = UserQuiz.objects.create(user=user, quiz=self.quiz, email=email)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        return client, user_quiz
+
+    def accept(self, client):
+        response = client.post(reverse('quiz-accept-invitation', kwargs={'pk': self.quiz.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return UserQuiz.objects.select_related('snapshot').get(id=response.data['user_quiz_id'])
+
+    def edit(self):
+        self.right.is_correct = False
+        self.right.save()
+        self.wrong.is_correct = True
+        self.wrong.save()
+        QuizVersionService.invalidate(self.quiz.id)
+
+    def test_snapshot_outlives_cleanup(self):
+        user_quiz = self.accept(self.participant('first@example.com')[0])
+
+        with self.assertRaises(RestrictedError):
+            user_quiz.snapshot.delete()
+        self.assertTrue(UserQuiz.objects.filter(id=user_quiz.id, snapshot__isnull=False).exists())
+
+        # deleting the quiz takes its attempts and snapshots along
+        self.quiz.delete()
+        self.assertFalse(QuizSnapshot.objects.exists())
+
+    def test_attempts_of_one_version_share_a_snapshot(self):
+        first = self.accept(self.participant('first@example.com')[0])
+        second = self.accept(self.participant('second@example.com')[0])
+
+        self.assertEqual(first.snapshot_id, second.snapshot_id)
+        self.assertEqual(first.snapshot.answer_key, {str(self.question.id): [str(self.right.id)]})
+        self.assertNotIn('is_correct', str(first.snapshot.content))
+
+        self.edit()
+        third = self.accept(self.participant('third@example.com')[0])
+
+        self.assertNotEqual(third.snapshot_id, first.snapshot_id)
+        self.assertEqual(QuizSnapshot.objects.filter(quiz=self.quiz).count(), 2)
+
+    def test_graded_by_snapshot(self):
+        client, _ = self.participant('participant@example.com')
+        user_quiz = self.accept(client)
+        UserAnswer.objects.create(user_quiz=user_quiz, question=self.question, answer=self.right, is_checked=True)
+
+        self.edit()
+        ScoringService.score_quiz(self.quiz.id)
+
+        self.assertEqual((user_quiz.result.score, user_quiz.result.max_score), (1, 1))
+
+    def test_attempt_without_snapshot(self):
+        client, user_quiz = self.participant('participant@example.com')
+        now = timezone.now()
+        UserQuiz.objects.filter(id=user_quiz.id).update(started_at=now, expires_at=now + self.quiz.time_limit)
+        UserAnswer.objects.create(user_quiz=user_quiz, question=self.question, answer=self.right, is_checked=True)
+
+        # graded by the live quiz until the first read attaches a snapshot of it
+        self.edit()
+        ScoringService.score_quiz(self.quiz.id)
+        self.assertEqual(UserQuizResult.objects.get(user_quiz=user_quiz).score, 0)
+
+        response = client.get(reverse('user-quiz-detail', kwargs={'pk': user_quiz.id}))
+
+        self.assertEqual(response.data['quiz']['questions'][0]['id'], str(self.question.id))
+        self.assertIsNotNone(UserQuiz.objects.get(id=user_quiz.id).snapshot_id)
+
+    def test_participant_reads_follow_snapshot(self):
+        client, _ = self.participant('participant@example.com')
+        user_quiz = self.accept(client)
+
+        added = Question.objects.create(question='Added', quiz=self.quiz)
+        added_answer = PossibleAnswer.objects.create(question=added, answer='Added', is_correct=True)
+        self.quiz.name = 'Renamed'
+        self.quiz.save()
+
+        response = client.get(reverse('quiz-list'))
+        self.assertEqual(response.data['results'], [user_quiz.snapshot.content])
+        self.assertEqual(response.data['results'][0]['name'], 'Quiz')
+
+        response = client.get(reverse('user-quiz-progress', kwargs={'pk': user_quiz.id}))
+        self.assertEqual(response.data['question_count'], 1)
+
+        answers_url = reverse('user-answer-upload', kwargs={'pk': user_quiz.id})
+        answer = {'answer': str(added_answer.id), 'is_checked': True}
+        response = client.post(answers_url, {'question': str(added.id), 'answers': [answer]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = client.post(
+            reverse('user-answer-batch-upload', kwargs={'pk': user_quiz.id}),
+            {'questions': [{'question': str(added.id), 'answers': [answer]}]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        answer = {'answer': str(self.right.id), 'is_checked': True}
+        response = client.post(answers_url, {'question': str(self.question.id), 'answers': [answer]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(UserAnswer.objects.filter(question=added).exists())
+
+
+class QuizAnalyticsTest(TestCase):
+    def setUp(self):
+        self.creator = User.objects.create_user(
+            username='creator', password='password', user_type=User.UserType.CREATOR
+        )
+        self.quiz = Quiz.objects.create(name='Quiz', time_limit=timedelta(minutes=30), creator=self.creator)
+        self.questions = [Question.objects.create(question=f'Question {i}', quiz=self.quiz) for i in range(2)]
+        self.answers = [
+            [
+                PossibleAnswer.objects.create(question=question, answer=answer, is_correct=answer == 'Right')
+                for answer in ('Right', 'Wrong')
+            ]
+            for question in self.questions
+        ]
+        self.url = reverse('quiz-analytics', kwargs={'quiz_id': self.quiz.id})
+
+    def get_client(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.get_or_create(user=user)[0].key}')
+        return client
+
+    def start(self, email):
+        user = User.objects.create_user(username=email, email=email, user_type=User.UserType.PARTICIPANT)
+        UserQuiz.objects.create(user=user, quiz=self.quiz, email=email)
+        client = self.get_client(user)
+        user_quiz_id = client.post(reverse('quiz-accept-invitation', kwargs={'pk': self.quiz.id})).data['user_quiz_id']
+        return client, user_quiz_id
+
+    def upload(self, client, user_quiz_id, question, checked):
+        response = client.post(
+            reverse('user-answer-upload', kwargs={'pk': user_quiz_id}),
+            {
+                'question': str(self.questions[question].id),
+                'answers': [
+                    {'answer': str(answer.id), 'is_checked': answer.answer in checked}
+                    for answer in self.answers[question]
+                ],
+            },
+            format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def analytics(self):
+        response = self.get_client(self.creator).get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_analytics(self):
+        first, first_id = self.start('first@example.com')
+        second, second_id = self.start('second@example.com')
+        self.start('idle@example.com')
+
+        self.upload(first, first_id, 0, {'Right'})
+        self.upload(second, second_id, 0, {'Right', 'Wrong'})
+        # a changed answer moves the counters instead of adding to them
+        self.upload(second, second_id, 0, {'Wrong'})
+        second.post(
+            reverse('user-answer-batch-upload', kwargs={'pk': second_id}),
+            {
+                'questions': [
+                    {
+                        'question': str(self.questions[1].id),
+                        'answers': [{'answer': str(self.answers[1][0].id), 'is_checked': True}],
+                    }
+                ]
+            },
+            format='json',
+        )
+
+        first_question, second_question = self.analytics()
+
+        self.assertEqual((first_question['answered'], first_question['correct']), (2, 1))
+        self.assertEqual(first_question['percent_correct'], 50.0)
+        self.assertIsNotNone(first_question['average_seconds_to_answer'])
+        self.assertEqual(
+            [(answer['selected'], answer['selection_rate']) for answer in first_question['possible_answers']],
+            [(1, 0.5), (1, 0.5)],
+        )
+        self.assertEqual((second_question['answered'], second_question['percent_correct']), (1, 100.0))
+
+    def test_unanswered_quiz(self):
+        question = self.analytics()[0]
+
+        self.assertEqual(question['answered'], 0)
+        self.assertIsNone(question['percent_correct'])
+        self.assertIsNone(question['possible_answers'][0]['selection_rate'])
+
+    def test_query_count_does_not_depend_on_answers(self):
+        client, user_quiz_id = self.start('participant@example.com')
+        self.upload(client, user_quiz_id, 0, {'Right'})
+        creator_client = self.get_client(self.creator)
+        creator_client.get(self.url)
+
+        # quiz lookup, questions with their statistics, possible answers with theirs
+        with self.assertNumQueries(3):
+            creator_client.get(self.url)
+
+    def test_only_creator(self):
+        client, _ = self.start('participant@example.com')
+
+        self.assertEqual(client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+
+def throttle_rates(**rates):
+    rates = {'answers': None, 'invites': None, **rates}
+    return override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates})
+
+
+class ThrottlingTest(TestCase):
+    def setUp(self):
+        # Buckets of this test only, whichever store the settings configure
+        store = mock.patch.object(TokenBucketThrottle, 'store', LocalBucketStore({'MAX_SIZE': 100}))
+        store.start()
+        self.addCleanup(store.stop)
+        self.creator = User.objects.create_user(
+            username='creator', password='password', user_type=User.UserType.CREATOR
+        )
+        self.quiz = Quiz.objects.create(name='Quiz', time_limit=timedelta(minutes=30), creator=self.creator)
+        self.question = Question.objects.create(question='Question', quiz=self.quiz)
+        self.answer = PossibleAnswer.objects.create(question=self.question, answer='Yes', is_correct=True)
+
+    def get_client(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.get_or_create(user=user)[0].key}')
+        return client
+
+    def participant(self, email):
+        user = User.objects.create_user(username=email, email=email, user_type=User.UserType.PARTICIPANT)
+        now = timezone.now()
+        user_quiz = UserQuiz.objects.create(
+            user=user, quiz=self.quiz, email=email, started_at=now, expires_at=now + self.quiz.time_limit
+        )
+        return self.get_client(user), reverse('user-answer-upload', kwargs={'pk': user_quiz.id})
+
+    def upload(self, client, url):
+        data = {'question': str(self.question.id), 'answers': [{'answer': str(self.answer.id), 'is_checked': True}]}
+        return client.post(url, data, format='json')
+
+    @throttle_rates(answers='2/min')
+    def test_answer_uploads_per_token(self):
+        client, url = self.participant('abusive@example.com')
+        statuses = [self.upload(client, url).status_code for _ in range(3)]
+
+        self.assertEqual(statuses, [status.HTTP_201_CREATED] * 2 + [status.HTTP_429_TOO_MANY_REQUESTS])
+        self.assertEqual(self.upload(client, url)['Retry-After'], '30')
+
+        # other clients have buckets of their own
+        self.assertEqual(self.upload(*self.participant('polite@example.com')).status_code, status.HTTP_201_CREATED)
+
+        # a token drips back in every 30 seconds
+        with mock.patch('app.throttling.time.time', return_value=time.time() + 30):
+            self.assertEqual(self.upload(client, url).status_code, status.HTTP_201_CREATED)
+            self.assertEqual(self.upload(client, url).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @throttle_rates(**{'invites.quiz': '3/hour'})
+    def test_invites_per_quiz(self):
+        client = self.get_client(self.creator)
+        other_quiz = Quiz.objects.create(name='Other', time_limit=timedelta(minutes=30), creator=self.creator)
+
+        def invite(quiz, email):
+            return client.post(reverse('quiz-invite', kwargs={'quiz_id': quiz.id}), {'email': email}).status_code
+
+        def bulk_invite(quiz, emails, client=client):
+            url = reverse('quiz-bulk-invite', kwargs={'quiz_id': quiz.id})
+            return client.post(url, {'emails': emails}, format='json').status_code
+
+        # someone else's requests don't reach the quiz's bucket
+        intruder = self.get_client(User.objects.create_user(username='intruder', user_type=User.UserType.CREATOR))
+        self.assertEqual(bulk_invite(self.quiz, ['a@example.com'], intruder), status.HTTP_404_NOT_FOUND)
+
+        # a token per invitation created, invalid and duplicate addresses are free
+        self.assertEqual(invite(self.quiz, 'first@example.com'), status.HTTP_201_CREATED)
+        self.assertEqual(
+            bulk_invite(self.quiz, ['second@example.com', ' second@example.com', 'invalid']), status.HTTP_201_CREATED
+        )
+        # a batch bigger than what is left overdraws the bucket instead of being rejected
+        self.assertEqual(bulk_invite(self.quiz, [f'{i}@example.com' for i in range(5)]), status.HTTP_201_CREATED)
+        self.assertEqual(invite(self.quiz, 'third@example.com'), status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # 1 + 1 + 5 tokens taken from 3, so the debt of 4 is paid off after 80 minutes
+        with mock.patch('app.throttling.time.time', return_value=time.time() + 79 * 60):
+            self.assertEqual(invite(self.quiz, 'third@example.com'), status.HTTP_429_TOO_MANY_REQUESTS)
+        with mock.patch('app.throttling.time.time', return_value=time.time() + 80 * 60):
+            self.assertEqual(invite(self.quiz, 'third@example.com'), status.HTTP_201_CREATED)
+
+        # every quiz has a bucket of its own
+        self.assertEqual(bulk_invite(other_quiz, [f'{i}@example.com' for i in range(10)]), status.HTTP_201_CREATED)
+        self.assertEqual(OutboxEmail.objects.count(), 1 + 1 + 5 + 1 + 10)
+
+    @throttle_rates(answers='1/min')
+    def test_shared_cache_store(self):
+        client, url = self.participant('participant@example.com')
+
+        cache.set('unrelated', 'kept')
+        with mock.patch.object(TokenBucketThrottle, 'store', CacheBucketStore({'CACHE_ALIAS': 'default'})):
+            self.assertEqual(self.upload(client, url).status_code, status.HTTP_201_CREATED)
+            self.assertEqual(self.upload(client, url).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+            # what another process would see
+            TokenBucketThrottle.store = CacheBucketStore({'CACHE_ALIAS': 'default'})
+            self.assertEqual(self.upload(client, url).status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # the buckets share the cache with everything else in it
+        self.assertEqual(cache.get('unrelated'), 'kept')
+
+    def test_local_store_is_bounded(self):
+        store = LocalBucketStore({'MAX_SIZE': 2})
+        for key in ('first', 'second', 'third'):
+            store.take(key, 1, 1, 0)
+
+        self.assertEqual(list(store.buckets), ['second', 'third'])
+        self.assertEqual(store.take('third', 1, 1, 0), 1)
+        self.assertEqual(store.take('first', 1, 1, 0), 0)
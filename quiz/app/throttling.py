@@ -0,0 +1,150 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+CACHE_KEY_PREFIX = 'throttle:'
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """'60/min' -> (60, 1.0): a bucket holding 60 tokens, refilled at a token per second."""
+    if rate is None:
+        return None
+
+    count, period = rate.split('/')
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+class LocalBucketStore:
+    """
+    Buckets of this process in a bounded LRU. A bucket that was dropped starts full again, so eviction can only
+    let a client through early, never hold one back.
+    """
+
+    def __init__(self, options):
+        self.max_size = options['MAX_SIZE']
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, refill_rate, now, count=1, overdraw=False):
+        with self.lock:
+            tokens, updated_at = self.buckets.get(key, (capacity, now))
+            tokens, wait = take_tokens(tokens, updated_at, capacity, refill_rate, now, count, overdraw)
+            self.buckets[key] = (tokens, now)
+            self.buckets.move_to_end(key)
+            while len(self.buckets) > self.max_size:
+                self.buckets.popitem(last=False)
+
+        return wait
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Buckets in a shared Django cache, so every process draws from the same ones. The read and write of a bucket
+    are not atomic: requests racing for its last token may all get through, which a throttle can live with.
+    There is no clear(): the cache holds more than buckets and has no way to drop only these keys.
+    """
+
+    def __init__(self, options):
+        self.cache = caches[options['CACHE_ALIAS']]
+
+    def take(self, key, capacity, refill_rate, now, count=1, overdraw=False):
+        tokens, updated_at = self.cache.get(CACHE_KEY_PREFIX + key, (capacity, now))
+        tokens, wait = take_tokens(tokens, updated_at, capacity, refill_rate, now, count, overdraw)
+        # An untouched bucket is full again once it refilled what it lacks, so it can expire by then.
+        self.cache.set(CACHE_KEY_PREFIX + key, (tokens, now), (capacity - tokens) / refill_rate)
+
+        return wait
+
+
+def take_tokens(tokens, updated_at, capacity, refill_rate, now, count, overdraw=False):
+    """
+    Refill the bucket for the time passed and take count tokens, returning (tokens left, seconds to wait). With
+    overdraw they are taken even when the bucket holds fewer, leaving a debt that later takes wait out.
+    """
+    tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+    if tokens >= count or overdraw:
+        return tokens - count, 0
+
+    return tokens, (count - tokens) / refill_rate
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket per client and scope: bursts up to the rate's count go through, after that requests are let
+    through as fast as the bucket refills. Rates come from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], keyed on
+    the view's throttle_scope. Buckets are kept by the store configured with THROTTLE_BUCKETS.
+    """
+
+    store = import_string(settings.THROTTLE_BUCKETS['STORE'])(settings.THROTTLE_BUCKETS)
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_scope(self, view):
+        return getattr(view, 'throttle_scope', None)
+
+    def get_bucket_key(self, request, view):
+        raise NotImplementedError
+
+    def get_rate(self, view):
+        """(capacity, refill rate) of the view's scope, None when it isn't throttled."""
+        scope = self.get_scope(view)
+        return parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope)) if scope else None
+
+    def allow_request(self, request, view):
+        return self.take(request, view)
+
+    def take(self, request, view, count=1, overdraw=False):
+        """Take count tokens from the client's bucket, False when it holds fewer and overdraw is off (see wait())."""
+        rate = self.get_rate(view)
+        key = self.get_bucket_key(request, view) if rate else None
+        if key is None:
+            return True
+
+        capacity, refill_rate = rate
+        self.wait_seconds = self.store.take(
+            f'{self.get_scope(view)}:{key}', capacity, refill_rate, time.time(), count, overdraw
+        )
+
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class PerTokenThrottle(TokenBucketThrottle):
+    """Bucket per API token, or per client address for anonymous requests."""
+
+    def get_bucket_key(self, request, view):
+        if request.auth is not None:
+            return f'token:{request.auth.key}'
+
+        return f'ip:{self.get_ident(request)}'
+
+
+class PerQuizThrottle(TokenBucketThrottle):
+    """
+    Bucket per quiz of the URL, shared by everyone acting on it. Rates are keyed on '<throttle_scope>.quiz'. Views
+    charge it themselves with take() once they know the quiz is the client's, rather than listing it in
+    throttle_classes, so nobody can drain the bucket of someone else's quiz.
+    """
+
+    def get_scope(self, view):
+        scope = super().get_scope(view)
+        return f'{scope}.quiz' if scope else None
+
+    def get_bucket_key(self, request, view):
+        quiz_id = view.kwargs.get('quiz_id')
+        return f'quiz:{quiz_id}' if quiz_id else None
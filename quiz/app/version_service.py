@@ -0,0 +1,22 @@
+import hashlib
+
+from app.models import Quiz
+from django.utils import timezone
+
+
+class QuizVersionService:
+    """Quiz content versions, bumped on every edit so ETags and snapshots keyed on them never go stale."""
+
+    @classmethod
+    def version(cls, quiz):
+        return quiz.updated_at.timestamp() if quiz.updated_at else 0
+
+    @staticmethod
+    def etag(*parts):
+        """Strong ETag over everything a representation is determined by."""
+        return '"%s"' % hashlib.md5(repr(parts).encode()).hexdigest()
+
+    @classmethod
+    def invalidate(cls, quiz_id):
+        """Bump the content version after questions or answers of the quiz changed."""
+        Quiz.objects.filter(id=quiz_id).update(updated_at=timezone.now())
@@ -1,12 +1,33 @@
+import asyncio
+
+from app.metrics import request_metrics
+from app.renderers import FastJSONRenderer
+from app.scoring_service import ScoringService
+from app.search_service import QuizSearchService
+from app.snapshot_service import SnapshotService
 from app.serializers import (
+    BulkInviteToQuizSerializer,
     CreatorQuizSerializer,
+    InvitationResultSerializer,
     InviteToQuizSerializer,
     ParticipantQuizSerializer,
+    QuestionAnalyticsSerializer,
+    UserAnswerBatchSerializer,
     UserAnswerListSerializer,
+    UserQuizProgressSerializer,
+    UserQuizResultSerializer,
     UserQuizSerializer,
 )
-from django.db.models import F
+from app.throttling import PerQuizThrottle, PerTokenThrottle
+from app.version_service import QuizVersionService
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import OuterRef, Prefetch, Q, Subquery, UUIDField
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, HttpResponseForbidden
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 from django_filters import CharFilter
 from django_filters import rest_framework as filters
 from drf_spectacular.settings import spectacular_settings
@@ -14,9 +35,9 @@ from drf_spectacular.utils import OpenApiParameter, PolymorphicProxySerializer,
 from drf_spectacular.views import AUTHENTICATION_CLASSES
 from rest_framework.exceptions import NotAcceptable, NotFound
 from rest_framework.generics import CreateAPIView, GenericAPIView, ListAPIView, RetrieveAPIView
-from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.renderers import TemplateHTMLRenderer
+from rest_framework.renderers import BrowsableAPIRenderer, TemplateHTMLRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
@@ -45,17 +66,111 @@ class SpectacularElementsView(APIView):
         )
 
 
+class AsyncAPIView(GenericAPIView):
+    """
+    GenericAPIView with async handlers, so under ASGI a request waiting on the database doesn't hold a worker.
+    DRF authentication, permissions and throttling are synchronous and run in a worker thread.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncCreateAPIView(AsyncAPIView):
+    async def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # Transactions can't span async ORM calls, so the serializer writes within a single worker thread call.
+        data = await sync_to_async(self.perform_create)(serializer)
+        return Response(data, status=201)
+
+    def perform_create(self, serializer):
+        serializer.save()
+        return serializer.data
+
+
+def not_modified(request, etag):
+    """304 response when If-None-Match already names the current representation, None otherwise."""
+    etags = {tag.removeprefix('W/') for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))}
+    if etag in etags or '*' in etags:
+        return set_etag(Response(status=304), etag)
+
+    return None
+
+
+def set_etag(response, etag):
+    # Responses depend on who asks, so only the client may keep them and has to revalidate before reuse.
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+
+    return response
+
+
+def metrics_view(request):
+    # Route names, volumes and latencies are internal, only staff and the scrapers in METRICS_ALLOWED_IPS get them
+    if not request.user.is_staff and request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        return HttpResponseForbidden()
+
+    return HttpResponse(request_metrics.render(), content_type='text/plain; version=0.0.4')
+
+
+class QuizCursorPagination(CursorPagination):
+    # keyset pagination, served by the (creator, created_at, id) index without COUNT(*) or OFFSET scans
+    ordering = ('created_at', 'id')
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations:
+            return ('search_rank', 'id')
+
+        return super().get_ordering(request, queryset, view)
+
+
 class QuizFilter(filters.FilterSet):
     name_contains = CharFilter(field_name="name", lookup_expr="icontains")
+    search = CharFilter(method="filter_search")
 
     class Meta:
         model = Quiz
-        fields = ("name_contains",)
+        fields = ("name_contains", "search")
+
+    def filter_search(self, queryset, name, value):
+        return QuizSearchService.search(queryset, value)
 
 
 @extend_schema_view(
     get=extend_schema(
-        parameters=[OpenApiParameter(name='name_contains', description='Name filter', type=str)],
+        parameters=[
+            OpenApiParameter(name='name_contains', description='Name filter', type=str),
+            OpenApiParameter(
+                name='search', description='Full-text search over names and questions, best match first', type=str
+            ),
+        ],
         responses={
             200: PolymorphicProxySerializer(
                 component_name='Person',
@@ -68,8 +183,9 @@ class QuizFilter(filters.FilterSet):
 )
 class QuizListView(CreateAPIView, ListAPIView):
     serializer_class = CreatorQuizSerializer
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
     permission_classes = (IsAuthenticated,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = QuizCursorPagination
     filterset_class = QuizFilter
     filter_backends = (filters.DjangoFilterBackend,)
 
@@ -90,6 +206,48 @@ class QuizListView(CreateAPIView, ListAPIView):
         elif request.method == 'POST' and request.user.user_type != User.UserType.CREATOR:
             return False
 
+    def list(self, request, *args, **kwargs):
+        if request.META.get('HTTP_IF_NONE_MATCH'):
+            # The page's quizzes and their content versions determine the response, so they are checked first
+            # and a client holding the current page is answered without reading their questions.
+            queryset = self.filter_queryset(self.get_queryset())
+            self.paginate_queryset(queryset.only('id', 'created_at', 'updated_at'))
+            if response := not_modified(request, self.page_etag()):
+                return response
+
+        if request.user.user_type == User.UserType.PARTICIPANT:
+            page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+            response = self.get_paginated_response(self.snapshot_representations(page))
+        else:
+            response = super().list(request, *args, **kwargs)
+
+        return set_etag(response, self.page_etag())
+
+    def page_etag(self):
+        return QuizVersionService.etag(
+            self.get_serializer_class().__name__,
+            [(quiz.id, self.content_version(quiz)) for quiz in self.paginator.page],
+            self.paginator.get_next_link(),
+            self.paginator.get_previous_link(),
+        )
+
+    @staticmethod
+    def content_version(quiz):
+        # Participants see the snapshot their attempt started on, which edits of the quiz don't change.
+        return getattr(quiz, 'attempt_snapshot_id', None) or QuizVersionService.version(quiz)
+
+    def snapshot_representations(self, quizzes):
+        """Quizzes as the participant's attempts see them, the live quiz for attempts started before snapshots."""
+        contents = dict(
+            QuizSnapshot.objects.filter(
+                id__in=[quiz.attempt_snapshot_id for quiz in quizzes if quiz.attempt_snapshot_id]
+            ).values_list('id', 'content')
+        )
+        live = [quiz for quiz in quizzes if quiz.attempt_snapshot_id not in contents]
+        representations = dict(zip((quiz.id for quiz in live), self.get_serializer(live, many=True).data))
+
+        return [contents.get(quiz.attempt_snapshot_id) or representations[quiz.id] for quiz in quizzes]
+
     def get_queryset(self):
         qs = Quiz.objects
 
@@ -97,52 +255,154 @@ class QuizListView(CreateAPIView, ListAPIView):
             qs = qs.filter(creator=self.request.user)
 
         elif self.request.user.user_type == User.UserType.PARTICIPANT:
-            now = timezone.now()
-            qs = qs.filter(userquiz__started_at__isnull=False)
-            qs = qs.filter(userquiz__finished_at__isnull=True)
-            qs = qs.filter(userquiz__user=self.request.user)
-            qs = qs.filter(userquiz__started_at__lte=now - F('time_limit'))
-
-        qs = qs.prefetch_related('questions').prefetch_related('questions__possible_answers')
+            attempts = UserQuiz.objects.active().filter(user=self.request.user)
+            snapshot_id = attempts.filter(quiz=OuterRef('pk')).order_by('-started_at').values('snapshot_id')[:1]
+            qs = qs.filter(id__in=attempts.values('quiz_id')).annotate(
+                attempt_snapshot_id=Subquery(snapshot_id, output_field=UUIDField())
+            )
 
+        # Questions and possible answers are read by the serializer's fast path, see QuizTreeSerializerMixin.
         return qs.all()
 
 
-class InviteToQuizView(CreateAPIView):
+class InvitationMixin:
+    """
+    Invitations go to quizzes of the requesting user only. Every invitation sends an email, so the quiz's invites
+    bucket is charged a token per invitation created, after the ownership check: nobody else can drain it. The
+    bucket only has to be out of debt for a request to go through, a batch bigger than what it holds overdraws it
+    and later invitations wait until it refilled.
+    """
+
+    throttle_classes = (PerTokenThrottle,)
+    throttle_scope = 'invites'
+
+    def perform_create(self, serializer):
+        try:
+            quiz = Quiz.objects.get(id=self.kwargs['quiz_id'], creator=self.request.user)
+        except Quiz.DoesNotExist:
+            raise NotFound('Quiz not found')
+
+        throttle = PerQuizThrottle()
+        if not throttle.take(self.request, self, 0):
+            self.throttled(self.request, throttle.wait())
+
+        serializer.save(quiz=quiz)
+        throttle.take(self.request, self, self.invitation_count(serializer.instance), overdraw=True)
+
+
+class InviteToQuizView(InvitationMixin, CreateAPIView):
     serializer_class = InviteToQuizSerializer
     permission_classes = (IsAuthenticated,)
 
-    def post(self, request, quiz_id, *args, **kwargs):
-        request.quiz_id = quiz_id
+    def invitation_count(self, instance):
+        return 1
+
+
+class BulkInviteToQuizView(InvitationMixin, CreateAPIView):
+    serializer_class = BulkInviteToQuizSerializer
+    permission_classes = (IsAuthenticated,)
 
-        return super().post(request, quiz_id, *args, **kwargs)
+    def invitation_count(self, instance):
+        created = (InvitationResultSerializer.Status.INVITED, InvitationResultSerializer.Status.CREATED)
+        return sum(result['status'] in created for result in instance['results'])
 
 
-class RetriveUserQuizView(RetrieveAPIView):
+class QuizResultListView(ListAPIView):
+    serializer_class = UserQuizResultSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = LimitOffsetPagination
+
+    def get_queryset(self):
+        try:
+            quiz = Quiz.objects.get(id=self.kwargs['quiz_id'], creator=self.request.user)
+        except Quiz.DoesNotExist:
+            raise NotFound('Quiz not found')
+
+        # read-only, results are stored when attempts are finished and by send_results
+        return UserQuizResult.objects.filter(user_quiz__quiz=quiz).select_related('user_quiz').order_by('-score')
+
+
+class QuizProgressListView(ListAPIView):
+    serializer_class = UserQuizProgressSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = LimitOffsetPagination
+
+    def get_queryset(self):
+        try:
+            quiz = Quiz.objects.get(id=self.kwargs['quiz_id'], creator=self.request.user)
+        except Quiz.DoesNotExist:
+            raise NotFound('Quiz not found')
+
+        return (
+            UserQuiz.objects.filter(quiz=quiz, started_at__isnull=False)
+            .with_question_count()
+            .order_by('-last_activity_at', 'id')
+        )
+
+
+class QuizAnalyticsListView(ListAPIView):
+    serializer_class = QuestionAnalyticsSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = LimitOffsetPagination
+
+    def get_queryset(self):
+        try:
+            quiz = Quiz.objects.get(id=self.kwargs['quiz_id'], creator=self.request.user)
+        except Quiz.DoesNotExist:
+            raise NotFound('Quiz not found')
+
+        # Statistics are kept up to date by the answer upload path, reading them is a join per level.
+        possible_answers = PossibleAnswer.objects.annotate(selected=Coalesce('stats__selected', 0)).order_by(
+            'created_at', 'id'
+        )
+        return (
+            Question.objects.filter(quiz=quiz)
+            .annotate(
+                answered=Coalesce('stats__answered', 0),
+                correct=Coalesce('stats__correct', 0),
+                answer_seconds=Coalesce('stats__answer_seconds', 0.0),
+            )
+            .prefetch_related(Prefetch('possible_answers', queryset=possible_answers))
+            .order_by('created_at', 'id')
+        )
+
+
+class RetriveUserQuizView(AsyncAPIView):
     serializer_class = UserQuizSerializer
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
     permission_classes = (IsAuthenticated,)
 
     def get_queryset(self):
-        qs = UserQuiz.objects
+        qs = UserQuiz.objects.active()
 
-        now = timezone.now()
-        qs = qs.filter(started_at__isnull=False)
-        qs = qs.filter(finished_at__isnull=True)
         qs = qs.filter(user=self.request.user)
-        qs = qs.annotate(end_time=F('started_at') + F('quiz__time_limit'))
-        qs = qs.filter(end_time__gte=now)
 
-        qs = qs.prefetch_related('quiz__questions').prefetch_related('quiz__questions__possible_answers')
+        qs = qs.select_related('snapshot')
 
         return qs.all()
 
+    async def get(self, request, pk):
+        try:
+            user_quiz = await self.get_queryset().aget(id=pk)
+        except UserQuiz.DoesNotExist:
+            raise NotFound()
+
+        # The attempt sees the quiz as it was when it started, edits made since don't reach it.
+        snapshot = user_quiz.snapshot or await SnapshotService.aattach(user_quiz)
+
+        etag = QuizVersionService.etag(snapshot.id)
+        if response := not_modified(request, etag):
+            return response
+
+        return set_etag(Response({'quiz': snapshot.content}), etag)
+
 
-class ParticipantAcceptInvitation(GenericAPIView):
+class ParticipantAcceptInvitation(AsyncAPIView):
     permission_classes = (IsAuthenticated,)
 
-    def post(self, request, pk):
+    async def post(self, request, pk):
         try:
-            user_quiz = UserQuiz.objects.get(
+            user_quiz = await UserQuiz.objects.select_related('quiz').aget(
                 quiz_id=pk,
                 started_at__isnull=True,
                 finished_at__isnull=True,
@@ -155,14 +415,75 @@ class ParticipantAcceptInvitation(GenericAPIView):
             raise NotAcceptable('You can\'t be invited to same quiz until you finish the first one')
 
         user_quiz.started_at = timezone.now()
-        user_quiz.save()
+        user_quiz.expires_at = user_quiz.started_at + user_quiz.quiz.time_limit
+        user_quiz.snapshot = await SnapshotService.aget_or_create(user_quiz.quiz)
+        await user_quiz.asave()
         return Response({'user_quiz_id': user_quiz.id}, 200)
 
 
-class UploadUserAnswerView(CreateAPIView):
-    serializer_class = UserAnswerListSerializer
+class ParticipantFinishQuiz(GenericAPIView):
     permission_classes = (IsAuthenticated,)
 
     def post(self, request, pk):
+        finished_at = timezone.now()
+        finished = (
+            UserQuiz.objects.active()
+            .filter(id=pk, user=self.request.user)
+            .update(finished_at=finished_at, updated_at=finished_at)
+        )
+        if not finished:
+            raise NotFound('Either not found or already finished')
+
+        # graded once here, answers are no longer accepted so the result is final
+        attempt = UserQuiz.objects.filter(id=pk).values_list('quiz_id', 'snapshot_id').get()
+        ScoringService.store_results({pk: attempt}, finished_at)
+
+        return Response({'user_quiz_id': pk, 'finished_at': finished_at}, 200)
+
+
+class RetriveUserQuizProgressView(RetrieveAPIView):
+    serializer_class = UserQuizProgressSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return UserQuiz.objects.filter(user=self.request.user, started_at__isnull=False).with_question_count()
+
+
+class UploadUserAnswerView(AsyncCreateAPIView):
+    serializer_class = UserAnswerListSerializer
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = (PerTokenThrottle,)
+    throttle_scope = 'answers'
+
+    async def post(self, request, pk):
         request.user_quiz_id = pk
-        return super().post(request, pk)
+        return await super().post(request, pk)
+
+
+class UploadUserAnswerBatchView(AsyncCreateAPIView):
+    serializer_class = UserAnswerBatchSerializer
+    permission_classes = (IsAuthenticated,)
+    throttle_classes = (PerTokenThrottle,)
+    throttle_scope = 'answers'
+
+    async def post(self, request, pk):
+        request.user_quiz_id = pk
+        return await super().post(request, pk)
+
+
+class RetriveUserQuizResultView(RetrieveAPIView):
+    serializer_class = UserQuizResultSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_object(self):
+        # Results are only revealed once the attempt can no longer change. They are stored when the attempt is
+        # finished, attempts that ran out of time get theirs once send_results finishes them.
+        qs = UserQuizResult.objects.select_related('user_quiz').filter(
+            user_quiz__user=self.request.user, user_quiz__started_at__isnull=False
+        )
+        qs = qs.filter(Q(user_quiz__finished_at__isnull=False) | Q(user_quiz__expires_at__lt=timezone.now()))
+
+        try:
+            return qs.get(user_quiz_id=self.kwargs['pk'])
+        except UserQuizResult.DoesNotExist:
+            raise NotFound('Either not found or not graded yet')
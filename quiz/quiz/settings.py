@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 SITE_ID = 1
 
 MIDDLEWARE = [
+    'app.middleware.RequestMetricsMiddleware',
+    'app.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -87,13 +89,41 @@ WSGI_APPLICATION = 'quiz.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Transactions take the write lock when they begin, see app.backends.sqlite3
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'app.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
 
+# Read-only requests read from the replica when REPLICA_DB points at one, e.g. a copy of db.sqlite3 locally
+REPLICA_DATABASE = None
+if os.environ.get('REPLICA_DB'):
+    REPLICA_DATABASE = 'replica'
+    DATABASES[REPLICA_DATABASE] = {
+        'ENGINE': 'app.backends.sqlite3',
+        'NAME': BASE_DIR / os.environ['REPLICA_DB'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['app.routers.ReplicaRouter']
+
+# Clients that wrote read from the primary for this many seconds, covering the replication lag. The flag lives
+# in this cache, with several server processes it has to be one they share (e.g. Redis), see app.checks
+REPLICA_STICKY_SECONDS = 10
+REPLICA_STICKY_CACHE_ALIAS = 'default'
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -141,12 +171,44 @@ AUTH_USER_MODEL = 'app.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'app.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_FILTER_BACKENDS': ('django_filters.rest_framework.DjangoFilterBackend',),
+    # Token buckets, see app.throttling: '<count>/<period>' allows bursts of count, refilled over the period
+    'DEFAULT_THROTTLE_RATES': {
+        'answers': '120/min',  # per token
+        'invites': '60/min',  # per token
+        # per quiz, a token per invitation created as each sends an email. Bigger batches overdraw the bucket
+        'invites.quiz': '600/hour',
+    },
 }
 
+# Throttle buckets are kept in a bounded in-process LRU, use app.throttling.CacheBucketStore with CACHE_ALIAS
+# pointing at a shared cache to throttle across processes
+THROTTLE_BUCKETS = {
+    'STORE': 'app.throttling.LocalBucketStore',
+    'MAX_SIZE': 100000,
+    'CACHE_ALIAS': 'default',
+}
+
+# Resolved API tokens are kept in a bounded in-process LRU and, with CACHE_ALIAS set, in a shared cache as well
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 60,
+    'CACHE_ALIAS': None,
+}
+
+# New primary keys are UUIDv7: still 74 random bits, but prefixed with the creation time so inserts land at
+# the right-hand edge of the indexes instead of random pages. Turn off to go back to uuid4.
+TIME_ORDERED_IDS = True
+
+# Requests slower than this many seconds are logged with their slowest queries
+SLOW_REQUEST_THRESHOLD = 0.5
+
+# Addresses allowed to scrape /metrics without a staff session, e.g. the Prometheus server
+METRICS_ALLOWED_IPS = []
+
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
 SPECTACULAR_SETTINGS = {
@@ -1,10 +1,19 @@
 from app.views import (
+    BulkInviteToQuizView,
     InviteToQuizView,
     ParticipantAcceptInvitation,
+    ParticipantFinishQuiz,
+    QuizAnalyticsListView,
     QuizListView,
+    QuizProgressListView,
+    QuizResultListView,
+    RetriveUserQuizProgressView,
+    RetriveUserQuizResultView,
     RetriveUserQuizView,
     SpectacularElementsView,
+    UploadUserAnswerBatchView,
     UploadUserAnswerView,
+    metrics_view,
 )
 from django.contrib import admin
 from django.urls import path
@@ -14,9 +23,22 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('schema', SpectacularAPIView.as_view(), name="schema"),
     path('docs', SpectacularElementsView.as_view()),
+    path('metrics', metrics_view, name='metrics'),
     path('api/quizes', QuizListView.as_view(), name='quiz-list'),
     path('api/quizes/<uuid:quiz_id>/invite', InviteToQuizView.as_view(), name='quiz-invite'),
+    path('api/quizes/<uuid:quiz_id>/invite/bulk', BulkInviteToQuizView.as_view(), name='quiz-bulk-invite'),
     path('api/quizes/<uuid:pk>/accept', ParticipantAcceptInvitation.as_view(), name='quiz-accept-invitation'),
+    path('api/quizes/<uuid:quiz_id>/progress', QuizProgressListView.as_view(), name='quiz-progress'),
+    path('api/quizes/<uuid:quiz_id>/results', QuizResultListView.as_view(), name='quiz-results'),
+    path('api/quizes/<uuid:quiz_id>/analytics', QuizAnalyticsListView.as_view(), name='quiz-analytics'),
     path('api/user_quizes/<uuid:pk>', RetriveUserQuizView.as_view(), name='user-quiz-detail'),
     path('api/user_quizes/<uuid:pk>/answers', UploadUserAnswerView.as_view(), name='user-answer-upload'),
+    path(
+        'api/user_quizes/<uuid:pk>/answers/batch',
+        UploadUserAnswerBatchView.as_view(),
+        name='user-answer-batch-upload',
+    ),
+    path('api/user_quizes/<uuid:pk>/progress', RetriveUserQuizProgressView.as_view(), name='user-quiz-progress'),
+    path('api/user_quizes/<uuid:pk>/finish', ParticipantFinishQuiz.as_view(), name='user-quiz-finish'),
+    path('api/user_quizes/<uuid:pk>/result', RetriveUserQuizResultView.as_view(), name='user-quiz-result'),
 ]